@@ -6,32 +6,12 @@ import secrets, string
 from fastapi import FastAPI, status
 from fastapi.testclient import TestClient
 from pytest import fixture
-from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
-from app.injections import get_session
-from app.main import create_app
-from app.models import DbModel, UserModel, RideModel, ParticipationModel
-
-@fixture(scope="function")
-def app() -> FastAPI:
-    return create_app()
-
-@fixture(scope="function")
-def session(app: FastAPI) -> Generator[Session]:
-    import os
-    # Создаём БД в папке AI_Assistant_Analysis
-    db_path = os.path.join(os.path.dirname(__file__), "comprehensive_test.db")
-    engine = create_engine(f"sqlite:///{db_path}")
-    DbModel.metadata.create_all(bind=engine)
-    try:
-        with (session := Session(bind=engine)).begin():
-            app.dependency_overrides[get_session] = lambda: session
-            yield session
-            session.rollback()
-    finally:
-        DbModel.metadata.drop_all(engine)
-        engine.dispose()
+from app.models import UserModel, RideModel, ParticipationModel
+# Тот же in-memory движок и SAVEPOINT-изоляция, что и в tests/
+from tests.conftest import app, connection, engine, session  # noqa: F401
+from tests.conftest import AUTH_USER_PASSWORD, TEST_USER_PASSWORD, hashed_password
 
 @fixture(scope="function")
 def test_client(app: FastAPI, session: Session) -> Generator[TestClient]:
@@ -40,7 +20,7 @@ def test_client(app: FastAPI, session: Session) -> Generator[TestClient]:
 
 @fixture(scope="function")
 def test_user(session: Session) -> UserModel:
-    user = UserModel(username="testuser", password="testpassword")
+    user = UserModel(username="testuser", password=hashed_password(TEST_USER_PASSWORD))
     session.add(user)
     session.flush()
     return user
@@ -60,13 +40,13 @@ def test_ride(session: Session, test_user: UserModel) -> RideModel:
 
 @fixture(scope="function")
 def auth_headers(test_client: TestClient, session: Session,) -> dict[str, str]:
-    user = UserModel(username="auth_user", password="authpassword")
+    user = UserModel(username="auth_user", password=hashed_password(AUTH_USER_PASSWORD))
     session.add(user)
     session.flush()
 
     login_payload = {
         "username": user.username,
-        "password": user.password,
+        "password": AUTH_USER_PASSWORD,
     }
     login_response = test_client.post("/auth/login", data=login_payload)
     assert login_response.status_code == status.HTTP_200_OK, login_response.text
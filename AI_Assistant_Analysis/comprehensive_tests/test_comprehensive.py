@@ -9,6 +9,7 @@ from datetime import datetime, timezone
 
 from sqlalchemy.orm import Session
 from app.models import RideModel, UserModel, ParticipationModel
+from tests.conftest import hashed_password
 
 
 class TestAuthenticationFlow:
@@ -139,10 +140,13 @@ class TestParticipationManagement:
 
     def test_get_all_participations(self, test_client: TestClient, session: Session, test_user: UserModel, test_ride: RideModel):
         """Проверяем получение списка всех участий"""
-        # Создаем несколько участий
+        # Создаем несколько участий (один пользователь - одно участие в поездке)
         for i in range(3):
+            user = UserModel(username=f"list_participant{i}", password="password")
+            session.add(user)
+            session.flush()
             participation = ParticipationModel(
-                user_id=test_user.id,
+                user_id=user.id,
                 ride_id=test_ride.id,
                 latitude=40.0 + i,
                 longitude=-74.0 + i,
@@ -154,8 +158,8 @@ class TestParticipationManagement:
         assert response.status_code == status.HTTP_200_OK
         
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) >= 3
+        assert isinstance(data["items"], list)
+        assert len(data["items"]) >= 3
 
 
 class TestDataValidation:
@@ -196,7 +200,7 @@ class TestEdgeCases:
         """Проверяем что пустой список поездок возвращает пустой массив"""
         response = test_client.get("/rides/")
         assert response.status_code == status.HTTP_200_OK
-        assert response.json() == []
+        assert response.json() == {"items": [], "next_cursor": None}
 
     def test_ride_with_special_characters_in_title(self, test_client: TestClient, auth_headers: dict):
         """Проверяем что специальные символы в названии работают"""
@@ -283,7 +287,7 @@ class TestResponseFormats:
             assert field in data, f"Field {field} missing from participation response"
 
     def test_list_responses_are_arrays(self, test_client: TestClient):
-        """Проверяем что список ответы возвращают массивы"""
+        """Проверяем что список ответы возвращают страницу с массивом"""
         responses_data = [
             ("/rides/", "Rides"),
             ("/participations/", "Participations"),
@@ -293,7 +297,7 @@ class TestResponseFormats:
         for url, name in responses_data:
             response = test_client.get(url)
             assert response.status_code == status.HTTP_200_OK, f"{name} list failed"
-            assert isinstance(response.json(), list), f"{name} response is not a list"
+            assert isinstance(response.json()["items"], list), f"{name} response is not a list"
 
     def test_datetime_format_consistency(self, test_client: TestClient, test_ride):
         """Проверяем что формат datetime консистентен"""
@@ -315,7 +319,7 @@ class TestConcurrency:
         
         # Создаем нескольких пользователей
         for i in range(3):
-            user = UserModel(username=f"participant{i}", password="password")
+            user = UserModel(username=f"participant{i}", password=hashed_password("password"))
             session.add(user)
             session.flush()
             
@@ -333,4 +337,4 @@ class TestConcurrency:
         
         # Проверяем что все участия созданы
         all_participations = test_client.get("/participations/")
-        assert len(all_participations.json()) >= 3
+        assert len(all_participations.json()["items"]) >= 3
@@ -0,0 +1,177 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+
+from fastapi import HTTPException, status
+from starlette.requests import HTTPConnection
+
+from app.metrics import route_template
+
+CRITICAL = "critical"
+DEFAULT = "default"
+BULK = "bulk"
+
+# Lane of each route, by method and route template; unlisted routes take the
+# default lane. Location updates and logins must keep flowing when bulk
+# reads pile up, so they get a lane of their own. None exempts a route: the
+# live streams stay open for as long as a rider follows the ride.
+ROUTE_LANES: dict[tuple[str, str], str | None] = {
+    ("POST", "/auth/login"): CRITICAL,
+    ("POST", "/participations/"): CRITICAL,
+    ("PUT", "/participations/{id}"): CRITICAL,
+    ("POST", "/participations/locations"): CRITICAL,
+    ("GET", "/users/"): BULK,
+    ("GET", "/rides/"): BULK,
+    ("GET", "/rides/export"): BULK,
+    ("GET", "/rides/{id}/participants"): BULK,
+    ("GET", "/rides/{id}/nearby"): BULK,
+    ("GET", "/participations/"): BULK,
+    ("GET", "/participations/export"): BULK,
+    ("GET", "/participations/{id}/track"): BULK,
+    ("GET", "/rides/{id}/live"): None,
+}
+
+
+class LaneFull(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class LaneLimits:
+    concurrency: int  # 0: no limit
+    queue_size: int
+    queue_timeout_seconds: float
+
+
+class Lane:
+    """Concurrency limit with a bounded FIFO of waiting requests.
+
+    Requests past `concurrency` wait in line; once `queue_size` are waiting,
+    or one has waited `queue_timeout_seconds`, the next is turned away with
+    LaneFull instead of adding to the pile-up. Lives on the event loop, so
+    it needs no lock.
+    """
+
+    def __init__(self, name: str, limits: LaneLimits):
+        self.name = name
+        self.limits = limits
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        concurrency = self.limits.concurrency
+        if concurrency <= 0 or (self.active < concurrency and not self._waiters):
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.limits.queue_size:
+            self.rejected += 1
+            raise LaneFull(self.name)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.limits.queue_timeout_seconds)
+        except (TimeoutError, asyncio.CancelledError) as error:
+            if waiter.done():
+                # The slot was handed over just as we gave up: pass it on.
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(error, TimeoutError):
+                self.timed_out += 1
+                raise LaneFull(self.name) from None
+            raise
+        self.admitted += 1  # `active` was kept for us by release()
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "concurrency": self.limits.concurrency,
+            "queue_size": self.limits.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class Lanes:
+    """The app's admission lanes and the Retry-After sent when one is full."""
+
+    def __init__(self, limits: dict[str, LaneLimits], *, retry_after_seconds: int):
+        self.retry_after_seconds = retry_after_seconds
+        self._lanes = {name: Lane(name, lane_limits) for name, lane_limits in limits.items()}
+
+    def __getitem__(self, name: str) -> Lane:
+        return self._lanes[name]
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {name: lane.stats() for name, lane in self._lanes.items()}
+
+    def render(self) -> str:
+        """Lane state in the Prometheus text format, appended to GET /metrics."""
+        lines = []
+        for key, kind, help_text in (
+                ("concurrency", "gauge", "Requests a lane serves at once (0: unlimited)."),
+                ("active", "gauge", "Requests being served in a lane."),
+                ("waiting", "gauge", "Requests queued for a lane."),
+                ("admitted", "counter", "Requests a lane let through."),
+                ("rejected", "counter", "Requests turned away because the lane queue was full."),
+                ("timed_out", "counter", "Requests turned away after waiting too long in the queue."),
+        ):
+            name = f"admission_lane_{key}" + ("_total" if kind == "counter" else "")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for lane_name, lane in self._lanes.items():
+                lines.append(f"{name}{{lane=\"{lane_name}\"}} {lane.stats()[key]}")
+        return "\n".join(lines) + "\n"
+
+
+def route_lane(method: str, route: str) -> str | None:
+    return ROUTE_LANES.get((method, route), DEFAULT)
+
+
+async def admit(connection: HTTPConnection) -> AsyncGenerator[None]:
+    """Router dependency: hold a slot of the route's lane for the request.
+
+    It runs before the route's own dependencies, so a queued request holds
+    neither a worker thread nor a database connection.
+    """
+    lanes: Lanes = connection.app.state.lanes
+    scope = connection.scope
+    name = route_lane(scope["method"], route_template(scope)) if scope["type"] == "http" else None
+    if name is None:
+        yield
+        return
+
+    lane = lanes[name]
+    try:
+        await lane.acquire()
+    except LaneFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server busy ({name} requests), retry later",
+            headers={"Retry-After": str(lanes.retry_after_seconds)},
+        )
+    try:
+        yield
+    finally:
+        lane.release()
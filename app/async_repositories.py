@@ -0,0 +1,356 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, select, tuple_
+
+from collections.abc import AsyncIterator, Collection, Mapping, Sequence
+from typing import Any, List
+import secrets, string
+
+from app.geo import grid_cell
+from app.locations import LocationState, location_update, written_fixes
+from app.models import UserModel, RideModel, ParticipationModel, LocationHistoryModel
+from app.repositories import (
+    EXPORT_BATCH_SIZE,
+    LOCATION_FIX_UPDATE,
+    MAX_CODE_ATTEMPTS,
+    as_utc,
+    compaction_criteria,
+    in_grid_cells,
+    select_ride_participants,
+    select_table_version,
+    insert_location_history,
+    select_history_buckets,
+    insert_ride_ignoring_code_conflict,
+)
+
+
+class AsyncUserRepository:
+    session: AsyncSession
+
+    def __init__(self, *, session: AsyncSession):
+        self.session = session
+
+    async def create_user(self, *, username: str, password: str) -> UserModel:
+        new_user = UserModel(username=username, password=password)
+        self.session.add(new_user)
+        await self.session.flush()
+
+        return new_user
+
+    async def get_by_username(self, *, username: str) -> UserModel | None:
+        statement = select(UserModel).where(UserModel.username == username)
+        return (await self.session.execute(statement)).scalars().first()
+
+    async def get_by_id(self, *, user_id: int) -> UserModel | None:
+        return await self.session.get(UserModel, user_id)
+
+    async def get_all_users(self, *, limit: int, after_id: int | None = None) -> List[UserModel]:
+        statement = select(UserModel).order_by(UserModel.id).limit(limit)
+        if after_id is not None:
+            statement = statement.where(UserModel.id > after_id)
+        return (await self.session.execute(statement)).scalars().all()
+
+    async def update_password(self, user: UserModel, *, password: str) -> UserModel:
+        user.password = password
+        await self.session.flush()
+        return user
+
+    async def revoke_tokens(self, user: UserModel) -> UserModel:
+        user.token_version += 1
+        await self.session.flush()
+        return user
+
+
+class AsyncRideRepository:
+    session: AsyncSession
+
+    def __init__(self, *, session: AsyncSession):
+        self.session = session
+
+    def _generate_string_code(self, length: int = 6) -> str:
+        characters = string.ascii_uppercase + string.digits
+        return ''.join(secrets.choice(characters) for _ in range(length))
+
+    async def create_ride(
+            self,
+            *,
+            title: str,
+            description: str | None,
+            start_time: datetime,
+            created_by_user_id: int,
+        ) -> RideModel:
+        for _ in range(MAX_CODE_ATTEMPTS):
+            statement = insert_ride_ignoring_code_conflict(
+                self.session.get_bind().dialect.name,
+                code=self._generate_string_code(),
+                title=title,
+                description=description,
+                start_time=as_utc(start_time),
+                created_by_user_id=created_by_user_id,
+            )
+            new_ride = (await self.session.scalars(statement)).one_or_none()
+            if new_ride is not None:
+                return new_ride
+        raise RuntimeError("Could not allocate a unique ride code")
+
+    async def get_all_rides(
+            self,
+            *,
+            limit: int,
+            after: tuple[datetime, int] | None = None,
+        ) -> List[RideModel]:
+        statement = (
+            select(RideModel)
+            .order_by(RideModel.start_time, RideModel.id)
+            .limit(limit)
+        )
+        if after is not None:
+            statement = statement.where(tuple_(RideModel.start_time, RideModel.id) > after)
+        return (await self.session.execute(statement)).scalars().all()
+
+    async def iter_rides(
+            self,
+            *,
+            created_after: datetime | None = None,
+            batch_size: int = EXPORT_BATCH_SIZE,
+        ) -> AsyncIterator[Sequence[RideModel]]:
+        statement = select(RideModel).order_by(RideModel.id)
+        if created_after is not None:
+            statement = statement.where(RideModel.created_at > created_after)
+        result = await self.session.stream_scalars(statement.execution_options(yield_per=batch_size))
+        return result.partitions()
+
+    async def get_by_code(self, *, ride_code: str) -> RideModel | None:
+        statement = select(RideModel).where(RideModel.code == ride_code)
+        return (await self.session.execute(statement)).scalar_one_or_none()
+
+    async def get_by_id(self, *, ride_id: int) -> RideModel | None:
+        statement = select(RideModel).where(RideModel.id == ride_id)
+        return (await self.session.execute(statement)).scalar_one_or_none()
+
+    async def get_version(self, *, ride_id: int) -> int | None:
+        statement = select(RideModel.version).where(RideModel.id == ride_id)
+        return (await self.session.execute(statement)).scalar_one_or_none()
+
+    async def get_version_by_code(self, *, ride_code: str) -> tuple[int, int] | None:
+        statement = select(RideModel.id, RideModel.version).where(RideModel.code == ride_code)
+        row = (await self.session.execute(statement)).one_or_none()
+        return None if row is None else (row.id, row.version)
+
+    async def get_table_version(self) -> int:
+        return (await self.session.execute(select_table_version(RideModel.__tablename__))).scalar_one()
+
+    async def delete_ride(self, *, ride: RideModel) -> None:
+        await self.session.delete(ride)
+        await self.session.flush()
+
+    async def update_ride(
+            self,
+            ride: RideModel,
+            *,
+            title: str | None = None,
+            description: str | None = None,
+            start_time: datetime | None = None,
+            is_active: bool | None = None,
+        ) -> RideModel:
+        ride_to_update = {
+            "title": title,
+            "description": description,
+            "start_time": start_time,
+            "is_active": is_active,
+        }
+
+        for key, value in ride_to_update.items():
+            if value is not None:
+                setattr(ride, key, value)
+        ride.version = RideModel.version + 1
+
+        self.session.add(ride)
+        await self.session.flush()
+        return ride
+
+
+class AsyncParticipationRepository:
+    session: AsyncSession
+
+    def __init__(self, *, session: AsyncSession):
+        self.session = session
+
+    async def create_participation(
+            self,
+            *,
+            user_id: int,
+            ride_id: int,
+            latitude: float | None = None,
+            longitude: float | None = None,
+            updated_at: datetime | None = None,
+    ) -> ParticipationModel:
+        new_participation = ParticipationModel(
+            user_id=user_id,
+            ride_id=ride_id,
+            latitude=latitude,
+            longitude=longitude,
+            updated_at=updated_at,
+            grid_cell=grid_cell(latitude, longitude),
+        )
+
+        self.session.add(new_participation)
+        await self.session.flush()
+
+        return new_participation
+
+    async def get_by_user_and_ride(self, *, user_id: int, ride_id: int) -> ParticipationModel | None:
+        statement = select(ParticipationModel).where(
+            ParticipationModel.user_id == user_id,
+            ParticipationModel.ride_id == ride_id,
+        )
+        return (await self.session.execute(statement)).scalar_one_or_none()
+
+    async def get_by_id(self, *, participation_id: int) -> ParticipationModel | None:
+        return await self.session.get(ParticipationModel, participation_id)
+
+    async def get_version(self, *, participation_id: int) -> int | None:
+        statement = select(ParticipationModel.version).where(ParticipationModel.id == participation_id)
+        return (await self.session.execute(statement)).scalar_one_or_none()
+
+    async def get_all_participations(
+            self,
+            *,
+            limit: int,
+            after_id: int | None = None,
+    ) -> List[ParticipationModel]:
+        statement = select(ParticipationModel).order_by(ParticipationModel.id).limit(limit)
+        if after_id is not None:
+            statement = statement.where(ParticipationModel.id > after_id)
+        return (await self.session.execute(statement)).scalars().all()
+
+    async def get_page_versions(self, *, limit: int, after_id: int | None = None) -> Sequence[tuple[int, int]]:
+        statement = select(ParticipationModel.id, ParticipationModel.version).order_by(ParticipationModel.id)
+        if after_id is not None:
+            statement = statement.where(ParticipationModel.id > after_id)
+        return (await self.session.execute(statement.limit(limit))).all()
+
+    async def iter_participations(
+            self,
+            *,
+            updated_after: datetime | None = None,
+            batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[Sequence[ParticipationModel]]:
+        statement = select(ParticipationModel).order_by(ParticipationModel.id)
+        if updated_after is not None:
+            statement = statement.where(ParticipationModel.updated_at > updated_after)
+        result = await self.session.stream_scalars(statement.execution_options(yield_per=batch_size))
+        return result.partitions()
+
+    async def get_location_states(
+            self,
+            *,
+            participation_ids: Collection[int],
+    ) -> dict[int, LocationState]:
+        statement = select(
+            ParticipationModel.id,
+            ParticipationModel.user_id,
+            ParticipationModel.ride_id,
+            ParticipationModel.updated_at,
+        ).where(ParticipationModel.id.in_(participation_ids))
+        result = await self.session.execute(statement)
+        return {row.id: LocationState(*row[1:]) for row in result}
+
+    async def apply_location_fixes(self, updates: Sequence[Mapping[str, Any]]) -> set[int]:
+        if not updates:
+            return set()
+        if (await self.session.execute(LOCATION_FIX_UPDATE, list(updates))).rowcount == len(updates):
+            return {update["b_id"] for update in updates}
+        states = await self.get_location_states(participation_ids={update["b_id"] for update in updates})
+        return written_fixes(updates, states)
+
+    async def get_ride_participants(
+            self,
+            *,
+            ride_id: int,
+            limit: int,
+            after_id: int | None = None,
+    ) -> Sequence[ParticipationModel]:
+        statement = select_ride_participants(ride_id, limit=limit, after_id=after_id)
+        return (await self.session.execute(statement)).scalars().all()
+
+    async def get_in_grid_cells(
+            self,
+            *,
+            ride_id: int,
+            ranges: Sequence[tuple[int, int]],
+    ) -> Sequence[ParticipationModel]:
+        return (await self.session.execute(in_grid_cells(ride_id, ranges))).scalars().all()
+
+    async def update_participation(
+        self,
+        participation: ParticipationModel,
+        *,
+        latitude: float,
+        longitude: float,
+        updated_at: datetime
+    ) -> bool:
+        """Write one fix with the guard of LOCATION_FIX_UPDATE; returns whether it was.
+
+        A fix no newer than the stored one is dropped, as in location
+        batches. `participation` is reloaded either way, so it shows the
+        newest stored fix.
+        """
+        # One row, so the rowcount tells whether the guard matched.
+        fix = location_update(participation.id, latitude, longitude, updated_at)
+        written = (await self.session.execute(LOCATION_FIX_UPDATE, fix)).rowcount == 1
+        await self.session.refresh(participation)
+        return written
+
+
+class AsyncLocationHistoryRepository:
+    session: AsyncSession
+
+    def __init__(self, *, session: AsyncSession):
+        self.session = session
+
+    def _dialect_name(self) -> str:
+        return self.session.get_bind().dialect.name
+
+    async def record_fixes(self, fixes: Sequence[Mapping[str, Any]]) -> None:
+        if fixes:
+            await self.session.execute(insert_location_history(self._dialect_name()), list(fixes))
+
+    async def get_time_range(self, *, participation_id: int) -> tuple[datetime | None, datetime | None]:
+        statement = select(
+            func.min(LocationHistoryModel.recorded_at), func.max(LocationHistoryModel.recorded_at),
+        ).where(LocationHistoryModel.participation_id == participation_id)
+        first, last = (await self.session.execute(statement)).one()
+        return first, last
+
+    async def get_track(
+            self,
+            *,
+            participation_id: int,
+            start: datetime,
+            end: datetime,
+            bucket_seconds: int,
+    ) -> Sequence[Any]:
+        statement = select_history_buckets(
+            self._dialect_name(),
+            bucket_seconds,
+            LocationHistoryModel.participation_id == participation_id,
+            LocationHistoryModel.recorded_at >= as_utc(start),
+            LocationHistoryModel.recorded_at <= as_utc(end),
+        )
+        return (await self.session.execute(statement)).all()
+
+    async def compact(self, *, older_than: datetime, bucket_seconds: int) -> int:
+        criteria = compaction_criteria(older_than, bucket_seconds)
+        buckets = (await self.session.execute(
+            select_history_buckets(self._dialect_name(), bucket_seconds, criteria)
+        )).all()
+        if not buckets:
+            return 0
+        removed = (await self.session.execute(
+            delete(LocationHistoryModel.__table__).where(criteria)
+        )).rowcount
+        await self.session.execute(insert(LocationHistoryModel.__table__), [
+            {**bucket._asdict(), "resolution_seconds": bucket_seconds} for bucket in buckets
+        ])
+        return removed
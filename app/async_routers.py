@@ -0,0 +1,776 @@
+from datetime import datetime
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.async_repositories import (
+    AsyncUserRepository,
+    AsyncRideRepository,
+    AsyncParticipationRepository,
+    AsyncLocationHistoryRepository,
+)
+from app.admission import admit
+from app.auth_cache import TokenCache, TokenVersions
+from app.injections import (
+    get_live_broker,
+    get_async_live_publisher,
+    get_async_live_ride_id,
+    get_location_buffer,
+    get_password_hasher,
+    get_token_cache,
+    get_token_versions,
+    get_async_user_repository,
+    get_async_read_user_repository,
+    get_async_ride_repository,
+    get_async_read_ride_repository,
+    get_async_participation_repository,
+    get_async_read_participation_repository,
+    get_async_location_history_repository,
+    get_async_read_location_history_repository,
+)
+from app.models import UserModel
+from app.routers import (
+    oauth2_scheme,
+    ensure_not_revoked,
+    principal_from_claims,
+    principal_from_user,
+    verified_claims,
+)
+from app.passwords import PasswordHasher
+from app.conditional import etag, has_validator, is_fresh, not_modified, rows_etag
+from app.geo import MAX_NEARBY_RADIUS_M, cell_ranges, within_radius
+from app.live import SSE_MEDIA_TYPE, LiveBroker, LivePublisher, stream_sse, stream_websocket
+from app.location_buffer import LocationBuffer, buffered_version, merge_buffered
+from app.locations import (
+    DEFAULT_TRACK_POINTS,
+    MAX_TRACK_POINTS,
+    applied_participations,
+    history_row,
+    is_newer_fix,
+    location_update,
+    plan_location_fixes,
+    recorded_fixes,
+    settle_location_fixes,
+    track_bucket_seconds,
+)
+from app.ndjson import NDJSON_MEDIA_TYPE, async_ndjson_batches
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, paginate
+from app.serialization import page_response
+from app.schemas import (
+    Page,
+    UserResponse,
+    UserCreate,
+    TokenResponse,
+    RideResponse,
+    RideCreate,
+    RideUpdate,
+    ParticipationCreate,
+    ParticipationResponse,
+    ParticipationUpdate,
+    NearbyParticipation,
+    RideParticipant,
+    LocationBatch,
+    LocationBatchResponse,
+    TrackPoint,
+    TrackResponse,
+)
+
+from app.security import create_access_token
+
+# Same routes as app.routers, served with `async def` endpoints on an
+# AsyncSession. Selected by create_app() when DATABASE_ASYNC is enabled.
+user_router = APIRouter(dependencies=[Depends(admit)])
+auth_router = APIRouter(dependencies=[Depends(admit)])
+ride_router = APIRouter(dependencies=[Depends(admit)])
+participation_router = APIRouter(dependencies=[Depends(admit)])
+
+
+# ------------- USER ROUTES ------------- #
+
+@user_router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_409_CONFLICT: {}},
+)
+async def create_user(
+    user_to_create: UserCreate,
+    user_repository: Annotated[
+        AsyncUserRepository, Depends(get_async_user_repository)
+    ],
+    password_hasher: Annotated[PasswordHasher, Depends(get_password_hasher)],
+) -> UserResponse:
+    existing_user = await user_repository.get_by_username(username=user_to_create.username)
+    if existing_user:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT)
+
+    password = await password_hasher.hash_async(user_to_create.password)
+    try:
+        user_model = await user_repository.create_user(
+            username=user_to_create.username, password=password
+        )
+        return UserResponse.model_validate(user_model)
+    except Exception as exception:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT) from exception
+
+@user_router.get(
+    "/{id}",
+    response_model=UserResponse,
+    responses={status.HTTP_404_NOT_FOUND: {}},
+)
+async def get_user(
+    id: int,
+    user_repository: Annotated[
+        AsyncUserRepository, Depends(get_async_read_user_repository)
+    ],
+) -> UserResponse:
+    user = await user_repository.get_by_id(user_id=id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return UserResponse.model_validate(user)
+
+@user_router.get(
+    "/",
+    response_model=Page[UserResponse],
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_400_BAD_REQUEST: {}},
+)
+async def get_list_users(
+    user_repository: Annotated[AsyncUserRepository, Depends(get_async_read_user_repository)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Page[UserResponse]:
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    users = await user_repository.get_all_users(limit=limit + 1, after_id=after_id)
+    page, next_cursor = paginate(users, limit=limit, key=lambda user: (user.id,))
+    return Page[UserResponse](
+        items=[UserResponse.model_validate(user) for user in page],
+        next_cursor=next_cursor,
+    )
+
+
+# ------------- AUTH ROUTES ------------- #
+@auth_router.post(
+    "/login",
+    response_model=TokenResponse,
+    responses={status.HTTP_401_UNAUTHORIZED: {}},
+)
+async def login(
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    user_repository: Annotated[AsyncUserRepository, Depends(get_async_user_repository)],
+    password_hasher: Annotated[PasswordHasher, Depends(get_password_hasher)],
+) -> TokenResponse:
+    user = await user_repository.get_by_username(username=form_data.username)
+    # Unknown users are checked against a dummy hash: same cost as a wrong password.
+    if not await password_hasher.verify_async(form_data.password, user.password if user else None):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid username or password",
+        )
+    if password_hasher.needs_rehash(user.password):
+        password = await password_hasher.hash_async(form_data.password)
+        await user_repository.update_password(user, password=password)
+
+    access_token = create_access_token(
+        subject=str(user.id),
+        claims={"username": user.username, "ver": user.token_version},
+    )
+
+    return TokenResponse(
+        access_token=access_token,
+        token_type="bearer",
+    )
+
+async def get_current_user_model(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    user_repository: Annotated[AsyncUserRepository, Depends(get_async_user_repository)],
+) -> UserModel:
+    claims = verified_claims(token)
+    user = await user_repository.get_by_id(user_id=int(claims["sub"]))
+    principal_from_user(claims, user)
+    return user
+
+async def authenticate(
+    token: str,
+    token_cache: TokenCache,
+    token_versions: TokenVersions,
+    user_repository: AsyncUserRepository,
+) -> UserResponse:
+    cached = token_cache.get(token)
+    if cached:
+        ensure_not_revoked(cached.principal.id, cached.token_version, token_versions)
+        return cached.principal
+
+    claims = verified_claims(token)
+    if "ver" in claims:
+        ensure_not_revoked(int(claims["sub"]), claims["ver"], token_versions)
+    principal = principal_from_claims(claims, token_versions)
+    if principal is None:
+        user = await user_repository.get_by_id(user_id=int(claims["sub"]))
+        principal = principal_from_user(claims, user)
+    # Tokens from before the `ver` claim stand for the version they were checked against.
+    token_version = claims["ver"] if "ver" in claims else user.token_version
+    token_cache.put(token, claims, principal, token_version)
+    return principal
+
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    token_cache: Annotated[TokenCache, Depends(get_token_cache)],
+    token_versions: Annotated[TokenVersions, Depends(get_token_versions)],
+    user_repository: Annotated[AsyncUserRepository, Depends(get_async_user_repository)],
+) -> UserResponse:
+    return await authenticate(token, token_cache, token_versions, user_repository)
+
+async def get_read_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    token_cache: Annotated[TokenCache, Depends(get_token_cache)],
+    token_versions: Annotated[TokenVersions, Depends(get_token_versions)],
+    user_repository: Annotated[AsyncUserRepository, Depends(get_async_read_user_repository)],
+) -> UserResponse:
+    """get_current_user for GET routes: a cache miss looks the user up on the read session."""
+    return await authenticate(token, token_cache, token_versions, user_repository)
+
+
+@auth_router.get(
+    "/me",
+    response_model=UserResponse,
+    responses={status.HTTP_401_UNAUTHORIZED: {}},
+)
+async def get_me(current_user: Annotated[UserResponse, Depends(get_read_current_user)],
+) -> UserResponse:
+    return current_user
+
+
+@auth_router.post(
+    "/revoke",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_401_UNAUTHORIZED: {}},
+)
+async def revoke_tokens(
+    current_user: Annotated[UserModel, Depends(get_current_user_model)],
+    user_repository: Annotated[AsyncUserRepository, Depends(get_async_user_repository)],
+) -> Response:
+    await user_repository.revoke_tokens(current_user)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+# ------------- RIDE ROUTES ------------- #
+
+@ride_router.post(
+    "/",
+    response_model=RideResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_422_UNPROCESSABLE_CONTENT: {}},
+)
+async def create_ride(
+    ride_to_create: RideCreate,
+    ride_repository: Annotated[AsyncRideRepository, Depends(get_async_ride_repository)],
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+) -> RideResponse:
+
+    ride_model = await ride_repository.create_ride(
+        title=ride_to_create.title,
+        description=ride_to_create.description,
+        start_time=ride_to_create.start_time,
+        created_by_user_id=current_user.id,
+    )
+    return RideResponse.model_validate(ride_model)
+
+@ride_router.get(
+    "/",
+    response_model=Page[RideResponse],
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_400_BAD_REQUEST: {}},
+)
+async def get_list_rides(
+    request: Request,
+    ride_repository: Annotated[AsyncRideRepository, Depends(get_async_read_ride_repository)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Page[RideResponse]:
+    current = etag("rides", await ride_repository.get_table_version())
+    if is_fresh(request, current):
+        return not_modified(current)
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    rides = await ride_repository.get_all_rides(limit=limit + 1, after=after)
+    page, next_cursor = paginate(rides, limit=limit, key=lambda ride: (ride.start_time, ride.id))
+    return page_response(page, RideResponse, next_cursor, headers={"ETag": current})
+
+@ride_router.get(
+    "/export",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def export_rides(
+    ride_repository: Annotated[AsyncRideRepository, Depends(get_async_read_ride_repository)],
+    created_after: datetime | None = None,
+) -> StreamingResponse:
+    batches = await ride_repository.iter_rides(created_after=created_after)
+    return StreamingResponse(async_ndjson_batches(batches, RideResponse), media_type=NDJSON_MEDIA_TYPE)
+
+@ride_router.get(
+    "/code/{code}",
+    response_model=RideResponse,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_404_NOT_FOUND: {}},
+)
+async def get_ride_by_code(
+    code: str,
+    request: Request,
+    response: Response,
+    ride_repository: Annotated[
+        AsyncRideRepository, Depends(get_async_read_ride_repository)
+    ],
+) -> RideResponse:
+    if has_validator(request):
+        found = await ride_repository.get_version_by_code(ride_code=code)
+        if found and is_fresh(request, current := etag("ride", *found)):
+            return not_modified(current)
+    ride = await ride_repository.get_by_code(ride_code=code)
+    if not ride:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    response.headers["ETag"] = etag("ride", ride.id, ride.version)
+    return RideResponse.model_validate(ride)
+
+@ride_router.get(
+        "/{id}",
+        response_model=RideResponse,
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_404_NOT_FOUND: {}},
+)
+async def get_ride_by_id(
+        id: int,
+        request: Request,
+        response: Response,
+        ride_repository: Annotated[AsyncRideRepository, Depends(get_async_read_ride_repository)],
+) -> RideResponse:
+    # A revalidation reads the version column only; the row is loaded and
+    # serialized when it has changed.
+    if has_validator(request):
+        version = await ride_repository.get_version(ride_id=id)
+        if version is not None and is_fresh(request, current := etag("ride", id, version)):
+            return not_modified(current)
+    ride = await ride_repository.get_by_id(ride_id=id)
+    if not ride:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    response.headers["ETag"] = etag("ride", ride.id, ride.version)
+    return RideResponse.model_validate(ride)
+
+@ride_router.get(
+        "/{id}/participants",
+        response_model=Page[RideParticipant],
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_400_BAD_REQUEST: {}, status.HTTP_404_NOT_FOUND: {}},
+)
+async def get_ride_participants(
+        id: int,
+        ride_repository: Annotated[AsyncRideRepository, Depends(get_async_read_ride_repository)],
+        participation_repository: Annotated[
+            AsyncParticipationRepository,
+            Depends(get_async_read_participation_repository),
+        ],
+        location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+) -> Page[RideParticipant]:
+    if not await ride_repository.get_by_id(ride_id=id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    participations = await participation_repository.get_ride_participants(
+        ride_id=id, limit=limit + 1, after_id=after_id,
+    )
+    page, next_cursor = paginate(participations, limit=limit, key=lambda r: (r.id,))
+    return page_response(merge_buffered(location_buffer, page), RideParticipant, next_cursor)
+
+@ride_router.get(
+        "/{id}/nearby",
+        response_model=List[NearbyParticipation],
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_404_NOT_FOUND: {}},
+)
+async def get_nearby_participations(
+        id: int,
+        lat: Annotated[float, Query(ge=-90, le=90)],
+        lon: Annotated[float, Query(ge=-180, le=180)],
+        radius_m: Annotated[float, Query(gt=0, le=MAX_NEARBY_RADIUS_M)],
+        ride_repository: Annotated[AsyncRideRepository, Depends(get_async_read_ride_repository)],
+        participation_repository: Annotated[
+            AsyncParticipationRepository,
+            Depends(get_async_read_participation_repository),
+        ],
+        location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+) -> List[NearbyParticipation]:
+    if not await ride_repository.get_by_id(ride_id=id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    # The grid narrows the ride to the cells around the circle; the exact
+    # distance check then drops the corners. Buffered fixes move candidates
+    # within the circle, but not into it until they are flushed.
+    candidates = merge_buffered(location_buffer, await participation_repository.get_in_grid_cells(
+        ride_id=id, ranges=cell_ranges(lat, lon, radius_m),
+    ))
+    return [
+        NearbyParticipation(**ParticipationResponse.model_validate(participation).model_dump(), distance_m=distance)
+        for participation, distance in within_radius(lat, lon, radius_m, candidates)
+    ]
+
+@ride_router.get(
+        "/{id}/live",
+        response_class=StreamingResponse,
+        status_code=status.HTTP_200_OK,
+        responses={
+            status.HTTP_200_OK: {"content": {SSE_MEDIA_TYPE: {}}},
+            status.HTTP_404_NOT_FOUND: {},
+        },
+)
+async def stream_ride_live(
+        request: Request,
+        ride_id: Annotated[int, Depends(get_async_live_ride_id)],
+        broker: Annotated[LiveBroker, Depends(get_live_broker)],
+) -> StreamingResponse:
+    heartbeat_seconds = request.app.state.settings.live_heartbeat_seconds
+    return StreamingResponse(
+        stream_sse(broker, ride_id, heartbeat_seconds=heartbeat_seconds),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@ride_router.websocket("/{id}/live/ws")
+async def stream_ride_live_ws(
+        websocket: WebSocket,
+        ride_id: Annotated[int, Depends(get_async_live_ride_id)],
+        broker: Annotated[LiveBroker, Depends(get_live_broker)],
+) -> None:
+    await stream_websocket(websocket, broker, ride_id)
+
+@ride_router.delete(
+    "/{id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_404_NOT_FOUND: {},
+        status.HTTP_403_FORBIDDEN: {},
+        },
+)
+async def delete_ride_by_id(
+    id: int,
+    ride_repository: Annotated[AsyncRideRepository, Depends(get_async_ride_repository)],
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+) -> None:
+    selected_ride = await ride_repository.get_by_id(ride_id=id)
+    if not selected_ride:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if selected_ride.created_by_user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowes to delete this ride. The ride was created by another user"
+            )
+
+    await ride_repository.delete_ride(ride=selected_ride)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@ride_router.put(
+    "/{id}",
+    response_model=RideResponse,
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_404_NOT_FOUND: {},
+        status.HTTP_403_FORBIDDEN: {},
+    }
+)
+async def update_ride_by_id(
+    id: int,
+    ride_to_update: RideUpdate,
+    ride_repository: Annotated[AsyncRideRepository, Depends(get_async_ride_repository)],
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+) -> RideResponse:
+
+    existing_ride = await ride_repository.get_by_id(ride_id=id)
+    if not existing_ride:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if existing_ride.created_by_user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowes to update this ride. It belongs to another user",
+            )
+
+    ride_model = await ride_repository.update_ride(
+        existing_ride,
+        title=ride_to_update.title,
+        description=ride_to_update.description,
+        start_time=ride_to_update.start_time,
+        is_active=ride_to_update.is_active,
+    )
+    return RideResponse.model_validate(ride_model)
+
+
+# ------------- PARTICIPANTS ROUTES ------------- #
+
+@participation_router.get(
+        "/",
+        response_model=Page[ParticipationResponse],
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_400_BAD_REQUEST: {}},
+)
+async def get_list_participations(
+    request: Request,
+    participation_repository: Annotated[
+        AsyncParticipationRepository,
+        Depends(get_async_read_participation_repository),
+        ],
+    location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Page[ParticipationResponse]:
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    versions = await participation_repository.get_page_versions(limit=limit + 1, after_id=after_id)
+    current = rows_etag("participations", [
+        (participation_id, version, *buffered_version(location_buffer, participation_id))
+        for participation_id, version in versions
+    ])
+    if is_fresh(request, current):
+        return not_modified(current)
+    participations = await participation_repository.get_all_participations(
+        limit=limit + 1, after_id=after_id,
+    )
+    page, next_cursor = paginate(participations, limit=limit, key=lambda r: (r.id,))
+    page = merge_buffered(location_buffer, page)
+    return page_response(page, ParticipationResponse, next_cursor, headers={"ETag": current})
+
+@participation_router.get(
+        "/export",
+        response_class=StreamingResponse,
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def export_participations(
+    participation_repository: Annotated[
+        AsyncParticipationRepository,
+        Depends(get_async_read_participation_repository),
+        ],
+    location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+    updated_after: datetime | None = None,
+) -> StreamingResponse:
+    batches = (
+        merge_buffered(location_buffer, batch)
+        async for batch in await participation_repository.iter_participations(updated_after=updated_after)
+    )
+    return StreamingResponse(async_ndjson_batches(batches, ParticipationResponse), media_type=NDJSON_MEDIA_TYPE)
+
+@participation_router.post(
+    "/",
+    response_model=ParticipationResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_404_NOT_FOUND: {},
+        status.HTTP_409_CONFLICT: {},
+        status.HTTP_422_UNPROCESSABLE_CONTENT: {},
+    },
+)
+async def create_participation(
+    participation_to_create: ParticipationCreate,
+    participation_repository: Annotated[
+        AsyncParticipationRepository, Depends(get_async_participation_repository)
+    ],
+    ride_repository: Annotated[AsyncRideRepository, Depends(get_async_ride_repository)],
+    history_repository: Annotated[
+        AsyncLocationHistoryRepository, Depends(get_async_location_history_repository)
+    ],
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    live_publisher: Annotated[LivePublisher, Depends(get_async_live_publisher)],
+) -> ParticipationResponse:
+    current_ride = await ride_repository.get_by_code(ride_code=participation_to_create.ride_code)
+    if not current_ride:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    existing_participation = await participation_repository.get_by_user_and_ride(
+        user_id=current_user.id, ride_id=current_ride.id,
+    )
+    if existing_participation:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Already participating in this ride",
+        )
+
+    participation_model = await participation_repository.create_participation(
+        user_id=current_user.id,
+        ride_id=current_ride.id,
+        latitude=participation_to_create.latitude,
+        longitude=participation_to_create.longitude,
+        updated_at=participation_to_create.updated_at,
+    )
+    participation = ParticipationResponse.model_validate(participation_model)
+    if None not in (participation.latitude, participation.longitude, participation.updated_at):
+        await history_repository.record_fixes([history_row(
+            participation.id, participation.latitude, participation.longitude, participation.updated_at,
+        )])
+    live_publisher.publish(participation.ride_id, participation)
+    return participation
+
+@participation_router.post(
+    "/locations",
+    response_model=LocationBatchResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def update_locations(
+    batch: LocationBatch,
+    participation_repository: Annotated[AsyncParticipationRepository, Depends(get_async_participation_repository)],
+    history_repository: Annotated[
+        AsyncLocationHistoryRepository, Depends(get_async_location_history_repository)
+    ],
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    live_publisher: Annotated[LivePublisher, Depends(get_async_live_publisher)],
+    location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+) -> LocationBatchResponse:
+    states = await participation_repository.get_location_states(
+        participation_ids={fix.participation_id for fix in batch.fixes},
+    )
+    if location_buffer is not None:
+        states = location_buffer.merge_states(states)
+    results, updates = plan_location_fixes(batch.fixes, states, user_id=current_user.id)
+    if location_buffer is not None:
+        applied = location_buffer.put(updates, recorded_fixes(batch.fixes, results))
+    else:
+        applied = await participation_repository.apply_location_fixes(updates)
+        await history_repository.record_fixes(recorded_fixes(batch.fixes, results))
+    results, updates = settle_location_fixes(results, updates, applied)
+    for participation in applied_participations(updates, states):
+        live_publisher.publish(participation.ride_id, participation)
+    return LocationBatchResponse(results=results)
+
+@participation_router.get(
+        "/{id}",
+        response_model=ParticipationResponse,
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_404_NOT_FOUND: {}},
+)
+async def get_participation_by_id(
+        id: int,
+        request: Request,
+        response: Response,
+        participation_repository: Annotated[
+            AsyncParticipationRepository,
+            Depends(get_async_read_participation_repository),
+        ],
+        location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+) -> ParticipationResponse:
+    buffered = buffered_version(location_buffer, id)
+    if has_validator(request):
+        version = await participation_repository.get_version(participation_id=id)
+        if version is not None and is_fresh(request, current := etag("participation", id, version, *buffered)):
+            return not_modified(current)
+    participation = await participation_repository.get_by_id(participation_id=id)
+    if not participation:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    response.headers["ETag"] = etag("participation", participation.id, participation.version, *buffered)
+    (participation,) = merge_buffered(location_buffer, [participation])
+    return ParticipationResponse.model_validate(participation)
+
+@participation_router.get(
+        "/{id}/track",
+        response_model=TrackResponse,
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_404_NOT_FOUND: {}},
+)
+async def get_participation_track(
+        id: int,
+        participation_repository: Annotated[
+            AsyncParticipationRepository,
+            Depends(get_async_read_participation_repository),
+        ],
+        history_repository: Annotated[
+            AsyncLocationHistoryRepository,
+            Depends(get_async_read_location_history_repository),
+        ],
+        start: Annotated[datetime | None, Query(alias="from")] = None,
+        end: Annotated[datetime | None, Query(alias="to")] = None,
+        max_points: Annotated[int, Query(ge=2, le=MAX_TRACK_POINTS)] = DEFAULT_TRACK_POINTS,
+) -> TrackResponse:
+    if not await participation_repository.get_by_id(participation_id=id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if start is None or end is None:
+        first, last = await history_repository.get_time_range(participation_id=id)
+        if first is None:
+            return TrackResponse(participation_id=id, bucket_seconds=1, points=[])
+        start, end = start or first, end or last
+
+    bucket_seconds = track_bucket_seconds(start, end, max_points)
+    rows = await history_repository.get_track(
+        participation_id=id, start=start, end=end, bucket_seconds=bucket_seconds,
+    )
+    return TrackResponse(
+        participation_id=id,
+        bucket_seconds=bucket_seconds,
+        points=[TrackPoint.model_validate(row) for row in rows],
+    )
+
+@participation_router.put(
+    "/{id}",
+    response_model=ParticipationResponse,
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_404_NOT_FOUND: {},
+        status.HTTP_403_FORBIDDEN: {},
+    },
+)
+async def update_participation_by_id(
+    id: int,
+    participation_to_update: ParticipationUpdate,
+    participation_repository: Annotated[
+        AsyncParticipationRepository,
+        Depends(get_async_participation_repository),
+    ],
+    current_user: Annotated[
+        UserResponse,
+        Depends(get_current_user),
+    ],
+    history_repository: Annotated[
+        AsyncLocationHistoryRepository, Depends(get_async_location_history_repository)
+    ],
+    live_publisher: Annotated[LivePublisher, Depends(get_async_live_publisher)],
+    location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+) -> ParticipationResponse:
+
+    existing_participation = await participation_repository.get_by_id(participation_id=id)
+    if not existing_participation:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if existing_participation.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to update this participation. It belongs to another user",
+            )
+
+    fix = (
+        id,
+        participation_to_update.latitude,
+        participation_to_update.longitude,
+        participation_to_update.updated_at,
+    )
+    update = location_update(*fix)
+    # Last write wins in both modes: a fix no newer than the stored (or
+    # buffered) one is kept in the history but does not move the
+    # participation, and the response shows the newer position.
+    if location_buffer is not None:
+        # Acknowledged now, written by the next flush; the response shows
+        # the newest buffered fix.
+        taken = [update] if is_newer_fix(update, existing_participation.updated_at) else []
+        applied = id in location_buffer.put(taken, [history_row(*fix)])
+        (participation_model,) = location_buffer.merge([existing_participation])
+    else:
+        applied = await participation_repository.update_participation(
+            existing_participation,
+            latitude=participation_to_update.latitude,
+            longitude=participation_to_update.longitude,
+            updated_at=participation_to_update.updated_at,
+        )
+        await history_repository.record_fixes([history_row(*fix)])
+        participation_model = existing_participation
+
+    participation = ParticipationResponse.model_validate(participation_model)
+    if applied:
+        live_publisher.publish(participation.ride_id, participation)
+    return participation
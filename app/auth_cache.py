@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Collection
+from dataclasses import dataclass
+from typing import Any
+from weakref import WeakSet
+
+from sqlalchemy import Engine, event, select
+from sqlalchemy.orm import Session, SessionTransaction, object_session
+
+from app.models import UserModel
+from app.schemas import UserResponse
+
+
+@dataclass(frozen=True)
+class CachedPrincipal:
+    claims: dict[str, Any]
+    principal: UserResponse
+    token_version: int  # checked against TokenVersions on every hit
+    expires_at: float
+
+
+class TokenCache:
+    """Bounded LRU of verified access tokens and the user they resolve to.
+
+    Saves the JWT signature check and the `users` lookup on every
+    authenticated request. Entries expire at the token's `exp` and are dropped
+    once an ORM update or delete of the user row commits. Every hit is still
+    checked against TokenVersions, which also sees changes made elsewhere.
+    """
+
+    def __init__(self, *, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, CachedPrincipal] = OrderedDict()
+        self._lock = threading.Lock()
+        _live_caches.add(self)
+
+    def get(self, token: str) -> CachedPrincipal | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.time():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry
+
+    def put(self, token: str, claims: dict[str, Any], principal: UserResponse, token_version: int) -> None:
+        if self.max_size <= 0:
+            return
+        entry = CachedPrincipal(
+            claims=claims, principal=principal, token_version=token_version, expires_at=float(claims["exp"]),
+        )
+        with self._lock:
+            self._entries[token] = entry
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            stale = [token for token, entry in self._entries.items() if entry.principal.id == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def user_ids(self) -> set[int]:
+        with self._lock:
+            return {entry.principal.id for entry in self._entries.values()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class TokenVersions:
+    """Revocation table, consulted for every token and every cache hit.
+
+    Holds the token version of every user that has revoked tokens (version > 0)
+    plus deleted users. A token is accepted while its version is at least the
+    known one. Commits in this process apply at once; changes made by other
+    processes or by Core statements are picked up by `refresh`, so they lag by
+    one refresh interval. `stateless` also trusts the principal in the token
+    claims (AUTH_STATELESS) instead of looking the user up.
+    """
+
+    def __init__(self, *, stateless: bool = False):
+        self.stateless = stateless
+        self._versions: dict[int, int] = {}
+        self._deleted: set[int] = set()
+        self._lock = threading.Lock()
+        _live_version_tables.add(self)
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        with self._lock:
+            if user_id in self._deleted:
+                return False
+            return version >= self._versions.get(user_id, 0)
+
+    def record(self, user_id: int, version: int) -> None:
+        with self._lock:
+            self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+
+    def record_deleted(self, user_id: int) -> None:
+        with self._lock:
+            self._deleted.add(user_id)
+
+    def refresh(self, engine: Engine, user_ids: Collection[int] = ()) -> int:
+        """Reload the versions; those of `user_ids` (cached principals) that are gone count as deleted."""
+        statement = select(UserModel.id, UserModel.token_version).where(UserModel.token_version > 0)
+        with engine.connect() as connection:
+            loaded = dict(connection.execute(statement).all())
+            existing = set(connection.execute(
+                select(UserModel.id).where(UserModel.id.in_(user_ids))
+            ).scalars()) if user_ids else set()
+        with self._lock:
+            self._deleted.update(set(user_ids) - existing)
+            # Versions only grow; keep local bumps the snapshot may not have seen yet.
+            for user_id, version in self._versions.items():
+                loaded[user_id] = max(version, loaded.get(user_id, 0))
+            self._versions = loaded
+            return len(loaded)
+
+
+async def run_token_version_refresh(
+        token_versions: TokenVersions,
+        token_cache: TokenCache,
+        engine: Engine,
+        interval_seconds: float,
+) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(token_versions.refresh, engine, token_cache.user_ids())
+        except Exception as exception:
+            print(f"Token version refresh failed: {exception}")
+
+
+# Mapper events are global, caches are per app: fan out to every live cache.
+_live_caches: "WeakSet[TokenCache]" = WeakSet()
+_live_version_tables: "WeakSet[TokenVersions]" = WeakSet()
+
+
+# User changes are flushed before they commit: queue them per session with
+# the transaction that flushed them, and apply them only on commit.
+_PENDING_USER_CHANGES = "auth_cache.pending_user_changes"
+
+
+def _queue_user_change(target: UserModel, token_version: int | None) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    session.info.setdefault(_PENDING_USER_CHANGES, []).append((transaction, target.id, token_version))
+
+
+@event.listens_for(UserModel, "after_update")
+def _invalidate_updated_user(mapper, connection, target: UserModel) -> None:
+    _queue_user_change(target, target.token_version)
+
+
+@event.listens_for(UserModel, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target: UserModel) -> None:
+    _queue_user_change(target, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_changes(session: Session) -> None:
+    for _, user_id, token_version in session.info.pop(_PENDING_USER_CHANGES, ()):
+        for cache in list(_live_caches):
+            cache.invalidate_user(user_id)
+        for token_versions in list(_live_version_tables):
+            if token_version is None:
+                token_versions.record_deleted(user_id)
+            else:
+                token_versions.record(user_id, token_version)
+
+
+def _within(transaction: SessionTransaction | None, ancestor: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_user_changes(session: Session, previous_transaction: SessionTransaction) -> None:
+    """Forget the changes of a rolled back transaction or SAVEPOINT."""
+    pending = session.info.get(_PENDING_USER_CHANGES)
+    if pending:
+        pending[:] = [change for change in pending if not _within(change[0], previous_transaction)]
@@ -0,0 +1,73 @@
+import hashlib
+from collections.abc import Iterable
+
+from fastapi import Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+
+from app.models import RideModel
+from app.repositories import bump_table_version
+
+# Tables whose list ETag is a counter in `table_versions`, bumped by every
+# write in the same transaction. Participations are not among them: every
+# location fix would queue on that one counter row. Their list ETag is
+# derived from the page itself (`rows_etag`).
+VERSIONED_TABLES = frozenset({RideModel.__tablename__})
+
+class VersionedSession(Session):
+    """Session of the API's write routes; its writes bump `VERSIONED_TABLES`.
+
+    The bumps are listeners on this class rather than on `Session`, so
+    migrations, seed scripts, background jobs and benchmarks run without
+    them.
+    """
+
+
+def _bump(session: Session, tables: Iterable[str]) -> None:
+    connection = session.connection()
+    for name in sorted(VERSIONED_TABLES.intersection(tables)):
+        connection.execute(bump_table_version(connection.dialect.name, name))
+
+
+@event.listens_for(VersionedSession, "after_flush")
+def _bump_flushed_tables(session: Session, flush_context: UOWTransaction) -> None:
+    tables = {instance.__table__.name for instance in session.new}
+    tables.update(instance.__table__.name for instance in session.dirty if session.is_modified(instance))
+    tables.update(instance.__table__.name for instance in session.deleted)
+    _bump(session, tables)
+
+
+@event.listens_for(VersionedSession, "do_orm_execute")
+def _bump_statement_table(state: ORMExecuteState) -> None:
+    # INSERT / UPDATE / DELETE statements bypass the flush.
+    if state.is_insert or state.is_update or state.is_delete:
+        _bump(state.session, (state.statement.table.name,))
+
+
+def etag(*parts: object) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def rows_etag(name: str, rows: Iterable[tuple[object, ...]]) -> str:
+    """ETag of a page from its rows' ids and `version` columns, which every write bumps."""
+    digest = hashlib.blake2b(digest_size=8)
+    for row in rows:
+        digest.update(repr(row).encode())
+    return etag(name, digest.hexdigest())
+
+
+def has_validator(request: Request) -> bool:
+    return "if-none-match" in request.headers
+
+
+def is_fresh(request: Request, current: str) -> bool:
+    """Whether the client's If-None-Match already names `current`."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or current in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def not_modified(current: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": current})
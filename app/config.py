@@ -0,0 +1,171 @@
+import os
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value is None else int(value)
+
+
+def _env_optional_int(name: str, default: int | None) -> int | None:
+    """Like _env_int; an empty value means None (unset)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return int(value) if value.strip() else None
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str = "sqlite:///ride.db"
+    # GET routes read from this database (e.g. a replica); empty: database_url.
+    database_read_url: str = ""
+    database_async: bool = False
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: int = 30
+
+    # Applied to every new SQLite connection; an empty string / None skips a
+    # pragma and keeps SQLite's default. Zero is a value like any other
+    # (mmap_size=0 turns memory-mapped I/O off).
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int | None = 5000
+    sqlite_cache_size: int | None = -64000  # negative = KiB, i.e. 64 MiB
+    sqlite_mmap_size: int | None = 256 * 1024 * 1024
+    sqlite_foreign_keys: bool = True
+    sqlite_wal_checkpoint_seconds: int = 60
+
+    # Verified access tokens kept in memory; 0 disables the cache.
+    token_cache_size: int = 10_000
+    # Stateless mode trusts the principal in the token. In every mode,
+    # revocation is checked against an in-memory token-version table
+    # refreshed on this interval.
+    auth_stateless: bool = False
+    auth_revocation_refresh_seconds: int = 30
+    # scrypt cost; changing it rehashes each password on its next login.
+    password_scrypt_n: int = 2**14
+    password_scrypt_r: int = 8
+    password_scrypt_p: int = 1
+    password_hash_workers: int = 2
+
+    # Live ride streams: messages buffered per subscriber before the oldest
+    # are dropped, and the SSE keep-alive interval.
+    live_queue_size: int = 64
+    live_heartbeat_seconds: int = 15
+
+    # Location history: raw fixes older than the retention are rolled up into
+    # buckets of this width by a job running on this interval (0 disables).
+    history_retention_hours: int = 24
+    history_bucket_seconds: int = 60
+    history_compaction_seconds: int = 3600
+    # Write-behind location updates: fixes are buffered in memory and written
+    # in one transaction every flush interval, or once this many are waiting.
+    # The buffer is per process, so run a single worker with it.
+    location_write_behind: bool = False
+    location_flush_ms: int = 250
+    location_flush_entries: int = 5000
+
+    # Per-route latency, status and query metrics served on GET /metrics.
+    # Off by default: the endpoint has no auth and names every route, so
+    # enable it only where /metrics is reachable from the scraper alone
+    # (an internal bind, or a proxy that blocks the path).
+    metrics_enabled: bool = False
+    # Development: log relationship lazy loads hit while serializing responses.
+    debug_lazy_loads: bool = False
+
+    # Admission lanes (see app/admission.py): each serves this many requests
+    # at once (0: no limit) and queues this many more, for at most the
+    # timeout; past that a request gets 503 with Retry-After. Keep the sum of
+    # the concurrencies under the thread pool size (40) so a full bulk lane
+    # cannot take the threads the critical lane needs.
+    lane_critical_concurrency: int = 16
+    lane_critical_queue: int = 256
+    lane_default_concurrency: int = 12
+    lane_default_queue: int = 64
+    lane_bulk_concurrency: int = 4
+    lane_bulk_queue: int = 16
+    lane_queue_timeout_ms: int = 5000
+    lane_retry_after_seconds: int = 1
+
+    @property
+    def lane_limits(self) -> dict[str, tuple[int, int, float]]:
+        """(concurrency, queue size, queue timeout in seconds) of each lane."""
+        timeout = self.lane_queue_timeout_ms / 1000
+        return {
+            "critical": (self.lane_critical_concurrency, self.lane_critical_queue, timeout),
+            "default": (self.lane_default_concurrency, self.lane_default_queue, timeout),
+            "bulk": (self.lane_bulk_concurrency, self.lane_bulk_queue, timeout),
+        }
+
+    @property
+    def sqlite_pragmas(self) -> dict[str, str | int]:
+        pragmas: dict[str, str | int | None] = {
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "busy_timeout": self.sqlite_busy_timeout_ms,
+            "cache_size": self.sqlite_cache_size,
+            "mmap_size": self.sqlite_mmap_size,
+            "foreign_keys": "ON" if self.sqlite_foreign_keys else "OFF",
+        }
+        return {name: value for name, value in pragmas.items() if value is not None and value != ""}
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=os.getenv("DATABASE_URL", cls.database_url),
+            database_read_url=os.getenv("DATABASE_READ_URL", cls.database_read_url),
+            database_async=_env_bool("DATABASE_ASYNC", cls.database_async),
+            database_pool_size=_env_int("DATABASE_POOL_SIZE", cls.database_pool_size),
+            database_max_overflow=_env_int("DATABASE_MAX_OVERFLOW", cls.database_max_overflow),
+            database_pool_timeout=_env_int("DATABASE_POOL_TIMEOUT", cls.database_pool_timeout),
+            sqlite_journal_mode=os.getenv("SQLITE_JOURNAL_MODE", cls.sqlite_journal_mode),
+            sqlite_synchronous=os.getenv("SQLITE_SYNCHRONOUS", cls.sqlite_synchronous),
+            sqlite_busy_timeout_ms=_env_optional_int("SQLITE_BUSY_TIMEOUT_MS", cls.sqlite_busy_timeout_ms),
+            sqlite_cache_size=_env_optional_int("SQLITE_CACHE_SIZE", cls.sqlite_cache_size),
+            sqlite_mmap_size=_env_optional_int("SQLITE_MMAP_SIZE", cls.sqlite_mmap_size),
+            sqlite_foreign_keys=_env_bool("SQLITE_FOREIGN_KEYS", cls.sqlite_foreign_keys),
+            sqlite_wal_checkpoint_seconds=_env_int(
+                "SQLITE_WAL_CHECKPOINT_SECONDS", cls.sqlite_wal_checkpoint_seconds
+            ),
+            token_cache_size=_env_int("TOKEN_CACHE_SIZE", cls.token_cache_size),
+            auth_stateless=_env_bool("AUTH_STATELESS", cls.auth_stateless),
+            auth_revocation_refresh_seconds=_env_int(
+                "AUTH_REVOCATION_REFRESH_SECONDS", cls.auth_revocation_refresh_seconds
+            ),
+            password_scrypt_n=_env_int("PASSWORD_SCRYPT_N", cls.password_scrypt_n),
+            password_scrypt_r=_env_int("PASSWORD_SCRYPT_R", cls.password_scrypt_r),
+            password_scrypt_p=_env_int("PASSWORD_SCRYPT_P", cls.password_scrypt_p),
+            password_hash_workers=_env_int("PASSWORD_HASH_WORKERS", cls.password_hash_workers),
+            live_queue_size=_env_int("LIVE_QUEUE_SIZE", cls.live_queue_size),
+            live_heartbeat_seconds=_env_int("LIVE_HEARTBEAT_SECONDS", cls.live_heartbeat_seconds),
+            history_retention_hours=_env_int("HISTORY_RETENTION_HOURS", cls.history_retention_hours),
+            history_bucket_seconds=_env_int("HISTORY_BUCKET_SECONDS", cls.history_bucket_seconds),
+            history_compaction_seconds=_env_int(
+                "HISTORY_COMPACTION_SECONDS", cls.history_compaction_seconds
+            ),
+            location_write_behind=_env_bool("LOCATION_WRITE_BEHIND", cls.location_write_behind),
+            location_flush_ms=_env_int("LOCATION_FLUSH_MS", cls.location_flush_ms),
+            location_flush_entries=_env_int("LOCATION_FLUSH_ENTRIES", cls.location_flush_entries),
+            metrics_enabled=_env_bool("METRICS_ENABLED", cls.metrics_enabled),
+            debug_lazy_loads=_env_bool("DEBUG_LAZY_LOADS", cls.debug_lazy_loads),
+            lane_critical_concurrency=_env_int("LANE_CRITICAL_CONCURRENCY", cls.lane_critical_concurrency),
+            lane_critical_queue=_env_int("LANE_CRITICAL_QUEUE", cls.lane_critical_queue),
+            lane_default_concurrency=_env_int("LANE_DEFAULT_CONCURRENCY", cls.lane_default_concurrency),
+            lane_default_queue=_env_int("LANE_DEFAULT_QUEUE", cls.lane_default_queue),
+            lane_bulk_concurrency=_env_int("LANE_BULK_CONCURRENCY", cls.lane_bulk_concurrency),
+            lane_bulk_queue=_env_int("LANE_BULK_QUEUE", cls.lane_bulk_queue),
+            lane_queue_timeout_ms=_env_int("LANE_QUEUE_TIMEOUT_MS", cls.lane_queue_timeout_ms),
+            lane_retry_after_seconds=_env_int("LANE_RETRY_AFTER_SECONDS", cls.lane_retry_after_seconds),
+        )
@@ -0,0 +1,139 @@
+import asyncio
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.config import Settings
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    if url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    return url.render_as_string(hide_password=False)
+
+
+def _is_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def _is_memory(url: URL) -> bool:
+    return _is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def _engine_options(url: URL, settings: Settings) -> dict[str, Any]:
+    # In-memory SQLite uses a singleton/static pool that takes no sizing.
+    if _is_memory(url):
+        return {}
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_pre_ping": not _is_sqlite(url),
+    }
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: dict[str, str | int]) -> None:
+    """Run the pragma set on every new DBAPI connection of `engine`."""
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_database_engine(settings: Settings) -> Engine:
+    url = make_url(settings.database_url)
+    engine = create_engine(url, **_engine_options(url, settings))
+    if _is_sqlite(url):
+        install_sqlite_pragmas(engine, settings.sqlite_pragmas)
+    return engine
+
+
+def create_async_database_engine(settings: Settings) -> AsyncEngine:
+    url = make_url(to_async_url(settings.database_url))
+    engine = create_async_engine(url, **_engine_options(url, settings))
+    if _is_sqlite(url):
+        install_sqlite_pragmas(engine.sync_engine, settings.sqlite_pragmas)
+    return engine
+
+
+# ------------- READ ENGINES ------------- #
+# GET routes read through a separate engine: DATABASE_READ_URL (a replica)
+# when set, else the primary database. Its connections refuse writes where
+# the backend can enforce it.
+
+def _read_url(settings: Settings) -> str:
+    return settings.database_read_url or settings.database_url
+
+
+def _read_only_options(url: URL) -> dict[str, Any]:
+    if url.get_backend_name() == "postgresql":
+        return {"execution_options": {"postgresql_readonly": True}}
+    return {}
+
+
+def _read_only_pragmas(settings: Settings) -> dict[str, str | int]:
+    return {**settings.sqlite_pragmas, "query_only": "ON"}
+
+
+def create_read_database_engine(settings: Settings, primary: Engine) -> Engine:
+    url = make_url(_read_url(settings))
+    if _is_memory(url):
+        return primary  # a second engine would open a second, empty database
+    engine = create_engine(url, **_engine_options(url, settings), **_read_only_options(url))
+    if _is_sqlite(url):
+        install_sqlite_pragmas(engine, _read_only_pragmas(settings))
+    return engine
+
+
+def create_async_read_database_engine(settings: Settings, primary: AsyncEngine) -> AsyncEngine:
+    url = make_url(to_async_url(_read_url(settings)))
+    if _is_memory(url):
+        return primary
+    engine = create_async_engine(url, **_engine_options(url, settings), **_read_only_options(url))
+    if _is_sqlite(url):
+        install_sqlite_pragmas(engine.sync_engine, _read_only_pragmas(settings))
+    return engine
+
+
+# ------------- WAL CHECKPOINTS ------------- #
+
+def uses_wal(engine: Engine) -> bool:
+    url = engine.url
+    return _is_sqlite(url) and not _is_memory(url)
+
+
+def checkpoint_wal(engine: Engine, mode: str = "PASSIVE") -> tuple[int, int, int]:
+    """Run `PRAGMA wal_checkpoint` and return (busy, log_frames, checkpointed_frames)."""
+    with engine.connect() as connection:
+        busy, log_frames, checkpointed = connection.execute(
+            text(f"PRAGMA wal_checkpoint({mode})")
+        ).one()
+    return busy, log_frames, checkpointed
+
+
+async def run_wal_checkpoints(engine: Engine, interval_seconds: float) -> None:
+    """Checkpoint the WAL periodically so it cannot grow without bound.
+
+    Auto-checkpoints only run on commit and give up while readers are active,
+    which a steady stream of GET requests can make permanent. PASSIVE never
+    blocks readers or writers; whatever it could not copy is retried next round.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(checkpoint_wal, engine)
+        except Exception as exception:
+            print(f"WAL checkpoint failed: {exception}")
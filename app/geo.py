@@ -0,0 +1,106 @@
+import math
+from collections.abc import Sequence
+from typing import Protocol, TypeVar
+
+EARTH_RADIUS_M = 6_371_008.8
+
+# Grid cells are 0.01 x 0.01 degrees (about 1.1 km north-south). A cell id is
+# row * GRID_COLUMNS + column, so the cells of one row are a contiguous range
+# of ids and a radius query is one BETWEEN per row on an integer index.
+CELLS_PER_DEGREE = 100
+GRID_COLUMNS = 360 * CELLS_PER_DEGREE + 1
+
+# Upper bound for GET /rides/{id}/nearby?radius_m=, keeps the row count of a
+# query (one index range per grid row) around a hundred.
+MAX_NEARBY_RADIUS_M = 50_000
+
+
+class HasPosition(Protocol):
+    latitude: float | None
+    longitude: float | None
+
+
+Located = TypeVar("Located", bound=HasPosition)
+
+
+def _row(latitude: float) -> int:
+    return math.floor((latitude + 90) * CELLS_PER_DEGREE)
+
+
+def _column(longitude: float) -> int:
+    return math.floor((longitude + 180) * CELLS_PER_DEGREE)
+
+
+def grid_cell(latitude: float | None, longitude: float | None) -> int | None:
+    if latitude is None or longitude is None:
+        return None
+    return _row(float(latitude)) * GRID_COLUMNS + _column(float(longitude))
+
+
+def cell_ranges(latitude: float, longitude: float, radius_m: float) -> list[tuple[int, int]]:
+    """Inclusive cell id ranges covering every point within `radius_m`.
+
+    Uses the bounding box of the circle (latitude band, then the widest
+    longitude span within it); ranges of adjacent cells are merged.
+    """
+    angular = radius_m / EARTH_RADIUS_M
+    delta_lat = math.degrees(angular)
+    low_lat, high_lat = max(-90.0, latitude - delta_lat), min(90.0, latitude + delta_lat)
+
+    spread = math.sin(angular) / max(math.cos(math.radians(latitude)), 1e-12)
+    if low_lat <= -90.0 or high_lat >= 90.0 or spread >= 1:
+        spans = [(-180.0, 180.0)]
+    else:
+        delta_lon = math.degrees(math.asin(spread))
+        west, east = longitude - delta_lon, longitude + delta_lon
+        if west < -180.0:
+            spans = [(west + 360.0, 180.0), (-180.0, east)]
+        elif east > 180.0:
+            spans = [(west, 180.0), (-180.0, east - 360.0)]
+        else:
+            spans = [(west, east)]
+
+    columns = sorted((_column(west), _column(east)) for west, east in spans)
+    ranges: list[tuple[int, int]] = []
+    for row in range(_row(low_lat), _row(high_lat) + 1):
+        for first, last in columns:
+            low, high = row * GRID_COLUMNS + first, row * GRID_COLUMNS + last
+            if ranges and low <= ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], high))
+            else:
+                ranges.append((low, high))
+    return ranges
+
+
+def haversine_m(
+        latitude: float,
+        longitude: float,
+        points: Sequence[tuple[float, float]],
+) -> list[float]:
+    """Great-circle distances in metres from one origin to many points."""
+    phi = math.radians(latitude)
+    cos_phi = math.cos(phi)
+    lam = math.radians(longitude)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    distances = []
+    for point_latitude, point_longitude in points:
+        phi2 = radians(point_latitude)
+        a = sin((phi2 - phi) / 2) ** 2 + cos_phi * cos(phi2) * sin((radians(point_longitude) - lam) / 2) ** 2
+        distances.append(2 * EARTH_RADIUS_M * asin(min(1.0, sqrt(a))))
+    return distances
+
+
+def within_radius(
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        candidates: Sequence[Located],
+) -> list[tuple[Located, float]]:
+    """The candidates within `radius_m`, nearest first, with their distance."""
+    located = [c for c in candidates if c.latitude is not None and c.longitude is not None]
+    distances = haversine_m(
+        latitude, longitude, [(float(c.latitude), float(c.longitude)) for c in located],
+    )
+    matches = [(candidate, distance) for candidate, distance in zip(located, distances) if distance <= radius_m]
+    matches.sort(key=lambda match: match[1])
+    return matches
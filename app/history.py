@@ -0,0 +1,39 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from app.repositories import LocationHistoryRepository
+
+
+def compact_location_history(engine: Engine, *, retention: timedelta, bucket_seconds: int) -> int:
+    with (session := Session(bind=engine)).begin():
+        return LocationHistoryRepository(session=session).compact(
+            older_than=datetime.now(timezone.utc) - retention,
+            bucket_seconds=bucket_seconds,
+        )
+
+
+async def run_history_compaction(
+        engine: Engine,
+        *,
+        interval_seconds: float,
+        retention: timedelta,
+        bucket_seconds: int,
+) -> None:
+    """Roll raw fixes older than `retention` into `bucket_seconds` buckets.
+
+    Keeps location_history, and the range scans of the track endpoint, bounded
+    by ride time rather than by how often phones report.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            removed = await asyncio.to_thread(
+                compact_location_history, engine, retention=retention, bucket_seconds=bucket_seconds,
+            )
+            if removed:
+                print(f"History compaction: rolled up {removed} fixes")
+        except Exception as exception:
+            print(f"History compaction failed: {exception}")
@@ -1,15 +1,57 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
-from fastapi import Depends, Request
+from fastapi import Depends, HTTPException, Request, WebSocketException, status
+from starlette.requests import HTTPConnection
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.repositories import UserRepository, RideRepository, ParticipationRepository
+from app.auth_cache import TokenCache, TokenVersions
+from app.conditional import VersionedSession
+from app.live import LiveBroker, LivePublisher
+from app.location_buffer import LocationBuffer
+from app.passwords import PasswordHasher
+from app.async_repositories import (
+    AsyncUserRepository,
+    AsyncRideRepository,
+    AsyncParticipationRepository,
+    AsyncLocationHistoryRepository,
+)
+from app.repositories import (
+    UserRepository,
+    RideRepository,
+    ParticipationRepository,
+    LocationHistoryRepository,
+)
 
 def get_session(request: Request) -> Generator[Session]:
-    with (session := Session(bind=request.app.state.database_engine)).begin():
+    with (session := VersionedSession(bind=request.app.state.database_engine)).begin():
         yield session
 
+def get_read_session(request: Request) -> Generator[Session]:
+    """Session for GET routes, on the read engine.
+
+    No begin()/commit(): the driver starts no write transaction for a
+    SELECT, and closing the session just returns the connection. Nothing is
+    committed, so nothing needs expiring either.
+    """
+    with Session(bind=request.app.state.read_database_engine, expire_on_commit=False) as session:
+        yield session
+
+# `async def` so the lookup does not take a thread-pool hop in sync mode.
+async def get_token_cache(request: Request) -> TokenCache:
+    return request.app.state.token_cache
+
+async def get_password_hasher(request: Request) -> PasswordHasher:
+    return request.app.state.password_hasher
+
+async def get_token_versions(request: Request) -> TokenVersions:
+    return request.app.state.token_versions
+
+async def get_location_buffer(request: Request) -> LocationBuffer | None:
+    """Write-behind buffer of location updates, None when they are written at once."""
+    return request.app.state.location_buffer
+
 def get_user_repository(
         session: Annotated[Session, Depends(get_session)]
 ) -> UserRepository:
@@ -25,3 +67,126 @@ def get_participation_repository(
 ) -> ParticipationRepository:
     return ParticipationRepository(session=session)
 
+def get_location_history_repository(
+        session: Annotated[Session, Depends(get_session)]
+) -> LocationHistoryRepository:
+    return LocationHistoryRepository(session=session)
+
+def get_read_user_repository(
+        session: Annotated[Session, Depends(get_read_session)]
+) -> UserRepository:
+    return UserRepository(session=session)
+
+def get_read_ride_repository(
+        session: Annotated[Session, Depends(get_read_session)]
+) -> RideRepository:
+    return RideRepository(session=session)
+
+def get_read_participation_repository(
+        session: Annotated[Session, Depends(get_read_session)]
+) -> ParticipationRepository:
+    return ParticipationRepository(session=session)
+
+def get_read_location_history_repository(
+        session: Annotated[Session, Depends(get_read_session)]
+) -> LocationHistoryRepository:
+    return LocationHistoryRepository(session=session)
+
+
+# ------------- ASYNC MODE ------------- #
+# Dependencies here are `async def` on purpose: plain `def` dependencies are
+# dispatched to the thread pool, which is what async mode avoids.
+
+async def get_async_session(request: Request) -> AsyncGenerator[AsyncSession]:
+    async with AsyncSession(
+        bind=request.app.state.async_database_engine,
+        expire_on_commit=False,
+        sync_session_class=VersionedSession,
+    ) as session:
+        async with session.begin():
+            yield session
+
+async def get_async_read_session(request: Request) -> AsyncGenerator[AsyncSession]:
+    async with AsyncSession(
+        bind=request.app.state.async_read_database_engine,
+        expire_on_commit=False,
+    ) as session:
+        yield session
+
+async def get_async_user_repository(
+        session: Annotated[AsyncSession, Depends(get_async_session)]
+) -> AsyncUserRepository:
+    return AsyncUserRepository(session=session)
+
+async def get_async_ride_repository(
+        session: Annotated[AsyncSession, Depends(get_async_session)]
+) -> AsyncRideRepository:
+    return AsyncRideRepository(session=session)
+
+async def get_async_participation_repository(
+        session: Annotated[AsyncSession, Depends(get_async_session)]
+) -> AsyncParticipationRepository:
+    return AsyncParticipationRepository(session=session)
+
+async def get_async_location_history_repository(
+        session: Annotated[AsyncSession, Depends(get_async_session)]
+) -> AsyncLocationHistoryRepository:
+    return AsyncLocationHistoryRepository(session=session)
+
+async def get_async_read_user_repository(
+        session: Annotated[AsyncSession, Depends(get_async_read_session)]
+) -> AsyncUserRepository:
+    return AsyncUserRepository(session=session)
+
+async def get_async_read_ride_repository(
+        session: Annotated[AsyncSession, Depends(get_async_read_session)]
+) -> AsyncRideRepository:
+    return AsyncRideRepository(session=session)
+
+async def get_async_read_participation_repository(
+        session: Annotated[AsyncSession, Depends(get_async_read_session)]
+) -> AsyncParticipationRepository:
+    return AsyncParticipationRepository(session=session)
+
+async def get_async_read_location_history_repository(
+        session: Annotated[AsyncSession, Depends(get_async_read_session)]
+) -> AsyncLocationHistoryRepository:
+    return AsyncLocationHistoryRepository(session=session)
+
+
+# ------------- LIVE STREAMS ------------- #
+# A live connection stays open for minutes, so it must not hold the request
+# session (and with it a pooled connection) for its whole lifetime. The ride
+# is looked up in a session of its own that is closed before streaming.
+
+async def get_live_broker(connection: HTTPConnection) -> LiveBroker:
+    return connection.app.state.live_broker
+
+async def get_live_publisher(
+        broker: Annotated[LiveBroker, Depends(get_live_broker)],
+        session: Annotated[Session, Depends(get_session)],
+) -> LivePublisher:
+    return LivePublisher(broker, session)
+
+async def get_async_live_publisher(
+        broker: Annotated[LiveBroker, Depends(get_live_broker)],
+        session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> LivePublisher:
+    return LivePublisher(broker, session.sync_session)
+
+def _ride_not_found(connection: HTTPConnection) -> Exception:
+    if connection.scope["type"] == "websocket":
+        return WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Ride not found")
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+def get_live_ride_id(id: int, connection: HTTPConnection) -> int:
+    with Session(bind=connection.app.state.read_database_engine) as session:
+        if RideRepository(session=session).get_by_id(ride_id=id) is None:
+            raise _ride_not_found(connection)
+    return id
+
+async def get_async_live_ride_id(id: int, connection: HTTPConnection) -> int:
+    async with AsyncSession(bind=connection.app.state.async_read_database_engine) as session:
+        if await AsyncRideRepository(session=session).get_by_id(ride_id=id) is None:
+            raise _ride_not_found(connection)
+    return id
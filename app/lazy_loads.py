@@ -0,0 +1,72 @@
+import logging
+import sys
+from types import FrameType
+from weakref import WeakSet
+
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+logger = logging.getLogger(__name__)
+
+# Frames from these packages are skipped when looking for the call site.
+_LIBRARIES = frozenset({
+    "anyio", "asyncio", "concurrent", "contextlib", "fastapi", "pydantic", "pydantic_core",
+    "sqlalchemy", "starlette", "threading",
+})
+
+_SERIALIZERS = frozenset({"pydantic", "pydantic_core", "sqlalchemy"})
+
+_watched_engines: WeakSet[Engine] = WeakSet()
+
+
+def watch_lazy_loads(engine: Engine) -> None:
+    """Log every relationship lazy load that response serialization triggers.
+
+    A development aid (DEBUG_LAZY_LOADS): a schema field backed by a lazy
+    relationship costs one query per serialized row, which is easy to add
+    and hard to notice. Only sessions bound to `engine` are checked.
+    """
+    if not event.contains(Session, "do_orm_execute", _check_lazy_load):
+        event.listen(Session, "do_orm_execute", _check_lazy_load)
+    _watched_engines.add(engine)
+
+
+def _check_lazy_load(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_relationship_load:
+        return
+    bind = orm_execute_state.session.get_bind()
+    if bind.engine not in _watched_engines:
+        return
+
+    frames = list(_frames(sys._getframe(1)))
+    trigger = next((frame for frame in frames if _package(frame) != "sqlalchemy"), None)
+    # pydantic reading attributes off the ORM object (from_attributes) is
+    # serialization, whether FastAPI's response_model or app/serialization.py
+    # asked for it; lazy loads in endpoint or repository code are deliberate.
+    if trigger is None or not _package(trigger).startswith("pydantic"):
+        return
+
+    # FastAPI validates sync responses on a worker thread, with no app frame
+    # left on the stack; its own frame then says that much.
+    call_site = (
+        next((frame for frame in frames if _package(frame) not in _LIBRARIES), None)
+        or next((frame for frame in frames if _package(frame) not in _SERIALIZERS), trigger)
+    )
+    logger.warning(
+        "Lazy load of %s for %r during response serialization, called from %s:%d in %s",
+        orm_execute_state.loader_strategy_path[-1],
+        orm_execute_state.lazy_loaded_from.object,
+        call_site.f_code.co_filename,
+        call_site.f_lineno,
+        call_site.f_code.co_name,
+    )
+
+
+def _frames(frame: FrameType | None):
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def _package(frame: FrameType) -> str:
+    return frame.f_globals.get("__name__", "").partition(".")[0]
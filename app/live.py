@@ -0,0 +1,172 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+_PENDING_KEY = "live_messages"
+
+
+@dataclass(frozen=True)
+class LiveMessage:
+    """One update, serialized once and shared by every subscriber."""
+    text: str  # JSON, sent as-is on WebSockets
+    sse: bytes  # the same JSON framed as a server-sent event
+
+    @classmethod
+    def from_model(cls, event_name: str, model: BaseModel) -> "LiveMessage":
+        text = model.model_dump_json()
+        return cls(text=text, sse=f"event: {event_name}\ndata: {text}\n\n".encode())
+
+
+class Subscription:
+    """Bounded per-subscriber queue; a slow consumer loses its oldest messages."""
+
+    def __init__(self, max_size: int):
+        self.dropped = 0
+        self.closed = False
+        self._messages: deque[LiveMessage] = deque(maxlen=max_size)
+        self._ready = asyncio.Event()
+
+    def push(self, message: LiveMessage) -> None:
+        if len(self._messages) == self._messages.maxlen:
+            self.dropped += 1
+        self._messages.append(message)
+        self._ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def next(self) -> LiveMessage | None:
+        """The next message, or None once the subscription is closed."""
+        while not self._messages:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._messages.popleft()
+
+
+class LiveBroker:
+    """In-process pub/sub of participation updates, one channel per ride.
+
+    Subscribers live on the event loop. Publishers may run in worker threads
+    (sync endpoints commit there), so delivery is handed to the loop with
+    `call_soon_threadsafe`. Only this process's subscribers are reached.
+    """
+
+    def __init__(self, *, queue_size: int):
+        self.queue_size = queue_size
+        self.published = 0
+        self._channels: dict[int, set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @contextmanager
+    def subscription(self, ride_id: int) -> Iterator[Subscription]:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self.queue_size)
+        self._channels.setdefault(ride_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            channel = self._channels.get(ride_id, set())
+            channel.discard(subscription)
+            if not channel:
+                self._channels.pop(ride_id, None)
+
+    def publish(self, ride_id: int, message: LiveMessage) -> None:
+        self.published += 1
+        loop = self._loop
+        if loop is None or ride_id not in self._channels:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(ride_id, message)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._deliver, ride_id, message)
+            except RuntimeError:  # the loop has been closed
+                pass
+
+    def _deliver(self, ride_id: int, message: LiveMessage) -> None:
+        for subscription in tuple(self._channels.get(ride_id, ())):
+            subscription.push(message)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(channel) for channel in self._channels.values()),
+            "published": self.published,
+        }
+
+
+class LivePublisher:
+    """Queues messages on the request session; they are published on commit."""
+
+    def __init__(self, broker: LiveBroker, session: Session):
+        self.broker = broker
+        self.session = session
+
+    def publish(self, ride_id: int, model: BaseModel, *, event_name: str = "participation") -> None:
+        pending = self.session.info.setdefault(_PENDING_KEY, [])
+        pending.append((self.broker, ride_id, LiveMessage.from_model(event_name, model)))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    for broker, ride_id, message in session.info.pop(_PENDING_KEY, ()):
+        broker.publish(ride_id, message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+async def stream_sse(
+        broker: LiveBroker,
+        ride_id: int,
+        *,
+        heartbeat_seconds: float,
+) -> AsyncIterator[bytes]:
+    with broker.subscription(ride_id) as subscription:
+        yield b": connected\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.next(), heartbeat_seconds)
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if message is None:
+                return
+            yield message.sse
+
+
+async def stream_websocket(websocket: WebSocket, broker: LiveBroker, ride_id: int) -> None:
+    with broker.subscription(ride_id) as subscription:
+        await websocket.accept()
+
+        async def close_on_disconnect() -> None:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+            subscription.close()
+
+        watcher = asyncio.create_task(close_on_disconnect())
+        try:
+            while (message := await subscription.next()) is not None:
+                await websocket.send_text(message.text)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            watcher.cancel()
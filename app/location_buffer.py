@@ -0,0 +1,188 @@
+import asyncio
+import threading
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager, suppress
+from typing import Any, NamedTuple, TypeVar
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from app.locations import LocationState, LocationStates, with_buffered_fixes
+from app.repositories import LocationHistoryRepository, ParticipationRepository
+
+Row = TypeVar("Row")
+
+
+class BufferedFix(NamedTuple):
+    sequence: int  # of the buffer, for ETags
+    update: dict[str, Any]  # LOCATION_FIX_UPDATE parameters
+
+
+class BufferedParticipation:
+    """A participation row seen with the position of its buffered fix.
+
+    Wraps the row instead of setting its attributes: a dirty object in a
+    read-only session would be flushed by the next query.
+    """
+    __slots__ = ("_row", "latitude", "longitude", "updated_at", "grid_cell")
+
+    def __init__(self, row: Any, update: Mapping[str, Any]):
+        self._row = row
+        self.latitude = update["b_latitude"]
+        self.longitude = update["b_longitude"]
+        self.updated_at = update["b_updated_at"]
+        self.grid_cell = update["b_grid_cell"]
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._row, name)
+
+
+class LocationBuffer:
+    """Write-behind buffer of location fixes (LOCATION_WRITE_BEHIND).
+
+    Location updates land here and are acknowledged at once; a background
+    task writes them with one bulk UPDATE and one history INSERT per flush.
+    Only the newest fix of a participation is kept for the UPDATE, while
+    every fix is kept for the history. Reads merge the buffered positions
+    in. The buffer is per process: run a single worker with it.
+    """
+
+    def __init__(self, *, max_entries: int):
+        self.max_entries = max_entries
+        self.sequence = 0
+        self.flushes = 0
+        self._pending: dict[int, BufferedFix] = {}
+        self._flushing: dict[int, BufferedFix] = {}  # being written, still visible to reads
+        self._history: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._due: asyncio.Event | None = None
+
+    def __len__(self) -> int:
+        """Buffered fixes, as counted against max_entries."""
+        return len(self._history)
+
+    def put(self, updates: Sequence[dict[str, Any]], history: Sequence[dict[str, Any]]) -> set[int]:
+        """Buffer LOCATION_FIX_UPDATE parameters and their history rows.
+
+        Returns the participation ids whose update was taken; the others
+        already have a fix buffered that is as new or newer.
+        """
+        accepted = set()
+        with self._lock:
+            for update in updates:
+                participation_id = update["b_id"]
+                current = self._pending.get(participation_id) or self._flushing.get(participation_id)
+                # Strictly newer, like the guard of LOCATION_FIX_UPDATE.
+                if current is None or current.update["b_updated_at"] < update["b_updated_at"]:
+                    self.sequence += 1
+                    self._pending[participation_id] = BufferedFix(self.sequence, update)
+                    accepted.add(participation_id)
+            before = len(self._history)
+            self._history.extend(history)
+            due = before < self.max_entries <= len(self._history)
+        if due and self._loop is not None:
+            # Called from worker threads in sync mode.
+            self._loop.call_soon_threadsafe(self._due.set)
+        return accepted
+
+    def get(self, participation_id: int) -> BufferedFix | None:
+        with self._lock:
+            return self._pending.get(participation_id) or self._flushing.get(participation_id)
+
+    def merge(self, rows: Sequence[Row]) -> list[Row | BufferedParticipation]:
+        """`rows` (participations) with the positions of their buffered fixes."""
+        with self._lock:
+            if not self._pending and not self._flushing:
+                return list(rows)
+            fixes = [self._pending.get(row.id) or self._flushing.get(row.id) for row in rows]
+        return [row if fix is None else BufferedParticipation(row, fix.update) for row, fix in zip(rows, fixes)]
+
+    def merge_states(self, states: LocationStates) -> dict[int, LocationState]:
+        """Stored location states with the fix times that are still buffered."""
+        buffered = {}
+        for participation_id in states:
+            fix = self.get(participation_id)
+            if fix is not None:
+                buffered[participation_id] = fix.update["b_updated_at"]
+        return with_buffered_fixes(states, buffered)
+
+    @contextmanager
+    def flushing(self) -> Iterator[tuple[list[dict[str, Any]], list[dict[str, Any]]]]:
+        """Take the buffered updates and history rows for one write.
+
+        Reads keep seeing the taken fixes until the write is done; if it
+        fails they go back into the buffer, behind any newer ones.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                history, self._history = self._history, []
+                updates = [fix.update for fix in self._flushing.values()]
+            try:
+                yield updates, history
+            except BaseException:
+                with self._lock:
+                    self._pending = {**self._flushing, **self._pending}
+                    self._history[:0] = history
+                    self._flushing = {}
+                raise
+            with self._lock:
+                self._flushing = {}
+                self.flushes += bool(updates or history)
+
+    async def wait_until_due(self, timeout: float) -> None:
+        """Sleep for `timeout`, or until `max_entries` fixes are buffered."""
+        if self._due is None:
+            self._loop = asyncio.get_running_loop()
+            self._due = asyncio.Event()
+        with suppress(TimeoutError):
+            await asyncio.wait_for(self._due.wait(), timeout)
+        self._due.clear()
+
+
+def merge_buffered(buffer: LocationBuffer | None, rows: Sequence[Row]) -> Sequence[Row | BufferedParticipation]:
+    return rows if buffer is None else buffer.merge(rows)
+
+
+def buffered_version(buffer: LocationBuffer | None, participation_id: int | None = None) -> tuple[int, ...]:
+    """Extra ETag parts for fixes not written yet: the buffer's sequence, or
+    that of one participation's buffered fix."""
+    if buffer is None:
+        return ()
+    if participation_id is None:
+        return (buffer.sequence,)
+    fix = buffer.get(participation_id)
+    return () if fix is None else (fix.sequence,)
+
+
+def flush_location_buffer(buffer: LocationBuffer, engine: Engine) -> int:
+    """Write the buffered fixes in one transaction; returns the participations updated."""
+    with buffer.flushing() as (updates, history):
+        if not updates and not history:
+            return 0
+        with (session := Session(bind=engine)).begin():
+            participations = ParticipationRepository(session=session)
+            # Participations deleted since their fixes were buffered are
+            # skipped: their history rows would fail the foreign key.
+            known = participations.get_location_states(
+                participation_ids={update["b_id"] for update in updates} | {row["participation_id"] for row in history},
+            )
+            updated = len(participations.apply_location_fixes(
+                [update for update in updates if update["b_id"] in known],
+            ))
+            LocationHistoryRepository(session=session).record_fixes(
+                [row for row in history if row["participation_id"] in known],
+            )
+    return updated
+
+
+async def run_location_flush(buffer: LocationBuffer, engine: Engine, *, interval_seconds: float) -> None:
+    """Flush the buffer every `interval_seconds`, or sooner when it fills up."""
+    while True:
+        await buffer.wait_until_due(interval_seconds)
+        try:
+            await asyncio.to_thread(flush_location_buffer, buffer, engine)
+        except Exception as exception:
+            print(f"Location flush failed: {exception}")
@@ -0,0 +1,180 @@
+import math
+from collections.abc import Collection, Mapping, Sequence
+from datetime import datetime, timezone
+from typing import Any, NamedTuple
+
+from app.geo import grid_cell
+from app.schemas import LocationFix, LocationFixResult, ParticipationResponse
+
+
+class LocationState(NamedTuple):
+    user_id: int
+    ride_id: int
+    updated_at: datetime | None
+
+
+LocationStates = Mapping[int, LocationState]
+
+# Points returned by GET /participations/{id}/track.
+DEFAULT_TRACK_POINTS = 500
+MAX_TRACK_POINTS = 5000
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; stored fixes are UTC.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def location_update(
+        participation_id: int,
+        latitude: float,
+        longitude: float,
+        updated_at: datetime,
+) -> dict[str, Any]:
+    """Parameters of LOCATION_FIX_UPDATE for one fix."""
+    return {
+        "b_id": participation_id,
+        "b_latitude": latitude,
+        "b_longitude": longitude,
+        "b_updated_at": _utc(updated_at),
+        "b_grid_cell": grid_cell(latitude, longitude),
+    }
+
+
+def is_newer_fix(update: Mapping[str, Any], stored_at: datetime | None) -> bool:
+    """Whether `update` passes the guard of LOCATION_FIX_UPDATE against a stored fix time."""
+    return stored_at is None or _utc(stored_at) < update["b_updated_at"]
+
+
+def plan_location_fixes(
+        fixes: Sequence[LocationFix],
+        states: LocationStates,
+        *,
+        user_id: int,
+) -> tuple[list[LocationFixResult], list[dict[str, Any]]]:
+    """Decide the outcome of every fix in a batch.
+
+    Only the newest fix per participation is written, and only if it is newer
+    than the stored one; buffered fixes that arrive late report `stale`.
+    Returns the per-fix results (in request order) and the UPDATE parameters.
+    """
+    newest: dict[int, LocationFix] = {}
+    for fix in fixes:
+        state = states.get(fix.participation_id)
+        if state is None or state.user_id != user_id:
+            continue
+        current = newest.get(fix.participation_id)
+        if current is None or _utc(fix.updated_at) > _utc(current.updated_at):
+            newest[fix.participation_id] = fix
+
+    results: list[LocationFixResult] = []
+    updates: list[dict[str, Any]] = []
+    for fix in fixes:
+        state = states.get(fix.participation_id)
+        if state is None:
+            status = "not_found"
+        elif state.user_id != user_id:
+            status = "forbidden"
+        elif newest[fix.participation_id] is not fix:
+            status = "stale"
+        elif state.updated_at is not None and _utc(state.updated_at) >= _utc(fix.updated_at):
+            status = "stale"
+        else:
+            status = "applied"
+            updates.append(location_update(fix.participation_id, fix.latitude, fix.longitude, fix.updated_at))
+        results.append(LocationFixResult(
+            participation_id=fix.participation_id,
+            updated_at=fix.updated_at,
+            status=status,
+        ))
+    return results, updates
+
+
+def written_fixes(updates: Sequence[Mapping[str, Any]], states: LocationStates) -> set[int]:
+    """Participations of `updates` whose stored fix time is the one written."""
+    return {
+        update["b_id"] for update in updates
+        if (state := states.get(update["b_id"])) is not None
+        and state.updated_at is not None and _utc(state.updated_at) == update["b_updated_at"]
+    }
+
+
+def settle_location_fixes(
+        results: Sequence[LocationFixResult],
+        updates: Sequence[dict[str, Any]],
+        applied: Collection[int],
+) -> tuple[list[LocationFixResult], list[dict[str, Any]]]:
+    """The planned results and updates, given the participations actually written.
+
+    A newer fix can land between planning and writing; the fix it overtook
+    reports `stale` rather than `applied`.
+    """
+    settled = [
+        result.model_copy(update={"status": "stale"})
+        if result.status == "applied" and result.participation_id not in applied else result
+        for result in results
+    ]
+    return settled, [update for update in updates if update["b_id"] in applied]
+
+
+def with_buffered_fixes(states: LocationStates, buffered: Mapping[int, datetime]) -> dict[int, LocationState]:
+    """`states` with the newer of the stored and the buffered fix time of each participation."""
+    merged = dict(states)
+    for participation_id, updated_at in buffered.items():
+        state = merged.get(participation_id)
+        if state is not None and (state.updated_at is None or _utc(state.updated_at) < updated_at):
+            merged[participation_id] = state._replace(updated_at=updated_at)
+    return merged
+
+
+def applied_participations(
+        updates: Sequence[dict[str, Any]],
+        states: LocationStates,
+) -> list[ParticipationResponse]:
+    """The participations as they are after `updates`, for live subscribers."""
+    return [
+        ParticipationResponse(
+            id=update["b_id"],
+            user_id=states[update["b_id"]].user_id,
+            ride_id=states[update["b_id"]].ride_id,
+            latitude=update["b_latitude"],
+            longitude=update["b_longitude"],
+            updated_at=update["b_updated_at"],
+        )
+        for update in updates
+    ]
+
+
+def history_row(
+        participation_id: int,
+        latitude: float,
+        longitude: float,
+        recorded_at: datetime,
+) -> dict[str, Any]:
+    return {
+        "participation_id": participation_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "recorded_at": _utc(recorded_at),
+    }
+
+
+def recorded_fixes(
+        fixes: Sequence[LocationFix],
+        results: Sequence[LocationFixResult],
+) -> list[dict[str, Any]]:
+    """History rows for a batch: every fix of the caller's own participations.
+
+    Stale fixes are kept too: a late, buffered fix is still part of the route.
+    """
+    return [
+        history_row(fix.participation_id, fix.latitude, fix.longitude, fix.updated_at)
+        for fix, result in zip(fixes, results)
+        if result.status in ("applied", "stale")
+    ]
+
+
+def track_bucket_seconds(start: datetime, end: datetime, max_points: int) -> int:
+    """Smallest bucket width that keeps [start, end] within `max_points` buckets."""
+    span = max(0.0, (_utc(end) - _utc(start)).total_seconds())
+    return max(1, math.ceil(span / max(1, max_points - 1)))
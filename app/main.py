@@ -1,53 +1,200 @@
+import asyncio
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from datetime import timedelta
 
 from fastapi import FastAPI
-from sqlalchemy import create_engine
 
-from app import routers
-from app.models import DbModel
+from app import routers, async_routers
+from app.admission import LaneLimits, Lanes
+from app.auth_cache import TokenCache, TokenVersions, run_token_version_refresh
+from app.config import Settings
+from app.database import (
+    checkpoint_wal,
+    create_database_engine,
+    create_async_database_engine,
+    create_async_read_database_engine,
+    create_read_database_engine,
+    run_wal_checkpoints,
+    uses_wal,
+)
+from app.history import run_history_compaction
+from app.lazy_loads import watch_lazy_loads
+from app.live import LiveBroker
+from app.location_buffer import LocationBuffer, flush_location_buffer, run_location_flush
+from app.metrics import Metrics, MetricsMiddleware, instrument_engine, metrics_router
+from app.migrations import run_password_upgrade, upgrade_schema
+from app.passwords import PasswordHasher
+from app.serialization import ORJSONResponse
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
+    settings: Settings = app.state.settings
+
     print("Startup: Initializing database engine")
-    app.state.database_engine = create_engine("sqlite:///ride.db")
-    DbModel.metadata.create_all(bind=app.state.database_engine)
+    app.state.database_engine = create_database_engine(settings)
+    schema_changes = upgrade_schema(app.state.database_engine)
+    if schema_changes:
+        print(f"Startup: Applied schema changes {', '.join(schema_changes)}")
+    # After the schema upgrade: read engine connections cannot write.
+    app.state.read_database_engine = create_read_database_engine(settings, app.state.database_engine)
+    engines = {app.state.database_engine, app.state.read_database_engine}
+
+    app.state.async_database_engine = None
+    app.state.async_read_database_engine = None
+    if settings.database_async:
+        print("Startup: Initializing async database engine")
+        app.state.async_database_engine = create_async_database_engine(settings)
+        app.state.async_read_database_engine = create_async_read_database_engine(
+            settings, app.state.async_database_engine,
+        )
+        engines |= {app.state.async_database_engine.sync_engine, app.state.async_read_database_engine.sync_engine}
+
+    for engine in engines:
+        if app.state.metrics:
+            instrument_engine(engine)
+        if settings.debug_lazy_loads:
+            watch_lazy_loads(engine)
+
+    checkpoint_task = None
+    wal_enabled = (
+        uses_wal(app.state.database_engine)
+        and settings.sqlite_journal_mode.upper() == "WAL"
+    )
+    if wal_enabled and settings.sqlite_wal_checkpoint_seconds > 0:
+        checkpoint_task = asyncio.create_task(
+            run_wal_checkpoints(
+                app.state.database_engine,
+                settings.sqlite_wal_checkpoint_seconds,
+            )
+        )
+
+    # Built here, not in create_app: shutdown stops its threads, and a second
+    # run of the lifespan on the same app needs a fresh pool.
+    app.state.password_hasher = PasswordHasher(
+        n=settings.password_scrypt_n,
+        r=settings.password_scrypt_r,
+        p=settings.password_scrypt_p,
+        workers=settings.password_hash_workers,
+    )
+    # Passwords left from before hashing, in the background: startup does
+    # not wait for thousands of scrypt hashes.
+    password_task = asyncio.create_task(
+        run_password_upgrade(app.state.database_engine, app.state.password_hasher)
+    )
+
+    refresh_task = None
+    token_versions: TokenVersions = app.state.token_versions
+    token_versions.refresh(app.state.database_engine)
+    if settings.auth_revocation_refresh_seconds > 0:
+        refresh_task = asyncio.create_task(
+            run_token_version_refresh(
+                token_versions,
+                app.state.token_cache,
+                app.state.database_engine,
+                settings.auth_revocation_refresh_seconds,
+            )
+        )
+
+    compaction_task = None
+    if settings.history_compaction_seconds > 0:
+        compaction_task = asyncio.create_task(
+            run_history_compaction(
+                app.state.database_engine,
+                interval_seconds=settings.history_compaction_seconds,
+                retention=timedelta(hours=settings.history_retention_hours),
+                bucket_seconds=settings.history_bucket_seconds,
+            )
+        )
+
+    flush_task = None
+    location_buffer: LocationBuffer | None = app.state.location_buffer
+    if location_buffer is not None:
+        flush_task = asyncio.create_task(
+            run_location_flush(
+                location_buffer,
+                app.state.database_engine,
+                interval_seconds=settings.location_flush_ms / 1000,
+            )
+        )
     yield
 
+    for task in (flush_task, compaction_task, refresh_task, password_task, checkpoint_task):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    if location_buffer is not None:
+        flushed = await asyncio.to_thread(flush_location_buffer, location_buffer, app.state.database_engine)
+        print(f"Shutdown: Flushed buffered locations of {flushed} participations")
+
+    app.state.password_hasher.shutdown()
+
     print("Shutdown: Disposing database engine")
+    if app.state.async_read_database_engine is not app.state.async_database_engine:
+        await app.state.async_read_database_engine.dispose()
+    if app.state.async_database_engine:
+        await app.state.async_database_engine.dispose()
+    if app.state.read_database_engine is not app.state.database_engine:
+        app.state.read_database_engine.dispose()
+    if wal_enabled:
+        checkpoint_wal(app.state.database_engine, mode="TRUNCATE")
     if app.state.database_engine:
         app.state.database_engine.dispose()
-        app.state.database_engine.pool.dispose() 
+        app.state.database_engine.pool.dispose()
 
 
-def create_app() -> FastAPI:
+def create_app(settings: Settings | None = None) -> FastAPI:
     app = FastAPI(
         title="Ride App API",
         version="0.1.0",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+    )
+    app.state.settings = settings or Settings.from_env()
+    app.state.token_cache = TokenCache(max_size=app.state.settings.token_cache_size)
+    app.state.token_versions = TokenVersions(stateless=app.state.settings.auth_stateless)
+    app.state.live_broker = LiveBroker(queue_size=app.state.settings.live_queue_size)
+    app.state.location_buffer = (
+        LocationBuffer(max_entries=app.state.settings.location_flush_entries)
+        if app.state.settings.location_write_behind else None
+    )
+    app.state.metrics = Metrics() if app.state.settings.metrics_enabled else None
+    app.state.lanes = Lanes(
+        {name: LaneLimits(*limits) for name, limits in app.state.settings.lane_limits.items()},
+        retry_after_seconds=app.state.settings.lane_retry_after_seconds,
     )
 
+    # Async mode serves the same routes with `async def` endpoints on an
+    # AsyncSession, so requests no longer queue for the anyio thread pool.
+    api = async_routers if app.state.settings.database_async else routers
+
     app.include_router(
-        routers.user_router,
+        api.user_router,
         prefix="/users",
         tags=["Users, Registration"],
     )
 
     app.include_router(
-        routers.auth_router,
+        api.auth_router,
         prefix="/auth",
         tags=["Authentication"],
     )
 
     app.include_router(
-        routers.ride_router,
+        api.ride_router,
         prefix="/rides",
         tags=["Rides"],
     )
 
     app.include_router(
-        routers.participation_router,
+        api.participation_router,
         prefix="/participations",
         tags=["Participation"],
     )
-    return app
\ No newline at end of file
+
+    if app.state.metrics:
+        app.include_router(metrics_router, tags=["Metrics"])
+        app.add_middleware(MetricsMiddleware, metrics=app.state.metrics)
+    return app
@@ -0,0 +1,224 @@
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, MutableMapping
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import APIRouter, Request, Response
+from sqlalchemy import Engine, event
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Requests that matched no route share one series, so a scan of random URLs
+# cannot grow the label set.
+UNMATCHED_ROUTE = "<unmatched>"
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+ASGIApp = Callable[[Scope, Callable[[], Awaitable[Message]], Callable[[Message], Awaitable[None]]], Awaitable[None]]
+
+
+class Histogram:
+    """Fixed-bucket histogram; buckets are upper bounds, as in Prometheus."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total = 0
+        rows = []
+        for bound, count in zip((*map(_format_number, self.buckets), "+Inf"), self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+
+@dataclass
+class RequestStats:
+    """Database work of the request being served."""
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+@dataclass
+class RouteMetrics:
+    statuses: dict[int, int] = field(default_factory=dict)
+    latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    queries: Histogram = field(default_factory=lambda: Histogram(QUERY_BUCKETS))
+    db_time: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class Metrics:
+    """Per-route request metrics of one app, rendered in the Prometheus text format.
+
+    Keyed by method and route template (`/rides/{id}`), so the number of
+    series is bounded by the number of routes.
+    """
+
+    def __init__(self):
+        self.in_progress = 0
+        self._routes: dict[tuple[str, str], RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics()
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(stats.queries)
+            metrics.db_time.observe(stats.db_seconds)
+
+    def route(self, method: str, route: str) -> RouteMetrics | None:
+        return self._routes.get((method, route))
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_progress HTTP requests being served.",
+            "# TYPE http_requests_in_progress gauge",
+            f"http_requests_in_progress {self.in_progress}",
+            "# HELP http_requests_total HTTP requests served, by final status.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            routes = sorted(self._routes.items())
+            for (method, route), metrics in routes:
+                labels = _labels(method=method, route=route)
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f"http_requests_total{{{labels},status=\"{status}\"}} {count}")
+            for name, help_text, attribute in (
+                    ("http_request_duration_seconds", "Time to serve a request.", "latency"),
+                    ("http_request_db_queries", "SQL statements executed per request.", "queries"),
+                    ("http_request_db_seconds", "Time spent in SQL statements per request.", "db_time"),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), metrics in routes:
+                    _render_histogram(lines, name, _labels(method=method, route=route), getattr(metrics, attribute))
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Times each HTTP request and collects the queries it ran.
+
+    A plain ASGI middleware: streaming responses pass through untouched and
+    are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # unless the app gets to send a response
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        self.metrics.in_progress += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_progress -= 1
+            _request_stats.reset(token)
+            self.metrics.observe(scope["method"], route_template(scope), status, elapsed, stats)
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    # Routes of an included router are in the scope without the router's
+    # prefix; it is the part of the path the route itself did not match.
+    convertors = getattr(route, "param_convertors", {})
+    params = {
+        name: convertors[name].to_string(value) if name in convertors else str(value)
+        for name, value in scope.get("path_params", {}).items()
+    }
+    matched = template.format_map(params)
+    path = scope["path"]
+    if matched and path.endswith(matched):
+        return path[:len(path) - len(matched)] + template
+    return template
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count the statements run on `engine` and their time against the current request.
+
+    Statements outside a request (startup, background jobs) are not counted.
+    The request's context is copied into the thread pool and into the async
+    driver's greenlets, so both sync and async sessions report here.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None and _request_stats.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _request_stats.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f"{name}=\"{_escape(value)}\"" for name, value in labels.items())
+
+
+def _render_histogram(lines: list[str], name: str, labels: str, histogram: Histogram) -> None:
+    for bound, total in histogram.cumulative():
+        lines.append(f"{name}_bucket{{{labels},le=\"{bound}\"}} {total}")
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum!r}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+metrics_router = APIRouter()
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def read_metrics(request: Request) -> Response:
+    content = request.app.state.metrics.render() + request.app.state.lanes.render()
+    return Response(content=content, media_type=PROMETHEUS_MEDIA_TYPE)
@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import Column, Connection, Engine, Index, bindparam, delete, func, inspect, select, text, update
+from sqlalchemy.schema import CreateColumn
+
+from app.config import Settings
+from app.database import create_database_engine
+from app.geo import grid_cell
+from app.models import DbModel, ParticipationModel, UserModel
+from app.passwords import NO_PASSWORD, SCHEME, PasswordHasher
+
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateRowsError(RuntimeError):
+    """Existing rows violate a unique index that is about to be created."""
+
+
+def _resolve_duplicates(connection: Connection, index: Index, *, drop: bool) -> None:
+    """Make room for a unique index: fail on duplicates, or delete all but the newest.
+
+    Deleting user data is never implicit; it takes `drop_duplicates`, and
+    every deleted id is logged.
+    """
+    table = index.table
+    newest = select(func.max(table.c.id)).group_by(*index.columns)
+    duplicates = connection.execute(
+        select(table.c.id).where(table.c.id.not_in(newest)).order_by(table.c.id)
+    ).scalars().all()
+    if not duplicates:
+        return
+    key = ", ".join(column.name for column in index.columns)
+    if not drop:
+        raise DuplicateRowsError(
+            f"{len(duplicates)} rows of {table.name} share their ({key}) with a newer row, so the unique "
+            f"index {index.name} cannot be created. Resolve them by hand, or run "
+            f"`python -m app.migrations --drop-duplicates` to keep only the newest row (highest id) of each."
+        )
+    connection.execute(delete(table).where(table.c.id.in_(duplicates)))
+    logger.warning(
+        "Migration: deleted %d duplicate rows from %s for %s, keeping the newest per (%s): ids %s",
+        len(duplicates), table.name, index.name, key, duplicates,
+    )
+
+
+def _add_column(connection: Connection, column: Column) -> None:
+    """ALTER TABLE ... ADD COLUMN; new NOT NULL columns need a server default."""
+    preparer = connection.dialect.identifier_preparer
+    definition = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.execute(text(f"ALTER TABLE {preparer.format_table(column.table)} ADD COLUMN {definition}"))
+
+
+def _backfill_grid_cells(connection: Connection) -> None:
+    participations = ParticipationModel.__table__
+    rows = connection.execute(
+        select(participations.c.id, participations.c.latitude, participations.c.longitude)
+        .where(participations.c.latitude.is_not(None), participations.c.longitude.is_not(None))
+    ).all()
+    if rows:
+        connection.execute(
+            update(participations).where(participations.c.id == bindparam("b_id"))
+            .values(grid_cell=bindparam("b_grid_cell")),
+            [{"b_id": row.id, "b_grid_cell": grid_cell(row.latitude, row.longitude)} for row in rows],
+        )
+
+
+# Columns derived from existing data, filled in right after they are added.
+_BACKFILLS: dict[str, Callable[[Connection], None]] = {
+    "participations.grid_cell": _backfill_grid_cells,
+}
+
+
+# Plaintext passwords hashed per transaction by hash_plaintext_passwords.
+PASSWORD_CHUNK = 200
+
+
+def _plaintext_passwords(engine: Engine, *, after_id: int, limit: int) -> list[tuple[int, str]]:
+    users = UserModel.__table__
+    with engine.connect() as connection:
+        return [tuple(row) for row in connection.execute(
+            select(users.c.id, users.c.password)
+            .where(
+                users.c.id > after_id,
+                users.c.password.not_like(f"{SCHEME}$%"),
+                users.c.password.not_like(f"{NO_PASSWORD}%"),
+            )
+            .order_by(users.c.id)
+            .limit(limit)
+        )]
+
+
+def _store_password_hashes(engine: Engine, rows: list[dict[str, Any]]) -> int:
+    """Write one chunk of hashes; a password changed meanwhile is left alone."""
+    users = UserModel.__table__
+    with engine.begin() as connection:
+        return connection.execute(
+            update(users)
+            .where(users.c.id == bindparam("b_id"), users.c.password == bindparam("b_plaintext"))
+            .values(password=bindparam("b_password")),
+            rows,
+        ).rowcount
+
+
+async def hash_plaintext_passwords(
+        engine: Engine,
+        password_hasher: PasswordHasher,
+        *,
+        chunk_size: int = PASSWORD_CHUNK,
+) -> int:
+    """Replace passwords stored before hashing with their scrypt hash.
+
+    Runs after startup rather than in `upgrade_schema`: a legacy database
+    with many users would otherwise hold up startup for minutes. The hashes
+    run on the hasher's pool and every chunk commits on its own, so an
+    interrupted run resumes where it stopped. Returns the passwords hashed.
+    """
+    hashed = 0
+    after_id = 0
+    while plaintext := await asyncio.to_thread(_plaintext_passwords, engine, after_id=after_id, limit=chunk_size):
+        hashes = await asyncio.gather(*(password_hasher.hash_async(password) for _, password in plaintext))
+        hashed += await asyncio.to_thread(_store_password_hashes, engine, [
+            {"b_id": user_id, "b_plaintext": password, "b_password": hash_}
+            for (user_id, password), hash_ in zip(plaintext, hashes)
+        ])
+        after_id = plaintext[-1][0]
+    if hashed:
+        logger.warning("Migration: hashed %d plaintext passwords in users", hashed)
+    return hashed
+
+
+async def run_password_upgrade(engine: Engine, password_hasher: PasswordHasher) -> None:
+    """hash_plaintext_passwords as a startup task; a failure is retried by the next start."""
+    try:
+        await hash_plaintext_passwords(engine, password_hasher)
+    except Exception as exception:
+        print(f"Password upgrade failed: {exception}")
+
+
+def upgrade_schema(engine: Engine, *, drop_duplicates: bool = False) -> list[str]:
+    """Create missing tables, columns and indexes on an existing database.
+
+    `create_all` only creates whole tables, so a ride.db from before a column
+    or index was added to the models would never get it. Returns the created
+    columns (as `table.column`) and index names.
+
+    Rows that would break a new unique index raise DuplicateRowsError, with
+    nothing deleted, unless `drop_duplicates` is set. Plaintext passwords
+    are left to `hash_plaintext_passwords`.
+    """
+    DbModel.metadata.create_all(bind=engine)
+
+    created: list[str] = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in DbModel.metadata.sorted_tables:
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    _add_column(connection, column)
+                    name = f"{table.name}.{column.name}"
+                    if name in _BACKFILLS:
+                        _BACKFILLS[name](connection)
+                    created.append(name)
+
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name in existing:
+                    continue
+                if index.unique:
+                    _resolve_duplicates(connection, index, drop=drop_duplicates)
+                index.create(connection)
+                created.append(index.name)
+    return created
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upgrade the schema of DATABASE_URL.")
+    parser.add_argument(
+        "--drop-duplicates",
+        action="store_true",
+        help="delete rows that block a new unique index, keeping the newest (highest id) of each",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    settings = Settings.from_env()
+    engine = create_database_engine(settings)
+    hasher = PasswordHasher(
+        n=settings.password_scrypt_n,
+        r=settings.password_scrypt_r,
+        p=settings.password_scrypt_p,
+        workers=settings.password_hash_workers,
+    )
+    schema_changes = upgrade_schema(engine, drop_duplicates=args.drop_duplicates)
+    print(f"Schema changes: {', '.join(schema_changes) or 'none'}")
+    try:
+        print(f"Passwords hashed: {asyncio.run(hash_plaintext_passwords(engine, hasher))}")
+    finally:
+        hasher.shutdown()
+        engine.dispose()
@@ -1,19 +1,55 @@
-from datetime import datetime
-from sqlalchemy import String, Boolean, ForeignKey, func, DateTime
+from datetime import datetime, timezone
+from sqlalchemy import String, Boolean, ForeignKey, Index, func, DateTime, Float, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.types import TypeDecorator
 from typing import List, Optional
 from sqlalchemy import Numeric
 
 
+class UtcDateTime(TypeDecorator):
+    """Timestamps stored and loaded in UTC.
+
+    Aware values are converted on the way in (SQLite would otherwise drop the
+    offset and keep the wall time); naive values are taken as UTC already.
+    Loaded values are naive UTC on SQLite and UTC-aware elsewhere, so JSON
+    encoding never has to convert them (see app/serialization.py).
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is not None and value.utcoffset():
+            return value.astimezone(timezone.utc)
+        return value
+
+
 class DbModel(DeclarativeBase): 
     pass
 
 class UserModel(DbModel):
     __tablename__ = "users"
+    __table_args__ = (
+        # Users with revoked tokens, reloaded by TokenVersions.refresh; only
+        # those rows are indexed, so the refresh reads a handful of entries
+        # instead of scanning every user.
+        Index(
+            "ix_users_token_version_revoked",
+            "token_version",
+            sqlite_where=text("token_version > 0"),
+            postgresql_where=text("token_version > 0"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     username: Mapped[str] = mapped_column(String(length=25), nullable=False, unique=True)
     password: Mapped[str] = mapped_column(String(length=255), nullable=False)
+    # Carried in access tokens; bumping it revokes every token issued so far.
+    token_version: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
 
     organized_rides: Mapped[list["RideModel"]] = relationship(back_populates="organizer")
     participated_in_rides: Mapped[list["ParticipationModel"]] = relationship(back_populates="participant")
@@ -28,13 +64,16 @@ class RideModel(DbModel):
     code: Mapped[str] = mapped_column(String(length=6), nullable=False, unique=True)
     title: Mapped[str] = mapped_column(String(length=100), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(String(length=255), nullable=True) 
-    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
-    created_by_user_id: Mapped[int] = Mapped[int] = mapped_column(
+    start_time: Mapped[datetime] = mapped_column(UtcDateTime, nullable=False, index=True)
+    created_by_user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="RESTRICT"),
         nullable=False,
+        index=True,
         )
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(UtcDateTime, nullable=False, server_default=func.now())
     is_active: Mapped[bool] = mapped_column(nullable=False, default=True)
+    # Bumped by every update; part of the ETag of GET /rides/{id}.
+    version: Mapped[int] = mapped_column(nullable=False, default=1, server_default="1")
 
     organizer: Mapped["UserModel"] = relationship(back_populates="organized_rides")
     has_participants: Mapped[list["ParticipationModel"]] = relationship(back_populates="ride")
@@ -46,19 +85,32 @@ class RideModel(DbModel):
 
 class ParticipationModel(DbModel):
     __tablename__ = "participations"
+    # Unique index rather than a table constraint so that it can be added to
+    # existing databases (see app/migrations.py). Its leading column also
+    # serves the per-user lookups.
+    __table_args__ = (
+        Index("uq_participations_user_id_ride_id", "user_id", "ride_id", unique=True),
+        Index("ix_participations_ride_id_grid_cell", "ride_id", "grid_cell"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
         )
-    ride_id: Mapped[int] = = mapped_column(
+    ride_id: Mapped[int] = mapped_column(
         ForeignKey("rides.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
         )
     latitude: Mapped[float] = mapped_column(Numeric(10, 8), nullable=True)
     longitude: Mapped[float] = mapped_column(Numeric(10, 8), nullable=True)
-    updated_at: Mapped[datetime] =  mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] =  mapped_column(UtcDateTime, nullable=True)
+    # Spatial grid cell of (latitude, longitude), see app/geo.py. Kept in
+    # step with the position by every write path.
+    grid_cell: Mapped[int | None] = mapped_column(nullable=True)
+    # Bumped by every update; part of the ETag of GET /participations/{id}.
+    version: Mapped[int] = mapped_column(nullable=False, default=1, server_default="1")
 
     participant: Mapped["UserModel"] = relationship(back_populates="participated_in_rides")
     ride: Mapped["RideModel"] = relationship(back_populates="has_participants")
@@ -66,3 +118,52 @@ class ParticipationModel(DbModel):
     def __repr__(self) -> str:
         return f"ParticipationModel(id={self.id!r}, user_id={self.user_id!r}, ride_id={self.ride_id!r})"
 
+
+class LocationHistoryModel(DbModel):
+    """Append-only GPS fixes of a participation.
+
+    Raw fixes have `resolution_seconds` 0 and `fixes` 1. Compaction replaces
+    old raw fixes with one row per bucket (`resolution_seconds` wide) holding
+    their average position and how many fixes it stands for.
+    """
+    __tablename__ = "location_history"
+    __table_args__ = (
+        Index(
+            "uq_location_history_participation_id_recorded_at",
+            "participation_id",
+            "recorded_at",
+            unique=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    participation_id: Mapped[int] = mapped_column(
+        ForeignKey("participations.id", ondelete="CASCADE"),
+        nullable=False,
+        )
+    latitude: Mapped[float] = mapped_column(Float, nullable=False)
+    longitude: Mapped[float] = mapped_column(Float, nullable=False)
+    recorded_at: Mapped[datetime] = mapped_column(UtcDateTime, nullable=False)
+    resolution_seconds: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    fixes: Mapped[int] = mapped_column(nullable=False, default=1, server_default="1")
+
+    def __repr__(self) -> str:
+        return (
+            f"LocationHistoryModel(id={self.id!r}, participation_id={self.participation_id!r}, "
+            f"recorded_at={self.recorded_at!r})"
+        )
+
+
+class TableVersionModel(DbModel):
+    """Per-table change counter behind the ETags of the list endpoints.
+
+    One row per versioned table, bumped in the same transaction as every
+    write to it (see app/conditional.py); a missing row means version 0.
+    """
+    __tablename__ = "table_versions"
+
+    name: Mapped[str] = mapped_column(String(length=50), primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"TableVersionModel(name={self.name!r}, version={self.version!r})"
@@ -0,0 +1,27 @@
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+
+from app.serialization import dump_rows, dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _encode_batch(batch: Sequence[Any], schema: type[BaseModel]) -> bytes:
+    return b"".join(dumps(item, option=orjson.OPT_APPEND_NEWLINE) for item in dump_rows(batch, schema))
+
+
+def ndjson_batches(batches: Iterable[Sequence[Any]], schema: type[BaseModel]) -> Iterator[bytes]:
+    """Serialize ORM rows batch by batch, one JSON document per line."""
+    for batch in batches:
+        yield _encode_batch(batch, schema)
+
+
+async def async_ndjson_batches(
+    batches: AsyncIterator[Sequence[Any]],
+    schema: type[BaseModel],
+) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield _encode_batch(batch, schema)
@@ -0,0 +1,90 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
+SCHEME = "scrypt"
+SALT_BYTES = 16
+KEY_BYTES = 32
+# Stored instead of a hash for accounts that cannot log in (seeded users).
+NO_PASSWORD = "!"
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def is_plaintext(stored: str) -> bool:
+    """A password stored before hashing; `hash_plaintext_passwords` hashes those once."""
+    return not stored.startswith((f"{SCHEME}$", NO_PASSWORD))
+
+
+class PasswordHasher:
+    """scrypt password hashing on a small dedicated thread pool.
+
+    A hash takes tens of milliseconds by design. Running it on the event loop
+    would stall every request, and running it on the shared anyio pool would
+    let a login burst starve the other sync endpoints. `workers` caps how many
+    hashes run at once; extra logins queue here instead.
+
+    Hashes are stored as `scrypt$n$r$p$salt$key`; nothing else ever verifies.
+    Legacy plaintext passwords are hashed after startup instead.
+    """
+
+    def __init__(self, *, n: int = 2**14, r: int = 8, p: int = 1, workers: int = 2):
+        self.n = n
+        self.r = r
+        self.p = p
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=128 * r * (n + p + 2) + 1024 * 1024,
+            dklen=KEY_BYTES,
+        )
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(SALT_BYTES)
+        key = self._derive(password, salt, self.n, self.r, self.p)
+        return f"{SCHEME}${self.n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(key)}"
+
+    @cached_property
+    def _dummy_hash(self) -> str:
+        return self.hash(_b64encode(os.urandom(KEY_BYTES)))
+
+    def verify(self, password: str, stored: str | None) -> bool:
+        """Whether `password` matches the `stored` hash.
+
+        Without a hash (`None` for an unknown user) the check against a
+        dummy hash still runs, so the response time does not reveal whether
+        the user exists.
+        """
+        parts = stored.split("$") if stored else []
+        if len(parts) != 6 or parts[0] != SCHEME:
+            self.verify(password, self._dummy_hash)
+            return False
+        _, n, r, p, salt, key = parts
+        derived = self._derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(derived, base64.b64decode(key))
+
+    def needs_rehash(self, stored: str) -> bool:
+        return not stored.startswith(f"{SCHEME}${self.n}${self.r}${self.p}$")
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.hash, password)
+
+    async def verify_async(self, password: str, stored: str | None) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.verify, password, stored
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -1,11 +1,177 @@
-from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import (
+    ColumnElement,
+    Insert,
+    Integer,
+    Select,
+    Update,
+    and_,
+    bindparam,
+    cast,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+from collections.abc import Collection, Iterator, Mapping, Sequence
 from typing import Any, List
 import secrets, string
 
-from app.models import UserModel, RideModel, ParticipationModel
+from app.geo import grid_cell
+from app.locations import LocationState, location_update, written_fixes
+from app.models import UserModel, RideModel, ParticipationModel, LocationHistoryModel, TableVersionModel
+
+# Rows fetched per round trip by the streaming exports.
+EXPORT_BATCH_SIZE = 1000
+
+# Ride codes are 6 characters from A-Z0-9 (36**6, about 2.2 billion codes).
+MAX_CODE_ATTEMPTS = 10
+
+_DIALECT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+def as_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value
+
+
+# Executed once per batch with a list of parameter sets (executemany). The
+# updated_at guard keeps a fix written concurrently by another request from
+# being overwritten by an older one.
+_participations = ParticipationModel.__table__
+LOCATION_FIX_UPDATE: Update = (
+    update(_participations)
+    .where(
+        _participations.c.id == bindparam("b_id"),
+        or_(
+            _participations.c.updated_at.is_(None),
+            _participations.c.updated_at < bindparam("b_updated_at"),
+        ),
+    )
+    .values(
+        latitude=bindparam("b_latitude"),
+        longitude=bindparam("b_longitude"),
+        updated_at=bindparam("b_updated_at"),
+        grid_cell=bindparam("b_grid_cell"),
+        version=_participations.c.version + 1,
+    )
+)
+
+
+def epoch_seconds(column: ColumnElement[datetime], dialect_name: str) -> ColumnElement[int]:
+    if dialect_name == "postgresql":
+        return cast(func.extract("epoch", column), Integer)
+    return cast(func.strftime("%s", column), Integer)
+
+
+def in_grid_cells(ride_id: int, ranges: Sequence[tuple[int, int]]) -> Select:
+    """Participations of a ride whose grid cell falls in one of `ranges`.
+
+    One index range scan of (ride_id, grid_cell) per range.
+    """
+    return select(ParticipationModel).where(
+        ParticipationModel.ride_id == ride_id,
+        or_(*(ParticipationModel.grid_cell.between(low, high) for low, high in ranges)),
+    )
+
+
+def select_ride_participants(ride_id: int, *, limit: int, after_id: int | None = None) -> Select:
+    """A page of a ride's roster with each participant's user in the same query."""
+    statement = (
+        select(ParticipationModel)
+        .where(ParticipationModel.ride_id == ride_id)
+        .options(joinedload(ParticipationModel.participant, innerjoin=True))
+        .order_by(ParticipationModel.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        statement = statement.where(ParticipationModel.id > after_id)
+    return statement
+
+
+def insert_location_history(dialect_name: str) -> Insert:
+    """Executemany-able INSERT that skips fixes already recorded (resent batches)."""
+    history = LocationHistoryModel.__table__
+    return _DIALECT_INSERTS[dialect_name](history).on_conflict_do_nothing(
+        index_elements=[history.c.participation_id, history.c.recorded_at],
+    )
+
+
+def select_history_buckets(
+        dialect_name: str,
+        bucket_seconds: int,
+        *criteria: ColumnElement[bool],
+) -> Select:
+    """One row per `bucket_seconds` window: first fix time, weighted mean position, fix count."""
+    history = LocationHistoryModel
+    bucket = epoch_seconds(history.recorded_at, dialect_name) // bucket_seconds
+    weight = func.sum(history.fixes)
+    return (
+        select(
+            history.participation_id,
+            func.min(history.recorded_at).label("recorded_at"),
+            (func.sum(history.latitude * history.fixes) / weight).label("latitude"),
+            (func.sum(history.longitude * history.fixes) / weight).label("longitude"),
+            weight.label("fixes"),
+        )
+        .where(*criteria)
+        .group_by(history.participation_id, bucket)
+        .order_by(history.participation_id, bucket)
+    )
+
+
+def compaction_criteria(older_than: datetime, bucket_seconds: int) -> ColumnElement[bool]:
+    # Cut at a bucket boundary so that no bucket is compacted half now, half later.
+    if older_than.tzinfo is None:
+        older_than = older_than.replace(tzinfo=timezone.utc)
+    cutoff = int(older_than.timestamp())
+    cutoff -= cutoff % bucket_seconds
+    return and_(
+        LocationHistoryModel.recorded_at < datetime.fromtimestamp(cutoff, tz=timezone.utc),
+        LocationHistoryModel.resolution_seconds < bucket_seconds,
+    )
+
+
+def bump_table_version(dialect_name: str, name: str) -> Insert:
+    table_versions = TableVersionModel.__table__
+    return (
+        _DIALECT_INSERTS[dialect_name](table_versions)
+        .values(name=name, version=1)
+        .on_conflict_do_update(
+            index_elements=[table_versions.c.name],
+            set_={"version": table_versions.c.version + 1},
+        )
+    )
+
+
+def select_table_version(name: str) -> Select:
+    return select(func.coalesce(
+        select(TableVersionModel.version).where(TableVersionModel.name == name).scalar_subquery(), 0,
+    ))
+
+
+def insert_ride_ignoring_code_conflict(dialect_name: str, **values: Any) -> Insert:
+    """INSERT ... ON CONFLICT (code) DO NOTHING RETURNING the new ride.
+
+    Returns no row when the code is taken, so the caller can retry with
+    another code without a failed flush poisoning the session.
+    """
+    insert = _DIALECT_INSERTS[dialect_name]
+    return (
+        insert(RideModel)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[RideModel.code])
+        .returning(RideModel)
+    )
 
 
 class UserRepository:
@@ -35,9 +201,21 @@ class UserRepository:
             .first()
         )
     
-    def get_all_users(self) -> List[UserModel]:
-        statement = select(UserModel)
-        return(self.session.execute(statement).scalars().all()) 
+    def get_all_users(self, *, limit: int, after_id: int | None = None) -> List[UserModel]:
+        statement = select(UserModel).order_by(UserModel.id).limit(limit)
+        if after_id is not None:
+            statement = statement.where(UserModel.id > after_id)
+        return(self.session.execute(statement).scalars().all())
+
+    def update_password(self, user: UserModel, *, password: str) -> UserModel:
+        user.password = password
+        self.session.flush()
+        return user
+
+    def revoke_tokens(self, user: UserModel) -> UserModel:
+        user.token_version += 1
+        self.session.flush()
+        return user
 
 class RideRepository:
     session: Session
@@ -49,15 +227,6 @@ class RideRepository:
         characters = string.ascii_uppercase + string.digits
         return ''.join(secrets.choice(characters) for _ in range(length))
     
-    def _generate_unique_code(self) -> str:
-        while True:
-            code = self._generate_string_code()
-            statement = select(RideModel).where(RideModel.code == code)
-            existintg_ride = self.session.execute(statement).scalar_one_or_none()
-
-            if existintg_ride is None:
-                return code
-            
     def create_ride(
             self,
             *,
@@ -66,25 +235,51 @@ class RideRepository:
             start_time: datetime,
             created_by_user_id: int,
         ) -> RideModel:
-        unique_code = self._generate_unique_code()
-        new_ride = RideModel(
-            code=unique_code,
-            title=title,
-            description=description,
-            start_time=start_time,
-            created_by_user_id=created_by_user_id,
-        ) 
-
-        self.session.add(new_ride)
-        self.session.flush()
-
-        return new_ride
+        # Insert with a random code and let the unique index reject collisions
+        # instead of SELECTing every candidate first: one statement per attempt,
+        # and a retry is needed about once per 200 rides even at 10M rides.
+        for _ in range(MAX_CODE_ATTEMPTS):
+            statement = insert_ride_ignoring_code_conflict(
+                self.session.get_bind().dialect.name,
+                code=self._generate_string_code(),
+                title=title,
+                description=description,
+                start_time=as_utc(start_time),
+                created_by_user_id=created_by_user_id,
+            )
+            new_ride = self.session.scalars(statement).one_or_none()
+            if new_ride is not None:
+                return new_ride
+        raise RuntimeError("Could not allocate a unique ride code")
     
-    def get_all_rides(self) -> List[RideModel]:
-        statement = select(RideModel)
+    def get_all_rides(
+            self,
+            *,
+            limit: int,
+            after: tuple[datetime, int] | None = None,
+        ) -> List[RideModel]:
+        statement = (
+            select(RideModel)
+            .order_by(RideModel.start_time, RideModel.id)
+            .limit(limit)
+        )
+        if after is not None:
+            statement = statement.where(tuple_(RideModel.start_time, RideModel.id) > after)
         return(self.session.execute(statement).scalars().all())
  
 
+    def iter_rides(
+            self,
+            *,
+            created_after: datetime | None = None,
+            batch_size: int = EXPORT_BATCH_SIZE,
+        ) -> Iterator[Sequence[RideModel]]:
+        statement = select(RideModel).order_by(RideModel.id)
+        if created_after is not None:
+            statement = statement.where(RideModel.created_at > created_after)
+        result = self.session.execute(statement.execution_options(yield_per=batch_size))
+        return result.scalars().partitions()
+
     def get_by_code(self, *, ride_code: str) -> RideModel | None:
         statement = select(RideModel).where(RideModel.code == ride_code) 
         return(self.session.execute(statement).scalar_one_or_none())
@@ -92,6 +287,19 @@ class RideRepository:
     def get_by_id(self, *, ride_id: int) -> RideModel | None:
         statement = select(RideModel).where(RideModel.id == ride_id)
         return(self.session.execute(statement).scalar_one_or_none())
+
+    def get_version(self, *, ride_id: int) -> int | None:
+        statement = select(RideModel.version).where(RideModel.id == ride_id)
+        return self.session.execute(statement).scalar_one_or_none()
+
+    def get_version_by_code(self, *, ride_code: str) -> tuple[int, int] | None:
+        """(id, version) of the ride with this code."""
+        statement = select(RideModel.id, RideModel.version).where(RideModel.code == ride_code)
+        row = self.session.execute(statement).one_or_none()
+        return None if row is None else (row.id, row.version)
+
+    def get_table_version(self) -> int:
+        return self.session.execute(select_table_version(RideModel.__tablename__)).scalar_one()
     
     def delete_ride(self, *, ride: RideModel) -> None:
         self.session.delete(ride)
@@ -116,6 +324,7 @@ class RideRepository:
         for key, value in ride_to_update.items():
             if value is not None:
                 setattr(ride, key, value)
+        ride.version = RideModel.version + 1
 
         self.session.add(ride)
         self.session.flush()
@@ -143,6 +352,7 @@ class ParticipationRepository:
             latitude = latitude,
             longitude = longitude,
             updated_at = updated_at,
+            grid_cell = grid_cell(latitude, longitude),
         )
 
         self.session.add(new_participation)
@@ -150,33 +360,164 @@ class ParticipationRepository:
 
         return new_participation
     
+    def get_by_user_and_ride(self, *, user_id: int, ride_id: int) -> ParticipationModel | None:
+        statement = select(ParticipationModel).where(
+            ParticipationModel.user_id == user_id,
+            ParticipationModel.ride_id == ride_id,
+        )
+        return (self.session.execute(statement)).scalar_one_or_none()
+
     def get_by_id(self, *, participation_id: int) -> ParticipationModel | None:
         return self.session.get(ParticipationModel, participation_id)
-    
-    def get_all_participations(self) -> List[ParticipationModel]:
-        statement = select(ParticipationModel)
+
+    def get_version(self, *, participation_id: int) -> int | None:
+        statement = select(ParticipationModel.version).where(ParticipationModel.id == participation_id)
+        return self.session.execute(statement).scalar_one_or_none()
+
+    def get_all_participations(
+            self,
+            *,
+            limit: int,
+            after_id: int | None = None,
+    ) -> List[ParticipationModel]:
+        statement = select(ParticipationModel).order_by(ParticipationModel.id).limit(limit)
+        if after_id is not None:
+            statement = statement.where(ParticipationModel.id > after_id)
         return (self.session.execute(statement).scalars().all())
 
+    def get_page_versions(self, *, limit: int, after_id: int | None = None) -> Sequence[tuple[int, int]]:
+        """(id, version) of the rows get_all_participations would return, for the list ETag."""
+        statement = select(ParticipationModel.id, ParticipationModel.version).order_by(ParticipationModel.id)
+        if after_id is not None:
+            statement = statement.where(ParticipationModel.id > after_id)
+        return self.session.execute(statement.limit(limit)).all()
+
+    def iter_participations(
+            self,
+            *,
+            updated_after: datetime | None = None,
+            batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[Sequence[ParticipationModel]]:
+        statement = select(ParticipationModel).order_by(ParticipationModel.id)
+        if updated_after is not None:
+            statement = statement.where(ParticipationModel.updated_at > updated_after)
+        result = self.session.execute(statement.execution_options(yield_per=batch_size))
+        return result.scalars().partitions()
+
+    def get_location_states(
+            self,
+            *,
+            participation_ids: Collection[int],
+    ) -> dict[int, LocationState]:
+        statement = select(
+            ParticipationModel.id,
+            ParticipationModel.user_id,
+            ParticipationModel.ride_id,
+            ParticipationModel.updated_at,
+        ).where(ParticipationModel.id.in_(participation_ids))
+        return {row.id: LocationState(*row[1:]) for row in self.session.execute(statement)}
+
+    def apply_location_fixes(self, updates: Sequence[Mapping[str, Any]]) -> set[int]:
+        """Write one fix per participation; returns the ids whose guard matched.
+
+        The rowcount of the executemany covers the whole batch. When it falls
+        short, the rows are read back: the UPDATE holds their write locks, so
+        each still holds its fix unless a newer one was there first.
+        """
+        if not updates:
+            return set()
+        if self.session.execute(LOCATION_FIX_UPDATE, list(updates)).rowcount == len(updates):
+            return {update["b_id"] for update in updates}
+        states = self.get_location_states(participation_ids={update["b_id"] for update in updates})
+        return written_fixes(updates, states)
+
+    def get_ride_participants(
+            self,
+            *,
+            ride_id: int,
+            limit: int,
+            after_id: int | None = None,
+    ) -> Sequence[ParticipationModel]:
+        statement = select_ride_participants(ride_id, limit=limit, after_id=after_id)
+        return self.session.execute(statement).scalars().all()
+
+    def get_in_grid_cells(
+            self,
+            *,
+            ride_id: int,
+            ranges: Sequence[tuple[int, int]],
+    ) -> Sequence[ParticipationModel]:
+        return self.session.execute(in_grid_cells(ride_id, ranges)).scalars().all()
+
     def update_participation(
         self,
         participation: ParticipationModel,
         *,
         latitude: float,
-        longitude: float, 
+        longitude: float,
         updated_at: datetime
-    ) -> ParticipationModel:
-        
-        participation_to_update ={
-            "latitude": latitude,
-            "longitude": longitude,
-            "updated_at": updated_at,
-        }
+    ) -> bool:
+        """Write one fix with the guard of LOCATION_FIX_UPDATE; returns whether it was.
 
-        for key, value in participation_to_update.items():
-            if value is not None:
-                setattr(participation, key, value)
+        A fix no newer than the stored one is dropped, as in location
+        batches. `participation` is reloaded either way, so it shows the
+        newest stored fix.
+        """
+        # One row, so the rowcount tells whether the guard matched.
+        fix = location_update(participation.id, latitude, longitude, updated_at)
+        written = self.session.execute(LOCATION_FIX_UPDATE, fix).rowcount == 1
+        self.session.refresh(participation)
+        return written
 
-        self.session.add(participation)
-        self.session.flush()
 
-        return participation
\ No newline at end of file
+class LocationHistoryRepository:
+    session: Session
+
+    def __init__(self, *, session: Session):
+        self.session = session
+
+    def _dialect_name(self) -> str:
+        return self.session.get_bind().dialect.name
+
+    def record_fixes(self, fixes: Sequence[Mapping[str, Any]]) -> None:
+        if fixes:
+            self.session.execute(insert_location_history(self._dialect_name()), list(fixes))
+
+    def get_time_range(self, *, participation_id: int) -> tuple[datetime | None, datetime | None]:
+        statement = select(
+            func.min(LocationHistoryModel.recorded_at), func.max(LocationHistoryModel.recorded_at),
+        ).where(LocationHistoryModel.participation_id == participation_id)
+        first, last = self.session.execute(statement).one()
+        return first, last
+
+    def get_track(
+            self,
+            *,
+            participation_id: int,
+            start: datetime,
+            end: datetime,
+            bucket_seconds: int,
+    ) -> Sequence[Any]:
+        statement = select_history_buckets(
+            self._dialect_name(),
+            bucket_seconds,
+            LocationHistoryModel.participation_id == participation_id,
+            LocationHistoryModel.recorded_at >= as_utc(start),
+            LocationHistoryModel.recorded_at <= as_utc(end),
+        )
+        return self.session.execute(statement).all()
+
+    def compact(self, *, older_than: datetime, bucket_seconds: int) -> int:
+        """Replace fixes finer than `bucket_seconds` recorded before `older_than`
+        with one row per participation and bucket. Returns the rows removed."""
+        criteria = compaction_criteria(older_than, bucket_seconds)
+        buckets = self.session.execute(
+            select_history_buckets(self._dialect_name(), bucket_seconds, criteria)
+        ).all()
+        if not buckets:
+            return 0
+        removed = self.session.execute(delete(LocationHistoryModel.__table__).where(criteria)).rowcount
+        self.session.execute(insert(LocationHistoryModel.__table__), [
+            {**bucket._asdict(), "resolution_seconds": bucket_seconds} for bucket in buckets
+        ])
+        return removed
@@ -1,21 +1,60 @@
-from typing import Annotated, List
+from datetime import datetime
+from typing import Annotated, Any, List
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError
 
+from app.admission import admit
+from app.auth_cache import TokenCache, TokenVersions
 from app.injections import (
-    get_user_repository, 
+    get_live_broker,
+    get_live_publisher,
+    get_live_ride_id,
+    get_location_buffer,
+    get_password_hasher,
+    get_token_cache,
+    get_token_versions,
+    get_user_repository,
+    get_read_user_repository,
     get_ride_repository,
+    get_read_ride_repository,
     get_participation_repository,
+    get_read_participation_repository,
+    get_location_history_repository,
+    get_read_location_history_repository,
 )
 from app.repositories import (
     UserRepository,
     RideRepository,
     ParticipationRepository,
+    LocationHistoryRepository,
 )
 from app.models import UserModel
+from app.passwords import PasswordHasher
+from app.conditional import etag, has_validator, is_fresh, not_modified, rows_etag
+from app.geo import MAX_NEARBY_RADIUS_M, cell_ranges, within_radius
+from app.live import SSE_MEDIA_TYPE, LiveBroker, LivePublisher, stream_sse, stream_websocket
+from app.location_buffer import LocationBuffer, buffered_version, merge_buffered
+from app.locations import (
+    DEFAULT_TRACK_POINTS,
+    MAX_TRACK_POINTS,
+    applied_participations,
+    history_row,
+    is_newer_fix,
+    location_update,
+    plan_location_fixes,
+    recorded_fixes,
+    settle_location_fixes,
+    track_bucket_seconds,
+)
+from app.ndjson import NDJSON_MEDIA_TYPE, ndjson_batches
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, paginate
+from app.serialization import page_response
 from app.schemas import (
+    Page,
     UserResponse,
     UserCreate,
     TokenResponse,
@@ -25,14 +64,20 @@ from app.schemas import (
     ParticipationCreate,
     ParticipationResponse,
     ParticipationUpdate,
+    NearbyParticipation,
+    RideParticipant,
+    LocationBatch,
+    LocationBatchResponse,
+    TrackPoint,
+    TrackResponse,
 )
 
 from app.security import create_access_token, decode_access_token
 
-user_router = APIRouter()
-auth_router = APIRouter()
-ride_router = APIRouter()
-participation_router = APIRouter()
+user_router = APIRouter(dependencies=[Depends(admit)])
+auth_router = APIRouter(dependencies=[Depends(admit)])
+ride_router = APIRouter(dependencies=[Depends(admit)])
+participation_router = APIRouter(dependencies=[Depends(admit)])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -44,19 +89,25 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
     status_code=status.HTTP_201_CREATED,
     responses={status.HTTP_409_CONFLICT: {}},
 )
-def create_user(
+async def create_user(
     user_to_create: UserCreate,
     user_repository: Annotated[
         UserRepository, Depends(get_user_repository)
     ],
+    password_hasher: Annotated[PasswordHasher, Depends(get_password_hasher)],
 ) -> UserResponse:
-    existing_user = user_repository.get_by_username(username=user_to_create.username)
+    # `async def` so that hashing waits on the hasher's own pool instead of
+    # holding an anyio worker; the blocking repository calls still use one.
+    existing_user = await run_in_threadpool(
+        user_repository.get_by_username, username=user_to_create.username
+    )
     if existing_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT)
 
+    password = await password_hasher.hash_async(user_to_create.password)
     try:
-        user_model = user_repository.create_user(
-            username=user_to_create.username, password=user_to_create.password
+        user_model = await run_in_threadpool(
+            user_repository.create_user, username=user_to_create.username, password=password
         )   
         return UserResponse.model_validate(user_model)
     except Exception as exception:
@@ -70,7 +121,7 @@ def create_user(
 def get_user(
     id: int,
     user_repository: Annotated[
-        UserRepository, Depends(get_user_repository)
+        UserRepository, Depends(get_read_user_repository)
     ],
 ) -> UserResponse:
     user = user_repository.get_by_id(user_id=id)
@@ -79,16 +130,23 @@ def get_user(
     return UserResponse.model_validate(user)
 
 @user_router.get(
-     "/",
-    response_model=List[UserResponse],
-    status_code=status.HTTP_200_OK
+    "/",
+    response_model=Page[UserResponse],
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_400_BAD_REQUEST: {}},
 )
 def get_list_users(
-    user_repository: Annotated[UserRepository, Depends(get_user_repository)],
-) -> List[UserResponse]:
-    
-    users = user_repository.get_all_users()
-    return [UserResponse.model_validate(user) for user in users]
+    user_repository: Annotated[UserRepository, Depends(get_read_user_repository)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Page[UserResponse]:
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    users = user_repository.get_all_users(limit=limit + 1, after_id=after_id)
+    page, next_cursor = paginate(users, limit=limit, key=lambda user: (user.id,))
+    return Page[UserResponse](
+        items=[UserResponse.model_validate(user) for user in page],
+        next_cursor=next_cursor,
+    )
 
 
 # ------------- AUTH ROUTES ------------- #
@@ -97,28 +155,33 @@ def get_list_users(
     response_model=TokenResponse,
     responses={status.HTTP_401_UNAUTHORIZED: {}},    
 )
-def login(
+async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     user_repository: Annotated[UserRepository, Depends(get_user_repository)],
+    password_hasher: Annotated[PasswordHasher, Depends(get_password_hasher)],
 ) -> TokenResponse:
-    user = user_repository.get_by_username(username=form_data.username)
-    if not user or user.password != form_data.password:
+    user = await run_in_threadpool(user_repository.get_by_username, username=form_data.username)
+    # Unknown users are checked against a dummy hash: same cost as a wrong password.
+    if not await password_hasher.verify_async(form_data.password, user.password if user else None):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
         )
+    if password_hasher.needs_rehash(user.password):
+        password = await password_hasher.hash_async(form_data.password)
+        await run_in_threadpool(user_repository.update_password, user, password=password)
 
-    access_token = create_access_token(subject=str(user.id))
+    access_token = create_access_token(
+        subject=str(user.id),
+        claims={"username": user.username, "ver": user.token_version},
+    )
 
     return TokenResponse(
         access_token=access_token,
         token_type="bearer",
     )
 
-def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    user_repository: Annotated[UserRepository, Depends(get_user_repository)],  
-) -> UserResponse:
+def verified_claims(token: str) -> dict[str, Any]:
     try:
         payload = decode_access_token(token)
 
@@ -126,43 +189,90 @@ def get_current_user(
         if sub is None:
             raise JWTError("Subject not found in token")
         
-        user_id = int(sub)
+        int(sub)
+        return payload
     
     except (ValueError, JWTError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
         )
-        
-    user = user_repository.get_by_id(user_id=user_id)
+
+def ensure_not_revoked(user_id: int, token_version: int, token_versions: TokenVersions) -> None:
+    if not token_versions.is_current(user_id, token_version):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+        )
+
+def principal_from_claims(
+    claims: dict[str, Any], token_versions: TokenVersions,
+) -> UserResponse | None:
+    """Principal carried by the token in stateless mode, None when it must be looked up."""
+    if not token_versions.stateless or "username" not in claims or "ver" not in claims:
+        return None
+    return UserResponse(id=int(claims["sub"]), username=claims["username"])
+
+def principal_from_user(claims: dict[str, Any], user: UserModel | None) -> UserResponse:
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
+    if claims.get("ver", user.token_version) < user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+        )
     return UserResponse.model_validate(user)
 
+def authenticate(
+    token: str,
+    token_cache: TokenCache,
+    token_versions: TokenVersions,
+    user_repository: UserRepository,
+) -> UserResponse:
+    cached = token_cache.get(token)
+    if cached:
+        ensure_not_revoked(cached.principal.id, cached.token_version, token_versions)
+        return cached.principal
+
+    claims = verified_claims(token)
+    if "ver" in claims:
+        ensure_not_revoked(int(claims["sub"]), claims["ver"], token_versions)
+    principal = principal_from_claims(claims, token_versions)
+    if principal is None:
+        user = user_repository.get_by_id(user_id=int(claims["sub"]))
+        principal = principal_from_user(claims, user)
+    # Tokens from before the `ver` claim stand for the version they were checked against.
+    token_version = claims["ver"] if "ver" in claims else user.token_version
+    token_cache.put(token, claims, principal, token_version)
+    return principal
+
+def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    token_cache: Annotated[TokenCache, Depends(get_token_cache)],
+    token_versions: Annotated[TokenVersions, Depends(get_token_versions)],
+    user_repository: Annotated[UserRepository, Depends(get_user_repository)],  
+) -> UserResponse:
+    return authenticate(token, token_cache, token_versions, user_repository)
+
+def get_read_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    token_cache: Annotated[TokenCache, Depends(get_token_cache)],
+    token_versions: Annotated[TokenVersions, Depends(get_token_versions)],
+    user_repository: Annotated[UserRepository, Depends(get_read_user_repository)],
+) -> UserResponse:
+    """get_current_user for GET routes: a cache miss looks the user up on the read session."""
+    return authenticate(token, token_cache, token_versions, user_repository)
+
 def get_current_user_model(
     token: Annotated[str, Depends(oauth2_scheme)],
     user_repository: Annotated[UserRepository, Depends(get_user_repository)],  
 ) -> UserModel:
-    try:
-        payload = decode_access_token(token)
-        subject = payload.get("sub")
-        if subject is None:
-            raise JWTError("Subject not found in token")
-        user_id = int(subject)
-    except (ValueError, JWTError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-        )
-    user = user_repository.get_by_id(user_id=user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
+    claims = verified_claims(token)
+    user = user_repository.get_by_id(user_id=int(claims["sub"]))
+    principal_from_user(claims, user)
     return user
 
 
@@ -171,9 +281,22 @@ def get_current_user_model(
     response_model=UserResponse,
     responses={status.HTTP_401_UNAUTHORIZED: {}},
 )
-def get_me(current_user: Annotated[UserModel, Depends(get_current_user_model)],
+def get_me(current_user: Annotated[UserResponse, Depends(get_read_current_user)],
 ) -> UserResponse:
-    return UserResponse.model_validate(current_user)
+    return current_user
+
+
+@auth_router.post(
+    "/revoke",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_401_UNAUTHORIZED: {}},
+)
+def revoke_tokens(
+    current_user: Annotated[UserModel, Depends(get_current_user_model)],
+    user_repository: Annotated[UserRepository, Depends(get_user_repository)],
+) -> Response:
+    user_repository.revoke_tokens(current_user)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 # ------------- RIDE ROUTES ------------- #
@@ -200,48 +323,171 @@ def create_ride(
     
 @ride_router.get(
     "/",
-    response_model=List[RideResponse],
-    status_code=status.HTTP_200_OK
+    response_model=Page[RideResponse],
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_400_BAD_REQUEST: {}},
 )
 def get_list_rides(
-    ride_repository: Annotated[RideRepository, Depends(get_ride_repository)],
-) -> List[RideResponse]:
-    
-    rides = ride_repository.get_all_rides()
-    return [RideResponse.model_validate(ride) for ride in rides]
+    request: Request,
+    ride_repository: Annotated[RideRepository, Depends(get_read_ride_repository)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Page[RideResponse]:
+    current = etag("rides", ride_repository.get_table_version())
+    if is_fresh(request, current):
+        return not_modified(current)
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    rides = ride_repository.get_all_rides(limit=limit + 1, after=after)
+    page, next_cursor = paginate(rides, limit=limit, key=lambda ride: (ride.start_time, ride.id))
+    return page_response(page, RideResponse, next_cursor, headers={"ETag": current})
+
+@ride_router.get(
+    "/export",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+def export_rides(
+    ride_repository: Annotated[RideRepository, Depends(get_read_ride_repository)],
+    created_after: datetime | None = None,
+) -> StreamingResponse:
+    batches = ride_repository.iter_rides(created_after=created_after)
+    return StreamingResponse(ndjson_batches(batches, RideResponse), media_type=NDJSON_MEDIA_TYPE)
 
 @ride_router.get(
     "/code/{code}",
     response_model=RideResponse,    
     status_code=status.HTTP_200_OK,
-    responses={status.HTTP_404_NOT_FOUND: {}},
+    responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_404_NOT_FOUND: {}},
 )
 def get_ride_by_code(
     code: str,
+    request: Request,
+    response: Response,
     ride_repository: Annotated[
-        RideRepository, Depends(get_ride_repository)
+        RideRepository, Depends(get_read_ride_repository)
     ],
 ) -> RideResponse:
+    if has_validator(request):
+        found = ride_repository.get_version_by_code(ride_code=code)
+        if found and is_fresh(request, current := etag("ride", *found)):
+            return not_modified(current)
     ride = ride_repository.get_by_code(ride_code=code)
     if not ride:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    return RideResponse.model_validate(ride) 
+    response.headers["ETag"] = etag("ride", ride.id, ride.version)
+    return RideResponse.model_validate(ride)
 
 @ride_router.get(
         "/{id}",
         response_model=RideResponse,
         status_code=status.HTTP_200_OK,
-        responses={status.HTTP_404_NOT_FOUND: {}},
+        responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_404_NOT_FOUND: {}},
 )
 def get_ride_by_id(
         id: int,
-        ride_repository: Annotated[RideRepository, Depends(get_ride_repository)],
+        request: Request,
+        response: Response,
+        ride_repository: Annotated[RideRepository, Depends(get_read_ride_repository)],
 ) -> RideResponse:
+    # A revalidation reads the version column only; the row is loaded and
+    # serialized when it has changed.
+    if has_validator(request):
+        version = ride_repository.get_version(ride_id=id)
+        if version is not None and is_fresh(request, current := etag("ride", id, version)):
+            return not_modified(current)
     ride = ride_repository.get_by_id(ride_id=id)
     if not ride:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    response.headers["ETag"] = etag("ride", ride.id, ride.version)
     return RideResponse.model_validate(ride)
 
+@ride_router.get(
+        "/{id}/participants",
+        response_model=Page[RideParticipant],
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_400_BAD_REQUEST: {}, status.HTTP_404_NOT_FOUND: {}},
+)
+def get_ride_participants(
+        id: int,
+        ride_repository: Annotated[RideRepository, Depends(get_read_ride_repository)],
+        participation_repository: Annotated[
+            ParticipationRepository,
+            Depends(get_read_participation_repository),
+        ],
+        location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+) -> Page[RideParticipant]:
+    if not ride_repository.get_by_id(ride_id=id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    participations = participation_repository.get_ride_participants(
+        ride_id=id, limit=limit + 1, after_id=after_id,
+    )
+    page, next_cursor = paginate(participations, limit=limit, key=lambda r: (r.id,))
+    return page_response(merge_buffered(location_buffer, page), RideParticipant, next_cursor)
+
+@ride_router.get(
+        "/{id}/nearby",
+        response_model=List[NearbyParticipation],
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_404_NOT_FOUND: {}},
+)
+def get_nearby_participations(
+        id: int,
+        lat: Annotated[float, Query(ge=-90, le=90)],
+        lon: Annotated[float, Query(ge=-180, le=180)],
+        radius_m: Annotated[float, Query(gt=0, le=MAX_NEARBY_RADIUS_M)],
+        ride_repository: Annotated[RideRepository, Depends(get_read_ride_repository)],
+        participation_repository: Annotated[
+            ParticipationRepository,
+            Depends(get_read_participation_repository),
+        ],
+        location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+) -> List[NearbyParticipation]:
+    if not ride_repository.get_by_id(ride_id=id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    # The grid narrows the ride to the cells around the circle; the exact
+    # distance check then drops the corners. Buffered fixes move candidates
+    # within the circle, but not into it until they are flushed.
+    candidates = merge_buffered(location_buffer, participation_repository.get_in_grid_cells(
+        ride_id=id, ranges=cell_ranges(lat, lon, radius_m),
+    ))
+    return [
+        NearbyParticipation(**ParticipationResponse.model_validate(participation).model_dump(), distance_m=distance)
+        for participation, distance in within_radius(lat, lon, radius_m, candidates)
+    ]
+
+@ride_router.get(
+        "/{id}/live",
+        response_class=StreamingResponse,
+        status_code=status.HTTP_200_OK,
+        responses={
+            status.HTTP_200_OK: {"content": {SSE_MEDIA_TYPE: {}}},
+            status.HTTP_404_NOT_FOUND: {},
+        },
+)
+def stream_ride_live(
+        request: Request,
+        ride_id: Annotated[int, Depends(get_live_ride_id)],
+        broker: Annotated[LiveBroker, Depends(get_live_broker)],
+) -> StreamingResponse:
+    heartbeat_seconds = request.app.state.settings.live_heartbeat_seconds
+    return StreamingResponse(
+        stream_sse(broker, ride_id, heartbeat_seconds=heartbeat_seconds),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@ride_router.websocket("/{id}/live/ws")
+async def stream_ride_live_ws(
+        websocket: WebSocket,
+        ride_id: Annotated[int, Depends(get_live_ride_id)],
+        broker: Annotated[LiveBroker, Depends(get_live_broker)],
+) -> None:
+    await stream_websocket(websocket, broker, ride_id)
+
 @ride_router.delete(
     "/{id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -308,35 +554,86 @@ def update_ride_by_id(
 
 @participation_router.get(
         "/",
-        response_model=List[ParticipationResponse],
+        response_model=Page[ParticipationResponse],
         status_code=status.HTTP_200_OK,
+        responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_400_BAD_REQUEST: {}},
 )
 def get_list_participations(
+    request: Request,
     participation_repository: Annotated[
         ParticipationRepository,
-        Depends(get_participation_repository),
-        ]
-) -> List[ParticipationResponse]:
-    
-    participations = participation_repository.get_all_participations()
-    return [ParticipationResponse.model_validate(r) for r in participations]
+        Depends(get_read_participation_repository),
+        ],
+    location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Page[ParticipationResponse]:
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    versions = participation_repository.get_page_versions(limit=limit + 1, after_id=after_id)
+    current = rows_etag("participations", [
+        (participation_id, version, *buffered_version(location_buffer, participation_id))
+        for participation_id, version in versions
+    ])
+    if is_fresh(request, current):
+        return not_modified(current)
+    participations = participation_repository.get_all_participations(
+        limit=limit + 1, after_id=after_id,
+    )
+    page, next_cursor = paginate(participations, limit=limit, key=lambda r: (r.id,))
+    page = merge_buffered(location_buffer, page)
+    return page_response(page, ParticipationResponse, next_cursor, headers={"ETag": current})
+
+@participation_router.get(
+        "/export",
+        response_class=StreamingResponse,
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+def export_participations(
+    participation_repository: Annotated[
+        ParticipationRepository,
+        Depends(get_read_participation_repository),
+        ],
+    location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+    updated_after: datetime | None = None,
+) -> StreamingResponse:
+    batches = (
+        merge_buffered(location_buffer, batch)
+        for batch in participation_repository.iter_participations(updated_after=updated_after)
+    )
+    return StreamingResponse(ndjson_batches(batches, ParticipationResponse), media_type=NDJSON_MEDIA_TYPE)
 
 @participation_router.post(
     "/",
     response_model= ParticipationResponse,
     status_code=status.HTTP_201_CREATED,
-    responses={status.HTTP_422_UNPROCESSABLE_CONTENT: {}},
+    responses={
+        status.HTTP_404_NOT_FOUND: {},
+        status.HTTP_409_CONFLICT: {},
+        status.HTTP_422_UNPROCESSABLE_CONTENT: {},
+    },
 )
 def create_participation(
     participation_to_create: ParticipationCreate,
     participation_repository: Annotated[ParticipationRepository, Depends(get_participation_repository)],
     ride_repository: Annotated[RideRepository, Depends(get_ride_repository)],
+    history_repository: Annotated[LocationHistoryRepository, Depends(get_location_history_repository)],
     current_user: Annotated[UserResponse, Depends(get_current_user)],
+    live_publisher: Annotated[LivePublisher, Depends(get_live_publisher)],
 ) -> ParticipationResponse:
     current_ride = ride_repository.get_by_code(ride_code = participation_to_create.ride_code)
     if not current_ride:
         raise HTTPException(status_code = status.HTTP_404_NOT_FOUND)
-    
+
+    existing_participation = participation_repository.get_by_user_and_ride(
+        user_id=current_user.id, ride_id=current_ride.id,
+    )
+    if existing_participation:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Already participating in this ride",
+        )
+
     participation_model = participation_repository.create_participation(
         user_id = current_user.id,
         ride_id = current_ride.id,
@@ -344,27 +641,110 @@ def create_participation(
         longitude = participation_to_create.longitude,
         updated_at = participation_to_create.updated_at,
     )
-    return ParticipationResponse.model_validate(participation_model)
+    participation = ParticipationResponse.model_validate(participation_model)
+    if None not in (participation.latitude, participation.longitude, participation.updated_at):
+        history_repository.record_fixes([history_row(
+            participation.id, participation.latitude, participation.longitude, participation.updated_at,
+        )])
+    live_publisher.publish(participation.ride_id, participation)
+    return participation
+
+@participation_router.post(
+    "/locations",
+    response_model=LocationBatchResponse,
+    status_code=status.HTTP_200_OK,
+)
+def update_locations(
+    batch: LocationBatch,
+    participation_repository: Annotated[ParticipationRepository, Depends(get_participation_repository)],
+    history_repository: Annotated[LocationHistoryRepository, Depends(get_location_history_repository)],
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    live_publisher: Annotated[LivePublisher, Depends(get_live_publisher)],
+    location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
+) -> LocationBatchResponse:
+    states = participation_repository.get_location_states(
+        participation_ids={fix.participation_id for fix in batch.fixes},
+    )
+    if location_buffer is not None:
+        states = location_buffer.merge_states(states)
+    results, updates = plan_location_fixes(batch.fixes, states, user_id=current_user.id)
+    if location_buffer is not None:
+        applied = location_buffer.put(updates, recorded_fixes(batch.fixes, results))
+    else:
+        applied = participation_repository.apply_location_fixes(updates)
+        history_repository.record_fixes(recorded_fixes(batch.fixes, results))
+    results, updates = settle_location_fixes(results, updates, applied)
+    for participation in applied_participations(updates, states):
+        live_publisher.publish(participation.ride_id, participation)
+    return LocationBatchResponse(results=results)
 
 @participation_router.get(
         "/{id}",
         response_model=ParticipationResponse,
         status_code=status.HTTP_200_OK,
-        responses={status.HTTP_404_NOT_FOUND: {}},
+        responses={status.HTTP_304_NOT_MODIFIED: {}, status.HTTP_404_NOT_FOUND: {}},
 )
 def get_participation_by_id(
         id: int,
+        request: Request,
+        response: Response,
         participation_repository: Annotated[
-            ParticipationRepository, 
-            Depends(get_participation_repository),
+            ParticipationRepository,
+            Depends(get_read_participation_repository),
         ],
+        location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
 ) -> ParticipationResponse:
-
+    buffered = buffered_version(location_buffer, id)
+    if has_validator(request):
+        version = participation_repository.get_version(participation_id=id)
+        if version is not None and is_fresh(request, current := etag("participation", id, version, *buffered)):
+            return not_modified(current)
     participation = participation_repository.get_by_id(participation_id=id)
     if not participation:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    response.headers["ETag"] = etag("participation", participation.id, participation.version, *buffered)
+    (participation,) = merge_buffered(location_buffer, [participation])
     return ParticipationResponse.model_validate(participation)
 
+@participation_router.get(
+        "/{id}/track",
+        response_model=TrackResponse,
+        status_code=status.HTTP_200_OK,
+        responses={status.HTTP_404_NOT_FOUND: {}},
+)
+def get_participation_track(
+        id: int,
+        participation_repository: Annotated[
+            ParticipationRepository,
+            Depends(get_read_participation_repository),
+        ],
+        history_repository: Annotated[
+            LocationHistoryRepository,
+            Depends(get_read_location_history_repository),
+        ],
+        start: Annotated[datetime | None, Query(alias="from")] = None,
+        end: Annotated[datetime | None, Query(alias="to")] = None,
+        max_points: Annotated[int, Query(ge=2, le=MAX_TRACK_POINTS)] = DEFAULT_TRACK_POINTS,
+) -> TrackResponse:
+    if not participation_repository.get_by_id(participation_id=id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if start is None or end is None:
+        first, last = history_repository.get_time_range(participation_id=id)
+        if first is None:
+            return TrackResponse(participation_id=id, bucket_seconds=1, points=[])
+        start, end = start or first, end or last
+
+    bucket_seconds = track_bucket_seconds(start, end, max_points)
+    rows = history_repository.get_track(
+        participation_id=id, start=start, end=end, bucket_seconds=bucket_seconds,
+    )
+    return TrackResponse(
+        participation_id=id,
+        bucket_seconds=bucket_seconds,
+        points=[TrackPoint.model_validate(row) for row in rows],
+    )
+
 @participation_router.put(
     "/{id}",
     response_model=ParticipationResponse,
@@ -385,6 +765,9 @@ def update_participation_by_id(
         UserResponse,
         Depends(get_current_user),
     ],
+    history_repository: Annotated[LocationHistoryRepository, Depends(get_location_history_repository)],
+    live_publisher: Annotated[LivePublisher, Depends(get_live_publisher)],
+    location_buffer: Annotated[LocationBuffer | None, Depends(get_location_buffer)],
 ) -> ParticipationResponse:
     
     existing_participation = participation_repository.get_by_id(participation_id=id)
@@ -398,11 +781,33 @@ def update_participation_by_id(
             detail="Not allowed to update this participation. It belongs to another user",
             )
     
-    participation_model = participation_repository.update_participation(
-        existing_participation,
-        latitude = participation_to_update.latitude,
-        longitude = participation_to_update.longitude,
-        updated_at = participation_to_update.updated_at,
+    fix = (
+        id,
+        participation_to_update.latitude,
+        participation_to_update.longitude,
+        participation_to_update.updated_at,
     )
+    update = location_update(*fix)
+    # Last write wins in both modes: a fix no newer than the stored (or
+    # buffered) one is kept in the history but does not move the
+    # participation, and the response shows the newer position.
+    if location_buffer is not None:
+        # Acknowledged now, written by the next flush; the response shows
+        # the newest buffered fix.
+        taken = [update] if is_newer_fix(update, existing_participation.updated_at) else []
+        applied = id in location_buffer.put(taken, [history_row(*fix)])
+        (participation_model,) = location_buffer.merge([existing_participation])
+    else:
+        applied = participation_repository.update_participation(
+            existing_participation,
+            latitude = participation_to_update.latitude,
+            longitude = participation_to_update.longitude,
+            updated_at = participation_to_update.updated_at,
+        )
+        history_repository.record_fixes([history_row(*fix)])
+        participation_model = existing_participation
 
-    return ParticipationResponse.model_validate(participation_model)
+    participation = ParticipationResponse.model_validate(participation_model)
+    if applied:
+        live_publisher.publish(participation.ride_id, participation)
+    return participation
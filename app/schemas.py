@@ -1,6 +1,26 @@
 from datetime import datetime, timezone
-from typing import Annotated
-from pydantic import BaseModel, ConfigDict, AwareDatetime, AfterValidator, field_serializer
+from typing import Annotated, Generic, Literal, TypeVar
+from pydantic import BaseModel, ConfigDict, AwareDatetime, AfterValidator, Field, PlainSerializer
+
+T = TypeVar("T")
+
+
+def _isoformat_utc(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+# Formatted as UTC with a +00:00 offset. Only JSON-mode dumps (response_model,
+# model_dump_json) call the serializer; the list routes dump in Python mode and
+# leave the formatting to orjson (see app/serialization.py).
+UtcDatetime = Annotated[datetime, PlainSerializer(_isoformat_utc, return_type=str, when_used="json")]
+
+#------------------------ PAGINATION
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
 
 #------------------------ USER
 
@@ -37,20 +57,12 @@ class RideResponse(RideBase):
     id: int
     code: str
     created_by_user_id: int
-    created_at: datetime
+    start_time: UtcDatetime
+    created_at: UtcDatetime
     is_active: bool
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer("start_time", "created_at")
-    def serialize_dt(self, dt: datetime, _info) -> str:
-        # Convert to UTC and format with +00:00 instead of Z for consistency
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        # Use isoformat() and replace Z with +00:00 for consistency
-        iso_str = dt.astimezone(timezone.utc).isoformat()
-        return iso_str.replace("Z", "+00:00")
-
 class RideUpdate(RideBase):
     title: str | None = None
     description: str | None = None
@@ -76,22 +88,48 @@ class ParticipationResponse(ParticipationBase):
     id: int
     user_id: int
     ride_id: int
+    updated_at: UtcDatetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer("updated_at")
-    def serialize_dt(self, dt: datetime | None, _info) -> str | None:
-        # Convert to UTC and format with +00:00 instead of Z for consistency
-        if dt is None:
-            return None
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        # Use isoformat() and replace Z with +00:00 for consistency
-        iso_str = dt.astimezone(timezone.utc).isoformat()
-        return iso_str.replace("Z", "+00:00")
+class NearbyParticipation(ParticipationResponse):
+    distance_m: float
+
+class RideParticipant(ParticipationResponse):
+    participant: UserResponse
+
 
+#------------------------ LOCATION BATCHES
 
+# Fixes accepted per POST /participations/locations request.
+MAX_LOCATION_FIXES = 500
 
+class LocationFix(ParticipationUpdate):
+    participation_id: int
 
+class LocationBatch(BaseModel):
+    fixes: list[LocationFix] = Field(min_length=1, max_length=MAX_LOCATION_FIXES)
 
+class LocationFixResult(BaseModel):
+    participation_id: int
+    updated_at: datetime
+    status: Literal["applied", "stale", "not_found", "forbidden"]
+
+class LocationBatchResponse(BaseModel):
+    results: list[LocationFixResult]
+
+
+#------------------------ LOCATION HISTORY
+
+class TrackPoint(BaseModel):
+    recorded_at: UtcDatetime
+    latitude: float
+    longitude: float
+    fixes: int
+
+    model_config = ConfigDict(from_attributes=True)
 
+class TrackResponse(BaseModel):
+    participation_id: int
+    bucket_seconds: int
+    points: list[TrackPoint]
@@ -17,6 +17,7 @@ def create_access_token(
         *,
         subject: str,
         expires_delta: timedelta | None = None,
+        claims: dict[str, Any] | None = None,
 ) -> str:
     if expires_delta is None:
         expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -25,7 +26,8 @@ def create_access_token(
 
     to_encode: dict[str, Any] = {
         "sub": subject,
-        "exp": datetime.now(timezone.utc) + expires_delta
+        "exp": datetime.now(timezone.utc) + expires_delta,
+        **(claims or {}),
     }
 
     encoded_jwt: str = jwt.encode(
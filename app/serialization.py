@@ -0,0 +1,50 @@
+from collections.abc import Sequence
+from functools import cache
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+# Naive datetimes are UTC (see UtcDateTime in app/models.py); orjson formats
+# them with a +00:00 offset without calling back into Python.
+_OPTIONS = orjson.OPT_NAIVE_UTC
+
+
+def dumps(content: Any, *, option: int = 0) -> bytes:
+    return orjson.dumps(content, option=_OPTIONS | option)
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class: renders already-encoded content with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@cache
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    """The one `TypeAdapter(list[schema])`, built on first use."""
+    return TypeAdapter(list[schema])
+
+
+def dump_rows(rows: Sequence[Any], schema: type[BaseModel]) -> list[dict[str, Any]]:
+    """Validate ORM rows in a single call and dump them in Python mode.
+
+    Python mode skips the JSON-mode serializers, so datetimes stay datetimes
+    for orjson to format.
+    """
+    adapter = list_adapter(schema)
+    return adapter.dump_python(adapter.validate_python(rows, from_attributes=True))
+
+
+def page_response(
+        rows: Sequence[Any],
+        schema: type[BaseModel],
+        next_cursor: str | None,
+        *,
+        headers: dict[str, str] | None = None,
+) -> Response:
+    """A `Page[schema]` body, rendered here instead of by FastAPI's response_model."""
+    content = dumps({"items": dump_rows(rows, schema), "next_cursor": next_cursor})
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,61 @@
+"""Compare the sync (thread pool) and async (AsyncSession) stacks under concurrent load.
+
+    python -m benchmarks.bench_async_vs_sync --requests=2000 --concurrency=32
+
+Keep --concurrency below the anyio thread pool size (40) for the sync run: with
+the default connection pool (5 + 10 overflow) more in-flight sync requests than
+worker threads can deadlock on pool checkout.
+"""
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.config import Settings
+from app.main import create_app
+from app.models import DbModel
+from benchmarks.harness import print_table, run_concurrent, running_app, summarize
+from seed_data import seed_massive
+
+
+async def bench_mode(database_url: str, *, database_async: bool, requests: int, concurrency: int) -> dict:
+    app = create_app(Settings(database_url=database_url, database_async=database_async))
+    async with running_app(app) as client:
+        rides = (await client.get("/rides/", params={"limit": 200})).json()["items"]
+        ride_ids = [ride["id"] for ride in rides]
+
+        async def call(i: int) -> None:
+            ride_id = ride_ids[i % len(ride_ids)]
+            response = await client.get(f"/rides/{ride_id}")
+            response.raise_for_status()
+
+        await run_concurrent(call, total=min(200, requests), concurrency=concurrency)  # warm-up
+        latencies, elapsed = await run_concurrent(call, total=requests, concurrency=concurrency)
+    return summarize("async" if database_async else "sync", latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rides", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = create_engine(database_url)
+        DbModel.metadata.create_all(engine)
+        seed_massive(engine, num_users=50, num_rides=args.rides, num_participations=args.rides)
+        engine.dispose()
+
+        results = [
+            asyncio.run(bench_mode(database_url, database_async=mode, requests=args.requests, concurrency=args.concurrency))
+            for mode in (False, True)
+        ]
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
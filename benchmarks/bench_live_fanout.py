@@ -0,0 +1,84 @@
+"""Fan-out of live participation updates to many subscribers of one ride.
+
+    python -m benchmarks.bench_live_fanout --subscribers=1000 --messages=200
+
+Every message is published to one ride with `--subscribers` consumer tasks
+and timed until the last subscriber has received it. "serialize_once" is the
+LiveBroker path: the update is encoded once and shared. "serialize_per_subscriber"
+re-encodes the update in every consumer, as a per-connection
+`model_dump_json()` would. "slow_consumers" leaves half of the subscribers
+unread, so their bounded queues drop the oldest messages.
+"""
+import argparse
+import asyncio
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from app.live import LiveBroker, LiveMessage
+from app.schemas import ParticipationResponse
+from benchmarks.harness import print_table, summarize
+
+PARTICIPATION = ParticipationResponse(
+    id=1,
+    user_id=1,
+    ride_id=1,
+    latitude=48.1351,
+    longitude=11.582,
+    updated_at=datetime(2026, 1, 1, 11, 0, tzinfo=timezone.utc),
+)
+
+
+async def bench(name: str, subscribers: int, messages: int, *, serialize_each: bool, readers: int) -> dict:
+    broker = LiveBroker(queue_size=64)
+    remaining = 0
+    delivered = asyncio.Event()
+
+    async def consume(subscription) -> None:
+        nonlocal remaining
+        while (message := await subscription.next()) is not None:
+            if serialize_each:
+                PARTICIPATION.model_dump_json()
+            remaining -= 1
+            if remaining == 0:
+                delivered.set()
+
+    with ExitStack() as stack:
+        subscriptions = [stack.enter_context(broker.subscription(1)) for _ in range(subscribers)]
+        tasks = [asyncio.create_task(consume(subscription)) for subscription in subscriptions[:readers]]
+
+        latencies: list[float] = []
+        started = time.perf_counter()
+        for _ in range(messages):
+            remaining = readers
+            delivered.clear()
+            published = time.perf_counter()
+            broker.publish(1, LiveMessage.from_model("participation", PARTICIPATION))
+            await delivered.wait()
+            latencies.append(time.perf_counter() - published)
+        elapsed = time.perf_counter() - started
+
+        for subscription in subscriptions:
+            subscription.close()
+        await asyncio.gather(*tasks)
+    dropped = sum(subscription.dropped for subscription in subscriptions)
+    return {**summarize(name, latencies, elapsed), "requests": f"{messages} (dropped {dropped})"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+
+    n, m = args.subscribers, args.messages
+    results = [
+        asyncio.run(bench("serialize_once", n, m, serialize_each=False, readers=n)),
+        asyncio.run(bench("serialize_per_subscriber", n, m, serialize_each=True, readers=n)),
+        asyncio.run(bench("slow_consumers", n, m, serialize_each=False, readers=n // 2)),
+    ]
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
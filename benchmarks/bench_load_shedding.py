@@ -0,0 +1,105 @@
+"""Location updates under a flood of bulk reads, with and without lanes.
+
+    python -m benchmarks.bench_load_shedding --readers=64 --updates=300
+
+`--readers` clients loop on GET /participations/?limit=200 (the bulk lane)
+while `--writers` clients send `--updates` PUT /participations/{id} (the
+critical lane). "unlimited" sets every lane's concurrency to 0, so all
+requests compete for the same worker threads and connections; "lanes" uses
+the default lane settings. The table shows the update latencies; the bulk
+reads served and shed (503) during each run are printed above it.
+"""
+import argparse
+import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine
+
+from app.config import Settings
+from app.main import create_app
+from app.models import DbModel
+from benchmarks.harness import print_table, run_concurrent, running_app, summarize
+from seed_data import seed_massive
+
+UNLIMITED = {"lane_critical_concurrency": 0, "lane_default_concurrency": 0, "lane_bulk_concurrency": 0}
+
+
+async def _rider(client: httpx.AsyncClient) -> tuple[dict[str, str], int]:
+    """A logged-in rider with a participation to move."""
+    credentials = {"username": "bench_rider", "password": "bench_password"}
+    await client.post("/users/", json=credentials)
+    token = (await client.post("/auth/login", data=credentials)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    ride = (await client.post(
+        "/rides/", json={"title": "Bench", "start_time": datetime.now(timezone.utc).isoformat()}, headers=headers,
+    )).json()
+    participation = (await client.post("/participations/", json={"ride_code": ride["code"]}, headers=headers)).json()
+    return headers, participation["id"]
+
+
+async def bench_mode(database_url: str, *, lanes: bool, readers: int, writers: int, updates: int) -> dict:
+    settings = Settings(database_url=database_url, **({} if lanes else UNLIMITED))
+    mode = "lanes" if lanes else "unlimited"
+    served = shed = 0
+    stop = asyncio.Event()
+
+    async with running_app(create_app(settings)) as client:
+        headers, participation_id = await _rider(client)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        async def read_bulk() -> None:
+            nonlocal served, shed
+            while not stop.is_set():
+                response = await client.get("/participations/", params={"limit": 200})
+                if response.status_code == 503:
+                    shed += 1
+                    await asyncio.sleep(0.05)
+                else:
+                    response.raise_for_status()
+                    served += 1
+
+        async def update(i: int) -> None:
+            fix = {"latitude": 48.1, "longitude": 11.5, "updated_at": (start + timedelta(seconds=i)).isoformat()}
+            response = await client.put(f"/participations/{participation_id}", json=fix, headers=headers)
+            response.raise_for_status()
+
+        flood = [asyncio.create_task(read_bulk()) for _ in range(readers)]
+        await asyncio.sleep(0.5)  # let the flood build up
+        latencies, elapsed = await run_concurrent(update, total=updates, concurrency=writers)
+        stop.set()
+        await asyncio.gather(*flood)
+
+    print(f"{mode}: {served / elapsed:.1f} bulk reads/s served, {shed} shed with 503")
+    return summarize(f"update:{mode}", latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=64)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=300)
+    parser.add_argument("--participations", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = create_engine(database_url)
+        DbModel.metadata.create_all(engine)
+        seed_massive(engine, num_users=200, num_rides=100, num_participations=args.participations, seed=1,
+                     report=lambda message: None)
+        engine.dispose()
+
+        results = [
+            asyncio.run(bench_mode(
+                database_url, lanes=lanes, readers=args.readers, writers=args.writers, updates=args.updates,
+            ))
+            for lanes in (False, True)
+        ]
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Location update throughput: a write transaction per fix vs the write-behind buffer.
+
+    python -m benchmarks.bench_location_buffer --riders=50 --updates=3000
+
+`--riders` riders join one ride, then send `--updates` PUT
+/participations/{id} between them, `--concurrency` at a time. "direct"
+writes every fix in its own transaction; "write_behind" sets
+LOCATION_WRITE_BEHIND, so the fixes are written by the flush task every
+LOCATION_FLUSH_MS. `errors` counts the updates that failed, `write_tx` the
+committed transactions that wrote anything (including the final flush at
+shutdown) and `history` the rows recorded in location_history. Each mode
+runs in sync and in async (DATABASE_ASYNC) mode.
+"""
+import argparse
+import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import Engine, create_engine, event, func, select
+
+from app.config import Settings
+from app.main import create_app
+from app.models import DbModel, LocationHistoryModel
+from benchmarks.harness import SUMMARY_COLUMNS, print_table, run_concurrent, running_app, summarize
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def count_write_transactions(counts: dict[str, int], *engines: Engine) -> None:
+    def _mark_write(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE"):
+            conn.info["wrote"] = True
+
+    def _count_commit(conn) -> None:
+        if conn.info.pop("wrote", False):
+            counts["write_tx"] += 1
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _mark_write)
+        event.listen(engine, "commit", _count_commit)
+
+
+async def _riders(client: httpx.AsyncClient, riders: int) -> list[tuple[dict[str, str], int]]:
+    """Logged-in riders, each with a participation in the same ride."""
+    joined = []
+    code = None
+    for i in range(riders):
+        credentials = {"username": f"bench_rider_{i}", "password": "bench_password"}
+        await client.post("/users/", json=credentials)
+        token = (await client.post("/auth/login", data=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        if code is None:
+            code = (await client.post(
+                "/rides/", json={"title": "Bench", "start_time": START.isoformat()}, headers=headers,
+            )).json()["code"]
+        participation = (await client.post("/participations/", json={"ride_code": code}, headers=headers)).json()
+        joined.append((headers, participation["id"]))
+    return joined
+
+
+async def bench_mode(database_url: str, *, write_behind: bool, database_async: bool, riders: int,
+                     updates: int, concurrency: int, flush_ms: int) -> dict:
+    settings = Settings(
+        database_url=database_url,
+        database_async=database_async,
+        location_write_behind=write_behind,
+        location_flush_ms=flush_ms,
+    )
+    app = create_app(settings)
+    async with running_app(app) as client:
+        joined = await _riders(client, riders)
+        counts = {"errors": 0, "write_tx": 0}
+        engines = [app.state.database_engine]
+        if app.state.async_database_engine:
+            engines.append(app.state.async_database_engine.sync_engine)
+        count_write_transactions(counts, *engines)
+
+        async def update(i: int) -> None:
+            headers, participation_id = joined[i % riders]
+            fix = {
+                "latitude": 48.1 + i / 1e6,
+                "longitude": 11.5,
+                "updated_at": (START + timedelta(seconds=i // riders + 1)).isoformat(),
+            }
+            try:
+                response = await client.put(f"/participations/{participation_id}", json=fix, headers=headers)
+                response.raise_for_status()
+            except Exception:  # "database is locked" under write contention
+                counts["errors"] += 1
+
+        latencies, elapsed = await run_concurrent(update, total=updates, concurrency=concurrency)
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        history = connection.execute(select(func.count()).select_from(LocationHistoryModel)).scalar_one()
+    engine.dispose()
+
+    mode = "write_behind" if write_behind else "direct"
+    return {
+        **summarize(f"{'async' if database_async else 'sync'}:{mode}", latencies, elapsed),
+        **counts,
+        "history": history,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--riders", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--flush-ms", type=int, default=Settings.location_flush_ms)
+    args = parser.parse_args()
+
+    results = []
+    for database_async in (False, True):
+        for write_behind in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+                engine = create_engine(database_url)
+                DbModel.metadata.create_all(engine)
+                engine.dispose()
+                results.append(asyncio.run(bench_mode(
+                    database_url, write_behind=write_behind, database_async=database_async, riders=args.riders,
+                    updates=args.updates, concurrency=args.concurrency, flush_ms=args.flush_ms,
+                )))
+    print_table(results, columns=[*SUMMARY_COLUMNS, "errors", "write_tx", "history"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""GET /rides/{id} latency while a burst of logins is hashing passwords.
+
+    python -m benchmarks.bench_login_burst --reads=2000 --logins=200
+
+"quiet" measures the reads alone. "burst:hasher_pool" runs the same reads
+while `--logins` logins run concurrently, with scrypt on the dedicated
+PasswordHasher pool. "burst:anyio_pool" runs the same burst with hashing
+patched onto the shared anyio thread pool, which is where it would run
+inside a plain `def` login endpoint.
+"""
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import Settings
+from app.main import create_app
+from app.passwords import PasswordHasher
+from benchmarks.harness import print_table, run_concurrent, running_app, summarize
+
+
+async def verify_on_anyio_pool(self, password: str, stored: str) -> bool:
+    return await run_in_threadpool(self.verify, password, stored)
+
+
+async def bench(database_url: str, name: str, reads: int, logins: int) -> dict:
+    app = create_app(Settings(database_url=database_url))
+    async with running_app(app) as client:
+        credentials = {"username": "bench", "password": "bench-password"}
+        await client.post("/users/", json=credentials)
+        token = (await client.post("/auth/login", data=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        ride = await client.post(
+            "/rides/",
+            json={"title": "Bench", "start_time": "2025-06-01T10:00:00+00:00"},
+            headers=headers,
+        )
+        ride_url = f"/rides/{ride.json()['id']}"
+
+        async def read(i: int) -> None:
+            (await client.get(ride_url)).raise_for_status()
+
+        async def login(i: int) -> None:
+            (await client.post("/auth/login", data=credentials)).raise_for_status()
+
+        reading = run_concurrent(read, total=reads, concurrency=8)
+        if logins:
+            (latencies, elapsed), _ = await asyncio.gather(
+                reading, run_concurrent(login, total=logins, concurrency=32)
+            )
+        else:
+            latencies, elapsed = await reading
+    return summarize(name, latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'login_burst.db'}"
+        results.append(asyncio.run(bench(database_url, "quiet", args.reads, 0)))
+        results.append(asyncio.run(bench(database_url, "burst:hasher_pool", args.reads, args.logins)))
+        with mock.patch.object(PasswordHasher, "verify_async", verify_on_anyio_pool):
+            results.append(asyncio.run(bench(database_url, "burst:anyio_pool", args.reads, args.logins)))
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
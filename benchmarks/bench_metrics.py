@@ -0,0 +1,121 @@
+"""Overhead of the metrics middleware and query events.
+
+    python -m benchmarks.bench_metrics --requests=2000 --rounds=3
+
+Two measurements:
+
+- "asgi": the middleware around an app that only sends a 200, and the same
+  app bare, called directly `--requests` times. The difference is the
+  per-request cost of the timing, the context variable and the histogram
+  updates, with nothing else in the way.
+- "item" / "list": GET /rides/{id} (one indexed query) and GET /rides/ over
+  HTTP with METRICS_ENABLED off and on. The modes alternate for `--rounds`
+  rounds and the median round is reported, since single runs on a busy
+  machine vary by more than the overhead itself.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.config import Settings
+from app.main import create_app
+from app.metrics import Metrics, MetricsMiddleware
+from app.models import DbModel
+from benchmarks.harness import print_table, run_concurrent, running_app, summarize
+from seed_data import seed_massive
+
+PATHS = {
+    "item": lambda ride_id: f"/rides/{ride_id}",
+    "list": lambda ride_id: "/rides/?limit=50",
+}
+
+
+async def _ok_app(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _discard(message) -> None:
+    pass
+
+
+async def bench_asgi(name: str, app, requests: int) -> dict:
+    scope = {"type": "http", "method": "GET", "path": "/rides/1"}
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        call_started = time.perf_counter()
+        await app(dict(scope), None, _discard)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(name, latencies, time.perf_counter() - started)
+
+
+async def bench_http(database_url: str, *, metrics_enabled: bool, requests: int, concurrency: int) -> list[dict]:
+    app = create_app(Settings(database_url=database_url, metrics_enabled=metrics_enabled))
+    results = []
+    async with running_app(app) as client:
+        rides = (await client.get("/rides/", params={"limit": 200})).json()["items"]
+        ride_ids = [ride["id"] for ride in rides]
+
+        for name, path in PATHS.items():
+            async def call(i: int) -> None:
+                response = await client.get(path(ride_ids[i % len(ride_ids)]))
+                response.raise_for_status()
+
+            await run_concurrent(call, total=min(200, requests), concurrency=concurrency)  # warm-up
+            latencies, elapsed = await run_concurrent(call, total=requests, concurrency=concurrency)
+            results.append(summarize(f"{name}:{'metrics' if metrics_enabled else 'plain'}", latencies, elapsed))
+    return results
+
+
+def median_round(rounds: list[dict]) -> dict:
+    return sorted(rounds, key=lambda result: result["throughput_rps"])[len(rounds) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rides", type=int, default=500)
+    args = parser.parse_args()
+
+    asgi = [
+        asyncio.run(bench_asgi("asgi:plain", _ok_app, args.requests * 10)),
+        asyncio.run(bench_asgi("asgi:metrics", MetricsMiddleware(_ok_app, Metrics()), args.requests * 10)),
+    ]
+
+    rounds: dict[str, list[dict]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = create_engine(database_url)
+        DbModel.metadata.create_all(engine)
+        seed_massive(engine, num_users=50, num_rides=args.rides, num_participations=args.rides, seed=1,
+                     report=lambda message: None)
+        engine.dispose()
+
+        for _ in range(args.rounds):
+            for enabled in (False, True):
+                for result in asyncio.run(bench_http(
+                        database_url, metrics_enabled=enabled, requests=args.requests, concurrency=args.concurrency,
+                )):
+                    rounds.setdefault(result["name"], []).append(result)
+
+    http = [median_round(results) for results in rounds.values()]
+    http.sort(key=lambda result: (result["name"].split(":")[0], result["name"].endswith(":metrics")))
+    print_table(asgi + http)
+
+    per_request_us = (1 / asgi[1]["throughput_rps"] - 1 / asgi[0]["throughput_rps"]) * 1_000_000
+    print(f"middleware: {per_request_us:.1f} us per request")
+    for plain, measured in zip(http[::2], http[1::2]):
+        change = (measured["throughput_rps"] - plain["throughput_rps"]) / plain["throughput_rps"] * 100
+        print(f"{plain['name'].split(':')[0]}: {change:+.1f}% throughput with metrics (median of {args.rounds})")
+
+
+if __name__ == "__main__":
+    main()
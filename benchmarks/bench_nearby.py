@@ -0,0 +1,111 @@
+"""GET /rides/{id}/nearby latency: grid-cell index vs a brute-force scan of the ride.
+
+    python -m benchmarks.bench_nearby --sizes=10000,1000000 --requests=20
+
+One ride is pre-filled with `--sizes` participants spread over a 40 x 40 km
+square around Munich, then each strategy answers `--requests` 1 km queries at
+random points of the square. "brute_force" loads every participation of the
+ride and checks the distance in Python, the only option before the grid
+index, patched in for comparison.
+"""
+import argparse
+import asyncio
+import math
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+from sqlalchemy import create_engine, insert, select
+
+from app.config import Settings
+from app.geo import EARTH_RADIUS_M, grid_cell
+from app.main import create_app
+from app.models import DbModel, ParticipationModel, RideModel, UserModel
+from app.passwords import NO_PASSWORD
+from app.repositories import ParticipationRepository
+from benchmarks.harness import print_table, run_concurrent, running_app, summarize
+
+CENTER = (48.1351, 11.582)
+HALF_SIDE_M = 20_000
+RADIUS_M = 1_000
+
+
+def random_point(generator: random.Random) -> tuple[float, float]:
+    north = generator.uniform(-HALF_SIDE_M, HALF_SIDE_M)
+    east = generator.uniform(-HALF_SIDE_M, HALF_SIDE_M)
+    latitude = CENTER[0] + math.degrees(north / EARTH_RADIUS_M)
+    longitude = CENTER[1] + math.degrees(east / (EARTH_RADIUS_M * math.cos(math.radians(CENTER[0]))))
+    return latitude, longitude
+
+
+def prefill(database_url: str, participants: int, chunk: int = 50_000) -> None:
+    engine = create_engine(database_url)
+    DbModel.metadata.create_all(engine)
+    generator = random.Random(1)
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        connection.execute(insert(UserModel), [
+            {"id": i, "username": f"bench{i}", "password": NO_PASSWORD} for i in range(1, participants + 1)
+        ])
+        connection.execute(insert(RideModel).values(
+            id=1, code="BENCH1", title="Bench", start_time=now, created_by_user_id=1,
+        ))
+        for offset in range(0, participants, chunk):
+            rows = []
+            for i in range(offset, min(offset + chunk, participants)):
+                latitude, longitude = random_point(generator)
+                rows.append({
+                    "user_id": i + 1, "ride_id": 1, "latitude": latitude, "longitude": longitude,
+                    "updated_at": now, "grid_cell": grid_cell(latitude, longitude),
+                })
+            connection.execute(insert(ParticipationModel), rows)
+    engine.dispose()
+
+
+def whole_ride(self, *, ride_id, ranges):
+    return self.session.execute(
+        select(ParticipationModel).where(ParticipationModel.ride_id == ride_id)
+    ).scalars().all()
+
+
+async def bench(database_url: str, name: str, requests: int) -> dict:
+    app = create_app(Settings(database_url=database_url))
+    generator = random.Random(2)
+    points = [random_point(generator) for _ in range(requests)]
+    async with running_app(app) as client:
+        async def call(i: int) -> None:
+            latitude, longitude = points[i]
+            response = await client.get(
+                "/rides/1/nearby", params={"lat": latitude, "lon": longitude, "radius_m": RADIUS_M},
+            )
+            response.raise_for_status()
+
+        latencies, elapsed = await run_concurrent(call, total=requests, concurrency=1)
+    return summarize(name, latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,1000000")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(value) for value in args.sizes.split(",")):
+            database_url = f"sqlite:///{Path(tmp) / f'nearby_{size}.db'}"
+            started = time.perf_counter()
+            prefill(database_url, size)
+            print(f"prefilled {size} participants in {time.perf_counter() - started:.1f}s")
+            with mock.patch.object(ParticipationRepository, "get_in_grid_cells", whole_ride):
+                results.append(asyncio.run(bench(database_url, f"{size}:brute_force", args.requests)))
+            results.append(asyncio.run(bench(database_url, f"{size}:grid_index", args.requests)))
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
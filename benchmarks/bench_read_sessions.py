@@ -0,0 +1,117 @@
+"""Throughput of a read-heavy mix with and without the read-only sessions.
+
+    python -m benchmarks.bench_read_sessions --requests=2000 --rounds=3
+
+Nine of every ten requests are GETs (a ride, its roster, a page of rides);
+the tenth moves a participation with PUT /participations/{id}. Modes:
+
+- "shared": GET routes use the write session (get_session overridden in),
+  as before: BEGIN / COMMIT around every read and expire_on_commit on.
+- "read": the read-only session on the primary database.
+- "replica": the read-only session on DATABASE_READ_URL, a copy of the
+  seeded database, so reads and writes use separate connection pools and
+  files.
+
+Each mode runs in sync and in async (DATABASE_ASYNC) mode. The modes
+alternate for `--rounds` rounds and the median round is reported.
+"""
+import argparse
+import asyncio
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.config import Settings
+from app.injections import get_async_read_session, get_async_session, get_read_session, get_session
+from app.main import create_app
+from app.models import DbModel
+from benchmarks.bench_load_shedding import _rider
+from benchmarks.harness import print_table, run_concurrent, running_app, summarize
+from seed_data import seed_massive
+
+MODES = ("shared", "read", "replica")
+WRITE_EVERY = 10
+
+
+async def bench_mode(database_url: str, replica_url: str, *, mode: str, database_async: bool,
+                     requests: int, concurrency: int) -> dict:
+    settings = Settings(
+        database_url=database_url,
+        database_read_url=replica_url if mode == "replica" else "",
+        database_async=database_async,
+    )
+    app = create_app(settings)
+    if mode == "shared":
+        app.dependency_overrides[get_read_session] = get_session
+        app.dependency_overrides[get_async_read_session] = get_async_session
+
+    async with running_app(app) as client:
+        headers, participation_id = await _rider(client)
+        rides = (await client.get("/rides/", params={"limit": 200})).json()["items"]
+        ride_ids = [ride["id"] for ride in rides]
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        reads = (
+            lambda ride_id: f"/rides/{ride_id}",
+            lambda ride_id: f"/rides/{ride_id}/participants?limit=50",
+            lambda ride_id: "/rides/?limit=50",
+        )
+
+        async def call(i: int) -> None:
+            if i % WRITE_EVERY == 0:
+                fix = {"latitude": 48.1, "longitude": 11.5, "updated_at": (start + timedelta(seconds=i)).isoformat()}
+                response = await client.put(f"/participations/{participation_id}", json=fix, headers=headers)
+            else:
+                response = await client.get(reads[i % len(reads)](ride_ids[i % len(ride_ids)]))
+            response.raise_for_status()
+
+        await run_concurrent(call, total=min(200, requests), concurrency=concurrency)  # warm-up
+        latencies, elapsed = await run_concurrent(call, total=requests, concurrency=concurrency)
+    return summarize(f"{'async' if database_async else 'sync'}:{mode}", latencies, elapsed)
+
+
+def median_round(rounds: list[dict]) -> dict:
+    return sorted(rounds, key=lambda result: result["throughput_rps"])[len(rounds) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rides", type=int, default=500)
+    args = parser.parse_args()
+
+    rounds: dict[str, list[dict]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = create_engine(database_url)
+        DbModel.metadata.create_all(engine)
+        seed_massive(engine, num_users=50, num_rides=args.rides, num_participations=args.rides * 4, seed=1,
+                     report=lambda message: None)
+        engine.dispose()
+        shutil.copy(Path(tmp) / "bench.db", Path(tmp) / "replica.db")
+        replica_url = f"sqlite:///{Path(tmp) / 'replica.db'}"
+
+        for _ in range(args.rounds):
+            for database_async in (False, True):
+                for mode in MODES:
+                    result = asyncio.run(bench_mode(
+                        database_url, replica_url, mode=mode, database_async=database_async,
+                        requests=args.requests, concurrency=args.concurrency,
+                    ))
+                    rounds.setdefault(result["name"], []).append(result)
+
+    results = [median_round(results) for results in rounds.values()]
+    print_table(results)
+
+    for shared, *others in (results[:len(MODES)], results[len(MODES):]):
+        for measured in others:
+            change = (measured["throughput_rps"] - shared["throughput_rps"]) / shared["throughput_rps"] * 100
+            print(f"{measured['name']}: {change:+.1f}% throughput over {shared['name']} (median of {args.rounds})")
+
+
+if __name__ == "__main__":
+    main()
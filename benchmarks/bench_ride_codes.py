@@ -0,0 +1,105 @@
+"""POST /rides/ latency with many existing rides: SELECT-per-candidate vs insert-on-conflict.
+
+    python -m benchmarks.bench_ride_codes --sizes=10000,1000000,10000000 --requests=500
+
+The rides table is pre-filled with distinct pseudo-random codes, then each
+strategy creates `--requests` rides through the API. "select_then_insert" is
+the previous RideRepository behaviour, patched in for comparison.
+"""
+import argparse
+import asyncio
+import string
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+from sqlalchemy import create_engine, insert, select
+
+from app.config import Settings
+from app.main import create_app
+from app.models import DbModel, RideModel, UserModel
+from app.repositories import RideRepository
+from benchmarks.harness import print_table, run_concurrent, running_app, summarize
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_SPACE = len(ALPHABET) ** 6
+# Odd and not divisible by 3, hence coprime with 36**6: i -> i * STEP is a permutation.
+STEP = 1_000_003
+
+
+def code_for(i: int) -> str:
+    value = (i * STEP) % CODE_SPACE
+    chars = []
+    for _ in range(6):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return "".join(chars)
+
+
+def prefill(database_url: str, rides: int, chunk: int = 50_000) -> None:
+    engine = create_engine(database_url)
+    DbModel.metadata.create_all(engine)
+    start_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        connection.execute(insert(UserModel).values(id=1, username="bench", password="bench"))
+        for offset in range(0, rides, chunk):
+            connection.execute(insert(RideModel), [
+                {"code": code_for(i), "title": "Bench", "start_time": start_time, "created_by_user_id": 1}
+                for i in range(offset, min(offset + chunk, rides))
+            ])
+    engine.dispose()
+
+
+def select_then_insert(self, *, title, description, start_time, created_by_user_id):
+    while True:
+        code = self._generate_string_code()
+        if self.session.execute(select(RideModel).where(RideModel.code == code)).scalar_one_or_none() is None:
+            break
+    ride = RideModel(
+        code=code, title=title, description=description,
+        start_time=start_time, created_by_user_id=created_by_user_id,
+    )
+    self.session.add(ride)
+    self.session.flush()
+    return ride
+
+
+async def bench(database_url: str, name: str, requests: int) -> dict:
+    app = create_app(Settings(database_url=database_url))
+    async with running_app(app) as client:
+        token = (await client.post("/auth/login", data={"username": "bench", "password": "bench"})).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        payload = {"title": "Bench", "start_time": "2025-06-01T10:00:00+00:00"}
+
+        async def call(i: int) -> None:
+            response = await client.post("/rides/", json=payload, headers=headers)
+            response.raise_for_status()
+
+        latencies, elapsed = await run_concurrent(call, total=requests, concurrency=1)
+    return summarize(name, latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,1000000,10000000")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(value) for value in args.sizes.split(",")):
+            database_url = f"sqlite:///{Path(tmp) / f'rides_{size}.db'}"
+            started = time.perf_counter()
+            prefill(database_url, size)
+            print(f"prefilled {size} rides in {time.perf_counter() - started:.1f}s")
+            with mock.patch.object(RideRepository, "create_ride", select_then_insert):
+                results.append(asyncio.run(bench(database_url, f"{size}:select_then_insert", args.requests)))
+            results.append(asyncio.run(bench(database_url, f"{size}:insert_on_conflict", args.requests)))
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Serializing a page of rides: per-row models vs one TypeAdapter and orjson.
+
+    python -m benchmarks.bench_serialization --rides=10000 --repeat=20
+
+The rides are loaded once from a temporary database, then each strategy turns
+the same ORM rows into the JSON body of GET /rides/ `--repeat` times.
+"per_row" is the path before app/serialization.py: a model_validate per ride,
+the Page validated again as the response_model and dumped in JSON mode, with
+datetimes formatted by a Python field_serializer. "type_adapter" is
+app.serialization.page_response.
+"""
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pydantic import TypeAdapter, field_serializer
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import DbModel, RideModel, UserModel
+from app.schemas import Page, RideResponse
+from app.serialization import page_response
+from benchmarks.harness import print_table, summarize
+
+
+class LegacyRideResponse(RideResponse):
+    @field_serializer("start_time", "created_at")
+    def serialize_dt(self, dt: datetime, _info) -> str:
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc).isoformat().replace("Z", "+00:00")
+
+
+_legacy_page = TypeAdapter(Page[LegacyRideResponse])
+
+
+def per_row(rides: list[RideModel]) -> bytes:
+    page = Page[LegacyRideResponse](
+        items=[LegacyRideResponse.model_validate(ride) for ride in rides],
+        next_cursor=None,
+    )
+    return _legacy_page.dump_json(_legacy_page.validate_python(page))
+
+
+def type_adapter(rides: list[RideModel]) -> bytes:
+    return page_response(rides, RideResponse, None).body
+
+
+def load_rides(database_url: str, count: int) -> list[RideModel]:
+    engine = create_engine(database_url)
+    DbModel.metadata.create_all(engine)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel).values(id=1, username="bench", password="bench"))
+        connection.execute(insert(RideModel), [
+            {"code": f"B{i:05d}", "title": f"Ride {i}", "description": "Bench ride",
+             "start_time": start + timedelta(minutes=i), "created_by_user_id": 1}
+            for i in range(count)
+        ])
+    with Session(engine) as session:
+        rides = list(session.execute(select(RideModel).order_by(RideModel.id)).scalars())
+        session.expunge_all()
+    engine.dispose()
+    return rides
+
+
+def bench(name: str, strategy, rides: list[RideModel], repeat: int) -> dict:
+    strategy(rides)  # warm up the schema caches
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        strategy(rides)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(name, latencies, time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rides", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rides = load_rides(f"sqlite:///{Path(tmp) / 'serialization.db'}", args.rides)
+    assert per_row(rides) == type_adapter(rides), "strategies disagree"
+    print_table([
+        bench(f"{args.rides}:per_row", per_row, rides, args.repeat),
+        bench(f"{args.rides}:type_adapter", type_adapter, rides, args.repeat),
+    ])
+
+
+if __name__ == "__main__":
+    main()
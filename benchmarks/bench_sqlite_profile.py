@@ -0,0 +1,107 @@
+"""Mixed read/write throughput: default SQLite engine vs the tuned engine profile.
+
+    python -m benchmarks.bench_sqlite_profile --seconds=5 --readers=8 --writers=4
+
+"before" is a bare create_engine(url) (rollback journal, no busy timeout);
+"after" is app.database.create_database_engine with the default Settings.
+Writers update one participation's position per transaction, readers fetch
+participations by primary key. Lock errors are counted, not retried.
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import Engine, create_engine, select, update
+from sqlalchemy.exc import OperationalError
+
+from app.config import Settings
+from app.database import create_database_engine
+from app.models import DbModel, ParticipationModel
+from seed_data import seed_massive
+
+
+def run_mixed_load(engine: Engine, *, seconds: float, readers: int, writers: int, ids: list[int]) -> dict:
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader() -> None:
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.connect() as connection:
+                    connection.execute(
+                        select(ParticipationModel).where(ParticipationModel.id == random.choice(ids))
+                    ).one()
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts["reads"] += done
+            counts["errors"] += errors
+
+    def writer() -> None:
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        update(ParticipationModel)
+                        .where(ParticipationModel.id == random.choice(ids))
+                        .values(latitude=48.0 + random.random(), longitude=11.0 + random.random())
+                    )
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "reads_per_s": round(counts["reads"] / seconds, 1),
+        "writes_per_s": round(counts["writes"] / seconds, 1),
+        "lock_errors": counts["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--participations", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for profile in ("before", "after"):
+            database_url = f"sqlite:///{Path(tmp) / f'{profile}.db'}"
+            settings = Settings(
+                database_url=database_url,
+                database_pool_size=args.readers + args.writers,
+            )
+            engine = create_engine(database_url) if profile == "before" else create_database_engine(settings)
+            DbModel.metadata.create_all(engine)
+            seed_massive(engine, num_users=100, num_rides=100, num_participations=args.participations)
+            with engine.connect() as connection:
+                ids = list(connection.execute(select(ParticipationModel.id)).scalars())
+            results[profile] = run_mixed_load(
+                engine, seconds=args.seconds, readers=args.readers, writers=args.writers, ids=ids
+            )
+            engine.dispose()
+
+    for profile, result in results.items():
+        print(f"{profile:<7} {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Wall time of the pytest suite with 0..N pytest-xdist workers.
+
+    python -m benchmarks.bench_test_suite --workers=0,1,2,4 --repeat=3
+
+Each worker count runs the whole suite `--repeat` times in a fresh
+interpreter. "0" is a plain run without xdist; the speedup column compares
+every row with it. Arguments after `--` are passed on to pytest, e.g.
+`-- tests/ -k rides`. Every worker has its own in-memory database (see
+tests/conftest.py), so the runs need no setup or cleanup in between.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import print_table
+
+COLUMNS = ["workers", "cpus", "runs", "mean_s", "best_s", "speedup"]
+DEFAULT_PYTEST_ARGS = ["--ignore=tests/test_operate_with_ride.py"]
+
+
+def run_suite(workers: int, pytest_args: list[str]) -> float:
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-n", str(workers), *pytest_args]
+    started = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        sys.exit(f"pytest -n {workers} failed:\n{completed.stdout[-2000:]}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="0,1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("pytest_args", nargs="*", default=DEFAULT_PYTEST_ARGS)
+    args = parser.parse_args()
+
+    rows = []
+    baseline = None
+    for workers in (int(count) for count in args.workers.split(",")):
+        timings = [run_suite(workers, args.pytest_args) for _ in range(args.repeat)]
+        mean = statistics.fmean(timings)
+        baseline = baseline or mean
+        rows.append({
+            "workers": workers,
+            "cpus": os.cpu_count(),
+            "runs": len(timings),
+            "mean_s": round(mean, 2),
+            "best_s": round(min(timings), 2),
+            "speedup": round(baseline / mean, 2),
+        })
+        print(f"-n {workers}: {mean:.2f}s", file=sys.stderr)
+    print_table(rows, COLUMNS)
+
+
+if __name__ == "__main__":
+    main()
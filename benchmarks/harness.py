@@ -0,0 +1,71 @@
+import asyncio
+import statistics
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import FastAPI
+
+
+@asynccontextmanager
+async def running_app(app: FastAPI) -> AsyncGenerator[httpx.AsyncClient]:
+    """Run the app lifespan and yield an in-process ASGI client."""
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: list[float], elapsed: float) -> dict[str, float | str | int]:
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_concurrent(
+    call: Callable[[int], Awaitable[object]],
+    *,
+    total: int,
+    concurrency: int,
+) -> tuple[list[float], float]:
+    """Run `call(i)` for i in range(total) with at most `concurrency` in flight.
+
+    Returns the per-call latencies in seconds and the total wall time.
+    """
+    latencies: list[float] = []
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        for i in counter:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+SUMMARY_COLUMNS = ["name", "requests", "throughput_rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def print_table(results: list[dict[str, float | str | int]], columns: list[str] = SUMMARY_COLUMNS) -> None:
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in results:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
@@ -0,0 +1,463 @@
+"""Every endpoint of app/routers.py against a seeded dataset, with saved baselines.
+
+    python -m benchmarks.suite run --users=1000 --rides=2000 --participations=20000 \\
+        --requests=200 --concurrency=8 --save=benchmarks/results/baseline.json
+    # ... change something ...
+    python -m benchmarks.suite run --save=benchmarks/results/latest.json
+    python -m benchmarks.suite compare benchmarks/results/baseline.json benchmarks/results/latest.json
+
+`run` seeds a temporary database with seed_data.seed_massive plus the rows the
+write scenarios consume (rides to delete or join, users to revoke), then drives
+one scenario per endpoint through an in-process ASGI client and prints its
+throughput and p50/p95/p99 latency. `--save` writes the results as JSON.
+
+`compare` flags every endpoint whose p95 latency rose, or whose throughput fell,
+by more than `--threshold` (default 0.15, i.e. 15%) and exits with status 1 if
+there is one. Baselines are machine-specific: compare runs made on the same
+machine with the same arguments.
+
+The live streams (`GET /rides/{id}/live` and its WebSocket) never complete and
+are left out.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+from sqlalchemy import create_engine, insert, select
+
+from app import routers
+from app.config import Settings
+from app.geo import grid_cell
+from app.main import create_app
+from app.models import DbModel, ParticipationModel, RideModel, UserModel
+from benchmarks.harness import print_table, run_concurrent, running_app, summarize
+from seed_data import hash_password, random_coordinates, seed_massive
+
+# Prefixes as mounted by app.main.create_app.
+ROUTERS: dict[str, APIRouter] = {
+    "/users": routers.user_router,
+    "/auth": routers.auth_router,
+    "/rides": routers.ride_router,
+    "/participations": routers.participation_router,
+}
+EXCLUDED = {("GET", "/rides/{id}/live")}
+
+FIXED_USER = ("vadim", "123456")  # created by seed_massive
+REVOKE_USERS = 20  # each costs a login (one scrypt hash) during setup
+OWN_PARTICIPATIONS = 10
+SAMPLE_SIZE = 10_000
+DEFAULT_THRESHOLD = 0.15
+# Run arguments that must match for a comparison to mean anything.
+COMPARABLE = ("users", "rides", "participations", "requests", "concurrency", "seed")
+CENTER = (48.6, 11.6)  # middle of seed_data.random_coordinates
+
+
+@dataclass
+class Dataset:
+    """Ids the scenarios pick from, plus the rows the write scenarios use up."""
+    user_ids: list[int]
+    ride_ids: list[int]
+    ride_codes: list[str]
+    participation_ids: list[int]
+    own_ride_id: int
+    own_participation_ids: list[int]
+    deletable_ride_ids: list[int]
+    joinable_ride_codes: list[str]
+    revocable_usernames: list[str]
+    headers: dict[str, str] = field(default_factory=dict)
+    revoke_headers: list[dict[str, str]] = field(default_factory=list)
+
+
+Call = Callable[[httpx.AsyncClient, Dataset, int], Awaitable[httpx.Response]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    method: str
+    path: str
+    call: Call
+    max_requests: int | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+SCENARIOS: list[Scenario] = []
+
+
+def scenario(method: str, path: str, *, max_requests: int | None = None) -> Callable[[Call], Call]:
+    def register(call: Call) -> Call:
+        SCENARIOS.append(Scenario(method, path, call, max_requests))
+        return call
+    return register
+
+
+def uncovered_routes() -> set[tuple[str, str]]:
+    """Routes of app/routers.py that have neither a scenario nor an exclusion."""
+    routes = {
+        (method, prefix + route.path)
+        for prefix, router in ROUTERS.items()
+        for route in router.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    return routes - EXCLUDED - {(s.method, s.path) for s in SCENARIOS}
+
+
+def pick(values: list, i: int):
+    return values[i % len(values)]
+
+
+def timestamp(seconds: int) -> str:
+    return (datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=seconds)).isoformat()
+
+
+# ------------- SCENARIOS ------------- #
+
+@scenario("POST", "/users/")
+async def _(client, data, i):
+    return await client.post("/users/", json={"username": f"suite_{i}", "password": "password"})
+
+@scenario("GET", "/users/{id}")
+async def _(client, data, i):
+    return await client.get(f"/users/{pick(data.user_ids, i)}")
+
+@scenario("GET", "/users/")
+async def _(client, data, i):
+    return await client.get("/users/")
+
+@scenario("POST", "/auth/login")
+async def _(client, data, i):
+    username, password = FIXED_USER
+    return await client.post("/auth/login", data={"username": username, "password": password})
+
+@scenario("GET", "/auth/me")
+async def _(client, data, i):
+    return await client.get("/auth/me", headers=data.headers)
+
+@scenario("POST", "/auth/revoke", max_requests=REVOKE_USERS)
+async def _(client, data, i):
+    return await client.post("/auth/revoke", headers=data.revoke_headers[i])
+
+@scenario("POST", "/rides/")
+async def _(client, data, i):
+    return await client.post(
+        "/rides/", json={"title": f"Suite {i}", "start_time": timestamp(i)}, headers=data.headers,
+    )
+
+@scenario("GET", "/rides/")
+async def _(client, data, i):
+    return await client.get("/rides/")
+
+@scenario("GET", "/rides/export")
+async def _(client, data, i):
+    return await client.get("/rides/export")
+
+@scenario("GET", "/rides/code/{code}")
+async def _(client, data, i):
+    return await client.get(f"/rides/code/{pick(data.ride_codes, i)}")
+
+@scenario("GET", "/rides/{id}")
+async def _(client, data, i):
+    return await client.get(f"/rides/{pick(data.ride_ids, i)}")
+
+@scenario("GET", "/rides/{id}/participants")
+async def _(client, data, i):
+    return await client.get(f"/rides/{pick(data.ride_ids, i)}/participants")
+
+@scenario("GET", "/rides/{id}/nearby")
+async def _(client, data, i):
+    latitude, longitude = random_coordinates()
+    return await client.get(
+        f"/rides/{pick(data.ride_ids, i)}/nearby",
+        params={"lat": latitude, "lon": longitude, "radius_m": 5_000},
+    )
+
+@scenario("PUT", "/rides/{id}")
+async def _(client, data, i):
+    return await client.put(f"/rides/{data.own_ride_id}", json={"title": f"Own {i}"}, headers=data.headers)
+
+@scenario("DELETE", "/rides/{id}")
+async def _(client, data, i):
+    return await client.delete(f"/rides/{data.deletable_ride_ids[i]}", headers=data.headers)
+
+@scenario("GET", "/participations/")
+async def _(client, data, i):
+    return await client.get("/participations/")
+
+@scenario("GET", "/participations/export")
+async def _(client, data, i):
+    return await client.get("/participations/export")
+
+@scenario("POST", "/participations/")
+async def _(client, data, i):
+    return await client.post(
+        "/participations/", json={"ride_code": data.joinable_ride_codes[i]}, headers=data.headers,
+    )
+
+@scenario("POST", "/participations/locations")
+async def _(client, data, i):
+    fixes = [
+        {"participation_id": participation_id, "latitude": CENTER[0], "longitude": CENTER[1],
+         "updated_at": timestamp(1_000_000 + i)}
+        for participation_id in data.own_participation_ids
+    ]
+    return await client.post("/participations/locations", json={"fixes": fixes}, headers=data.headers)
+
+@scenario("GET", "/participations/{id}")
+async def _(client, data, i):
+    return await client.get(f"/participations/{pick(data.participation_ids, i)}")
+
+@scenario("GET", "/participations/{id}/track")
+async def _(client, data, i):
+    return await client.get(f"/participations/{pick(data.own_participation_ids, i)}/track")
+
+@scenario("PUT", "/participations/{id}")
+async def _(client, data, i):
+    return await client.put(
+        f"/participations/{pick(data.own_participation_ids, i)}",
+        json={"latitude": CENTER[0], "longitude": CENTER[1], "updated_at": timestamp(i)},
+        headers=data.headers,
+    )
+
+
+# ------------- DATASET ------------- #
+
+def _insert_rides(connection, prefix: str, count: int, creator_id: int) -> list[tuple[int, str]]:
+    # Lowercase codes cannot collide with seeded or generated (uppercase) ones.
+    start = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    rows = [
+        {"code": f"{prefix}{i:05d}", "title": f"Suite {prefix}{i}", "start_time": start + timedelta(hours=i),
+         "created_by_user_id": creator_id}
+        for i in range(count)
+    ]
+    if not rows:
+        return []
+    connection.execute(insert(RideModel), rows)
+    return list(connection.execute(
+        select(RideModel.id, RideModel.code)
+        .where(RideModel.code.in_([row["code"] for row in rows]))
+        .order_by(RideModel.id)
+    ))
+
+
+def build_dataset(
+        database_url: str,
+        *,
+        users: int,
+        rides: int,
+        participations: int,
+        requests: int,
+        seed: int = 1,
+) -> Dataset:
+    engine = create_engine(database_url)
+    DbModel.metadata.create_all(engine)
+    seed_massive(engine, users, rides, participations, seed=seed)
+    with engine.begin() as connection:
+        owner_id = connection.execute(select(UserModel.id).where(UserModel.username == FIXED_USER[0])).scalar_one()
+        sample = lambda statement: list(connection.execute(statement.limit(SAMPLE_SIZE)))
+
+        ride_rows = sample(select(RideModel.id, RideModel.code).order_by(RideModel.id))
+        data = Dataset(
+            user_ids=[row[0] for row in sample(select(UserModel.id).order_by(UserModel.id))],
+            ride_ids=[ride_id for ride_id, _ in ride_rows],
+            ride_codes=[code for _, code in ride_rows],
+            participation_ids=[row[0] for row in sample(select(ParticipationModel.id).order_by(ParticipationModel.id))],
+            own_ride_id=_insert_rides(connection, "o", 1, owner_id)[0][0],
+            own_participation_ids=[],
+            deletable_ride_ids=[ride_id for ride_id, _ in _insert_rides(connection, "d", requests, owner_id)],
+            joinable_ride_codes=[code for _, code in _insert_rides(connection, "j", requests, owner_id)],
+            revocable_usernames=[f"revoke_{i}" for i in range(min(requests, REVOKE_USERS))],
+        )
+
+        now = datetime.now(timezone.utc)
+        joined = _insert_rides(connection, "p", OWN_PARTICIPATIONS, owner_id)
+        connection.execute(insert(ParticipationModel), [
+            {"user_id": owner_id, "ride_id": ride_id, "latitude": CENTER[0], "longitude": CENTER[1],
+             "updated_at": now, "grid_cell": grid_cell(*CENTER)}
+            for ride_id, _ in joined
+        ])
+        data.own_participation_ids = list(connection.execute(
+            select(ParticipationModel.id)
+            .where(ParticipationModel.ride_id.in_([ride_id for ride_id, _ in joined]))
+            .order_by(ParticipationModel.id)
+        ).scalars())
+
+        if data.revocable_usernames:
+            password = hash_password(FIXED_USER[1])
+            connection.execute(insert(UserModel), [
+                {"username": username, "password": password} for username in data.revocable_usernames
+            ])
+    engine.dispose()
+    return data
+
+
+async def _login(client: httpx.AsyncClient, username: str) -> dict[str, str]:
+    response = await client.post("/auth/login", data={"username": username, "password": FIXED_USER[1]})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+# ------------- RUN / COMPARE ------------- #
+
+async def run_scenarios(
+        database_url: str,
+        data: Dataset,
+        *,
+        requests: int,
+        concurrency: int,
+        only: set[str] | None = None,
+) -> list[dict]:
+    app = create_app(Settings(database_url=database_url))
+    results = []
+    async with running_app(app) as client:
+        data.headers = await _login(client, FIXED_USER[0])
+        data.revoke_headers = [await _login(client, username) for username in data.revocable_usernames]
+        for item in SCENARIOS:
+            if only and item.name not in only:
+                continue
+
+            async def call(i: int, item: Scenario = item) -> None:
+                response = await item.call(client, data, i)
+                if response.is_error:
+                    raise RuntimeError(f"{item.name}: {response.status_code} {response.text[:200]}")
+
+            total = min(requests, item.max_requests or requests)
+            latencies, elapsed = await run_concurrent(call, total=total, concurrency=concurrency)
+            results.append(summarize(item.name, latencies, elapsed))
+    return results
+
+
+def run_suite(
+        database_url: str,
+        *,
+        users: int,
+        rides: int,
+        participations: int,
+        requests: int,
+        concurrency: int,
+        seed: int = 1,
+        only: set[str] | None = None,
+) -> dict:
+    random.seed(seed)
+    started = time.perf_counter()
+    data = build_dataset(
+        database_url, users=users, rides=rides, participations=participations, requests=requests, seed=seed,
+    )
+    print(f"seeded in {time.perf_counter() - started:.1f}s")
+    results = asyncio.run(run_scenarios(
+        database_url, data, requests=requests, concurrency=concurrency, only=only,
+    ))
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "users": users,
+            "rides": rides,
+            "participations": participations,
+            "requests": requests,
+            "concurrency": concurrency,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, *, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """One row per endpoint present in both runs; `regressed` marks the ones past `threshold`."""
+    before = {result["name"]: result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        base = before.get(result["name"])
+        if base is None:
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rps_change = result["throughput_rps"] / base["throughput_rps"] - 1 if base["throughput_rps"] else 0.0
+        rows.append({
+            "name": result["name"],
+            "base_p95_ms": base["p95_ms"],
+            "p95_ms": result["p95_ms"],
+            "p95_change": f"{p95_change:+.1%}",
+            "base_rps": base["throughput_rps"],
+            "rps": result["throughput_rps"],
+            "rps_change": f"{rps_change:+.1%}",
+            "regressed": p95_change > threshold or rps_change < -threshold,
+        })
+    return rows
+
+
+def print_comparison(rows: list[dict]) -> None:
+    columns = ["name", "base_p95_ms", "p95_ms", "p95_change", "base_rps", "rps", "rps_change", "regressed"]
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="seed a dataset and benchmark every endpoint")
+    run.add_argument("--users", type=int, default=1_000)
+    run.add_argument("--rides", type=int, default=2_000)
+    run.add_argument("--participations", type=int, default=20_000)
+    run.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--only", action="append", help='e.g. --only "GET /rides/"; repeatable')
+    run.add_argument("--save", type=Path, help="write the results as a JSON baseline")
+
+    diff = commands.add_parser("compare", help="flag regressions of CURRENT against BASELINE")
+    diff.add_argument("baseline", type=Path)
+    diff.add_argument("current", type=Path)
+    diff.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        baseline, current = json.loads(args.baseline.read_text()), json.loads(args.current.read_text())
+        for key in COMPARABLE:
+            if baseline["meta"][key] != current["meta"][key]:
+                print(f"warning: {key} differs ({baseline['meta'][key]} vs {current['meta'][key]})")
+        rows = compare(baseline, current, threshold=args.threshold)
+        print_comparison(rows)
+        regressions = [row["name"] for row in rows if row["regressed"]]
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = run_suite(
+            f"sqlite:///{Path(tmp) / 'suite.db'}",
+            users=args.users,
+            rides=args.rides,
+            participations=args.participations,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            seed=args.seed,
+            only=set(args.only) if args.only else None,
+        )
+    print_table(report["results"])
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2))
+        print(f"saved {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,40 @@
 import sys
 import random
 import string
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from app.config import Settings
+from app.geo import grid_cell
 from app.models import DbModel, UserModel, RideModel, ParticipationModel
+from app.passwords import NO_PASSWORD, PasswordHasher
 
 
 
 
 
+def hash_password(password):
+    settings = Settings.from_env()
+    hasher = PasswordHasher(
+        n=settings.password_scrypt_n,
+        r=settings.password_scrypt_r,
+        p=settings.password_scrypt_p,
+    )
+    try:
+        return hasher.hash(password)
+    finally:
+        hasher.shutdown()
+
+
 def seed(engine):
     with Session(engine) as session:
         print("🌱 Running default seed...")
@@ -19,7 +42,7 @@ def seed(engine):
         # Fixed user Vadim
         vadim = session.query(UserModel).filter_by(username="vadim").first()
         if not vadim:
-            vadim = UserModel(username="vadim", password="123456")
+            vadim = UserModel(username="vadim", password=hash_password("123456"))
             session.add(vadim)
             session.flush()
             print("👤 Created fixed user: vadim / 123456")
@@ -55,6 +78,7 @@ def seed(engine):
                 latitude=48.1351,
                 longitude=11.5820,
                 updated_at=datetime.now(timezone.utc),
+                grid_cell=grid_cell(48.1351, 11.5820),
             )
             session.add(part)
             print("📍 Created demo participation")
@@ -107,71 +131,362 @@ def reset_db(engine):
 
 
 # ------------------------------
-# Seed function
+# Bulk seeding
 # ------------------------------
-def seed_massive(engine, num_users=10, num_rides=20, num_participations=50):
+# Rows per executemany / commit.
+SEED_CHUNK_SIZE = 50_000
+
+# Seeded ride codes are a bijection of the ride id over the 36**6 code space,
+# so they are unique among themselves without a lookup per ride. The
+# multiplier is coprime with 36. Rides created through the API have random
+# codes, which a seeded code can hit; the ride load redraws those.
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CODE_SPACE = len(CODE_ALPHABET) ** 6
+CODE_MULTIPLIER = 1_000_000_007
+CODE_OFFSET = 12_345_678
+
+SEED_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SEED_YEAR_SECONDS = 365 * 24 * 3600
+# How SQLAlchemy stores DateTime on SQLite; seeded rows are pre-formatted so
+# that executemany goes straight to the driver.
+SQLITE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Generated columns, in the order of the compiled INSERT. Every column with a
+# Python-side default is listed, since the driver-level executemany does not
+# apply them.
+USER_COLUMNS = ("id", "username", "password", "token_version")
+RIDE_COLUMNS = ("id", "code", "title", "description", "start_time", "created_by_user_id", "is_active", "version")
+PARTICIPATION_COLUMNS = ("id", "user_id", "ride_id", "latitude", "longitude", "updated_at", "grid_cell", "version")
+
+# Per-connection pragmas for the duration of a load; restored afterwards.
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -256_000,
+    "foreign_keys": "OFF",
+}
+
+
+def random_ride_code(rng):
+    """A code for a seeded ride whose seeded_ride_code an API-created ride already has."""
+    return "".join(rng.choices(CODE_ALPHABET, k=6))
+
+
+def seeded_ride_code(ride_id):
+    n = (ride_id * CODE_MULTIPLIER + CODE_OFFSET) % CODE_SPACE
+    chars = []
+    for _ in range(6):
+        n, digit = divmod(n, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[digit])
+    return "".join(chars)
+
+
+@dataclass(frozen=True)
+class UserPool:
+    """Users a seeded row may refer to: the fixed user, then the new ones.
+
+    Index i is drawn as size * u**skew for a uniform u; skew 1 is uniform,
+    skew 3 gives the first 10% of the users about 46% of the picks
+    (0.1 ** (1/3)).
+    """
+    fixed_user_id: int
+    first_user_id: int
+    size: int
+    skew: float = 1.0
+
+    def user_id(self, index):
+        return self.fixed_user_id if index == 0 else self.first_user_id + index - 1
+
+    def pick(self, rng):
+        return self.user_id(int(self.size * rng.random() ** self.skew))
+
+    def pick_distinct(self, rng, count):
+        if self.skew == 1.0 or count * 2 > self.size:
+            return [self.user_id(index) for index in rng.sample(range(self.size), count)]
+        chosen = set()
+        while len(chosen) < count:
+            chosen.add(self.pick(rng))
+        return list(chosen)
+
+
+@dataclass(frozen=True)
+class ParticipationChunk:
+    """Participations of the rides first_ride_id, first_ride_id + 1, ..."""
+    seed: int
+    first_id: int
+    first_ride_id: int
+    riders: tuple
+    users: UserPool
+    sqlite: bool
+
+
+_SEED_DAYS = [(SEED_EPOCH + timedelta(days=day)).strftime("%Y-%m-%d") for day in range(SEED_YEAR_SECONDS // 86400)]
+
+
+def _random_time(rng, sqlite):
+    seconds = rng.randrange(SEED_YEAR_SECONDS)
+    if not sqlite:
+        return SEED_EPOCH + timedelta(seconds=seconds)
+    # Same text as strftime(SQLITE_TIME_FORMAT), several times faster.
+    day, seconds = divmod(seconds, 86400)
+    hour, seconds = divmod(seconds, 3600)
+    minute, second = divmod(seconds, 60)
+    return f"{_SEED_DAYS[day]} {hour:02d}:{minute:02d}:{second:02d}.000000"
+
+
+def _user_rows(first_id, count, rng):
+    return [
+        (user_id, f"user_{user_id}", f"{NO_PASSWORD}{rng.getrandbits(64):016x}", 0)
+        for user_id in range(first_id, first_id + count)
+    ]
+
+
+def _ride_rows(first_id, count, users, rng, sqlite):
+    return [
+        (
+            ride_id, seeded_ride_code(ride_id), f"Ride {ride_id}", "Auto-generated ride",
+            _random_time(rng, sqlite), users.pick(rng), True, 1,
+        )
+        for ride_id in range(first_id, first_id + count)
+    ]
+
+
+def participation_rows(chunk):
+    """Generate one chunk; runs in a worker process when seeding with workers > 1."""
+    rng = random.Random(chunk.seed)
+    rows = []
+    participation_id = chunk.first_id
+    for offset, count in enumerate(chunk.riders):
+        ride_id = chunk.first_ride_id + offset
+        for user_id in chunk.users.pick_distinct(rng, count):
+            lat = 48.0 + rng.random() * 1.2
+            lon = 11.0 + rng.random() * 1.2
+            rows.append((
+                participation_id, user_id, ride_id, lat, lon,
+                _random_time(rng, chunk.sqlite), grid_cell(lat, lon), 1,
+            ))
+            participation_id += 1
+    return rows
+
+
+def riders_per_ride(num_rides, num_participations, max_riders, hot_rides, hot_ride_riders, rng):
+    """Participation count of every ride: the hot ones first, the rest spread evenly."""
+    riders = [0] * num_rides
+    remaining = min(num_participations, num_rides * max_riders)
+    hot = min(hot_rides, num_rides)
+    for index in range(hot):
+        riders[index] = min(hot_ride_riders, max_riders, remaining)
+        remaining -= riders[index]
+    cold = num_rides - hot
+    if cold:
+        remaining = min(remaining, cold * max_riders)
+        base, extra = divmod(remaining, cold)
+        for index in range(hot, num_rides):
+            riders[index] = base
+        for index in rng.sample(range(hot, num_rides), extra):
+            riders[index] += 1
+    return riders
+
+
+def _participation_chunks(riders, first_id, first_ride_id, users, chunk_size, seed, sqlite):
+    start = 0
+    while start < len(riders):
+        end, rows = start, 0
+        while end < len(riders) and (rows < chunk_size or end == start):
+            rows += riders[end]
+            end += 1
+        yield ParticipationChunk(
+            seed + start, first_id, first_ride_id + start, tuple(riders[start:end]), users, sqlite,
+        )
+        first_id += rows
+        start = end
+
+
+def _generate(chunks, workers):
+    """Yield participation_rows(chunk) in order, generating up to 2 * workers ahead."""
+    if workers <= 1:
+        yield from map(participation_rows, chunks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(participation_rows, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class LoadProgress:
+    def __init__(self, name, total, report):
+        self.name, self.total, self.report = name, total, report
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def rate(self):
+        return self.done / max(time.perf_counter() - self.started, 1e-9)
+
+    def advance(self, rows):
+        self.done += rows
+        self.report(f"   {self.name}: {self.done:,}/{self.total:,} ({self.done / max(self.total, 1):.0%}), "
+                    f"{self.rate():,.0f} rows/s")
+
+
+@contextmanager
+def bulk_load(connection, report=print):
+    """Relax SQLite durability and defer secondary indexes for a large load.
+
+    The indexes of the seeded tables are dropped and rebuilt afterwards,
+    which is much faster than maintaining them row by row.
+    """
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+    previous = {
+        name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in BULK_LOAD_PRAGMAS
+    }
+    for name, value in BULK_LOAD_PRAGMAS.items():
+        connection.exec_driver_sql(f"PRAGMA {name}={value}")
+    indexes = [
+        index
+        for model in (UserModel, RideModel, ParticipationModel)
+        for index in sorted(model.__table__.indexes, key=lambda index: index.name)
+    ]
+    for index in indexes:
+        index.drop(connection, checkfirst=True)
+    connection.commit()
+    try:
+        yield
+    finally:
+        started = time.perf_counter()
+        for index in indexes:
+            index.create(connection, checkfirst=True)
+        connection.commit()
+        report(f"🗂  Rebuilt {len(indexes)} indexes in {time.perf_counter() - started:.1f}s")
+        for name, value in previous.items():
+            connection.exec_driver_sql(f"PRAGMA {name}={value}")
+
+
+def _insert(connection, model, unique):
+    """INSERT of `columns`; rows whose `unique` column value is taken are skipped."""
+    if unique is None:
+        return insert(model)
+    dialect_insert = sqlite_insert if connection.dialect.name == "sqlite" else postgresql_insert
+    return dialect_insert(model).on_conflict_do_nothing(index_elements=[unique])
+
+
+def _load(connection, model, columns, total, chunks, report, *, unique=None, redraw=None):
+    """Insert row tuples chunk by chunk, one executemany and commit each.
+
+    With `unique` and `redraw`, rows clashing with an existing value of the
+    unique column `unique` do not fail the load: the INSERT skips them and
+    they are inserted again as `redraw(row)` until they fit. Rows are found
+    missing by their id, read back only when the rowcount falls short.
+    """
+    base = _insert(connection, model, unique)
+    statement = base.compile(dialect=connection.dialect, column_keys=list(columns))
+    assert tuple(statement.positiontup or columns) == columns, statement.positiontup
+    progress = LoadProgress(model.__tablename__, total, report)
+    for rows in chunks:
+        if not rows:
+            continue
+        pending = rows
+        while pending:
+            if connection.dialect.name == "sqlite":
+                inserted = connection.exec_driver_sql(str(statement), pending).rowcount
+            else:
+                inserted = connection.execute(base, [dict(zip(columns, row)) for row in pending]).rowcount
+            if unique is None or inserted == len(pending):
+                break
+            ids = [row[0] for row in pending]
+            stored = set(connection.execute(
+                select(model.id).where(model.id.between(min(ids), max(ids)))
+            ).scalars())
+            pending = [redraw(row) for row in pending if row[0] not in stored]
+        connection.commit()
+        progress.advance(len(rows))
+    return progress
+
+
+def _chunked(first_id, count, chunk_size):
+    for start in range(first_id, first_id + count, chunk_size):
+        yield start, min(chunk_size, first_id + count - start)
+
+
+def seed_massive(
+    engine,
+    num_users=10,
+    num_rides=20,
+    num_participations=50,
+    *,
+    hot_rides=0,
+    hot_ride_riders=1000,
+    user_skew=1.0,
+    workers=1,
+    chunk_size=SEED_CHUNK_SIZE,
+    seed=None,
+    report=print,
+):
+    """Bulk-load users, rides and participations with Core executemany.
+
+    Primary keys are assigned up front (after the current maximum), so no
+    row is read back. `hot_rides` rides get `hot_ride_riders` participants
+    each and the others share the rest evenly; participants and organizers
+    are drawn from the users with `user_skew` (see UserPool). With
+    `workers` > 1 the participation rows are generated in worker processes.
+    """
+    rng = random.Random(seed)
+    base_seed = rng.randrange(2**32)
+    started = time.perf_counter()
+    report(f"🚀 Seeding {num_users} users, {num_rides} rides, {num_participations} participations...")
 
     with Session(engine) as session:
-        print(f"🚀 Seeding {num_users} users, {num_rides} rides, {num_participations} participations...")
-
-        users = []
-        rides = []
-
-        # ---------------- FIXED USER ----------------
         vadim = session.query(UserModel).filter_by(username="vadim").first()
         if not vadim:
-            vadim = UserModel(username="vadim", password="123456")
+            vadim = UserModel(username="vadim", password=hash_password("123456"))
             session.add(vadim)
-            session.flush()
-            print("👤 Created user: vadim (fixed user)")
+            session.commit()
+            report("👤 Created user: vadim (fixed user)")
         else:
-            print("✔ User 'vadim' already exists")
-
-        users.append(vadim)
+            report("✔ User 'vadim' already exists")
+        fixed_user_id = vadim.id
 
-        # ---------------- USERS ----------------
-        for _ in range(num_users):
-            username = random_username()
-            user = UserModel(username=username, password=random_password())
-            session.add(user)
-            session.flush()
-            users.append(user)
-        print(f"👤 Created {len(users)} users")
-
-        # ---------------- RIDES ----------------
-        for _ in range(num_rides):
-            creator = random.choice(users)
-            ride = RideModel(
-                code=random_ride_code(),
-                title=f"Ride {random.randint(1000, 9999)}",
-                description="Auto-generated ride",
-                start_time=random_datetime(),
-                created_by_user_id=creator.id,
+    with engine.connect() as connection:
+        next_id = lambda model: (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+        first_user_id, first_ride_id, first_participation_id = (
+            next_id(UserModel), next_id(RideModel), next_id(ParticipationModel),
+        )
+        users = UserPool(fixed_user_id, first_user_id, num_users + 1, user_skew)
+        riders = riders_per_ride(num_rides, num_participations, users.size, hot_rides, hot_ride_riders, rng)
+        total_participations = sum(riders)
+        sqlite = connection.dialect.name == "sqlite"
+
+        with bulk_load(connection, report):
+            loaded = _load(connection, UserModel, USER_COLUMNS, num_users, (
+                _user_rows(start, count, rng) for start, count in _chunked(first_user_id, num_users, chunk_size)
+            ), report)
+            report(f"👤 Created {loaded.done:,} users")
+            # Codes of rides created through the API are random, so a seeded
+            # code can already be taken; such a ride gets a random code.
+            code_rng = random.Random(base_seed)
+            loaded = _load(connection, RideModel, RIDE_COLUMNS, num_rides, (
+                _ride_rows(start, count, users, rng, sqlite)
+                for start, count in _chunked(first_ride_id, num_rides, chunk_size)
+            ), report, unique="code", redraw=lambda row: (row[0], random_ride_code(code_rng), *row[2:]))
+            report(f"🚴 Created {loaded.done:,} rides")
+            chunks = _participation_chunks(
+                riders, first_participation_id, first_ride_id, users, chunk_size, base_seed, sqlite,
             )
-            session.add(ride)
-            session.flush()
-            rides.append(ride)
-        print(f"🚴 Created {len(rides)} rides")
-
-        # ------------- PARTICIPATIONS ----------
-        for _ in range(num_participations):
-            user = random.choice(users)
-            ride = random.choice(rides)
-
-            lat, lon = random_coordinates()
-
-            participation = ParticipationModel(
-                user_id=user.id,
-                ride_id=ride.id,
-                latitude=lat,
-                longitude=lon,
-                updated_at=random_datetime(),
+            loaded = _load(
+                connection, ParticipationModel, PARTICIPATION_COLUMNS, total_participations,
+                _generate(chunks, workers), report,
             )
-            session.add(participation)
+            report(f"📍 Created {loaded.done:,} participations ({loaded.rate():,.0f} rows/s)")
 
-        session.commit()
-        print("📍 Participations created")
-        print("🎉 Seeding completed!")
+    elapsed = time.perf_counter() - started
+    rows = num_users + num_rides + total_participations
+    report(f"🎉 Seeding completed: {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return {"users": num_users, "rides": num_rides, "participations": total_participations}
 
 
 # ------------------------------
@@ -189,6 +504,8 @@ if __name__ == "__main__":
         num_rides = 20
         num_participations = 50
 
+        options = {}
+
         for arg in sys.argv:
             if arg.startswith("--users="):
                 num_users = int(arg.split("=")[1])
@@ -196,8 +513,20 @@ if __name__ == "__main__":
                 num_rides = int(arg.split("=")[1])
             if arg.startswith("--participations="):
                 num_participations = int(arg.split("=")[1])
-
-        seed_massive(engine, num_users, num_rides, num_participations)
+            if arg.startswith("--hot-rides="):
+                options["hot_rides"] = int(arg.split("=")[1])
+            if arg.startswith("--hot-ride-riders="):
+                options["hot_ride_riders"] = int(arg.split("=")[1])
+            if arg.startswith("--user-skew="):
+                options["user_skew"] = float(arg.split("=")[1])
+            if arg.startswith("--workers="):
+                options["workers"] = int(arg.split("=")[1])
+            if arg.startswith("--chunk-size="):
+                options["chunk_size"] = int(arg.split("=")[1])
+            if arg.startswith("--seed="):
+                options["seed"] = int(arg.split("=")[1])
+
+        seed_massive(engine, num_users, num_rides, num_participations, **options)
         sys.exit(0)
 
     # ✅ DEFAULT SEED (no import!)
@@ -1,4 +1,6 @@
-from collections.abc import Generator, Callable
+from collections.abc import Generator, Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from functools import cache, partial
 
 from datetime import datetime, timezone
 import secrets, string
@@ -6,29 +8,135 @@ import secrets, string
 from fastapi import FastAPI, status
 from fastapi.testclient import TestClient
 from pytest import fixture
-from sqlalchemy import create_engine
+from sqlalchemy import Connection, Engine, create_engine, event, insert
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
-from app.injections import get_session
+from app.conditional import VersionedSession
+from app.config import Settings
+from app.injections import get_read_session, get_session
+from app.lazy_loads import watch_lazy_loads
 from app.main import create_app
 from app.models import DbModel, UserModel, RideModel, ParticipationModel
+from app.passwords import PasswordHasher
+
+TEST_USER_PASSWORD = "testpassword"
+AUTH_USER_PASSWORD = "authpassword"
+
+
+@cache
+def hashed_password(password: str) -> str:
+    """A stored hash at the default cost, so logging in does not rehash it."""
+    return PasswordHasher().hash(password)
+
+
+def create_test_engine() -> Engine:
+    """One in-memory database, shared by the test and the route threads."""
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False},
+    )
+
+    # pysqlite's implicit transactions do not mix with SAVEPOINT; let
+    # SQLAlchemy emit BEGIN itself.
+    @event.listens_for(engine, "connect")
+    def _autocommit_driver(dbapi_connection, connection_record) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection: Connection) -> None:
+        connection.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def is_savepoint(statement: str) -> bool:
+    """Transaction control of the per-request SAVEPOINT, not of the code under test."""
+    return statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT"))
+
+
+@contextmanager
+def captured_statements(session: Session) -> Iterator[list[str]]:
+    """SQL issued on the test connection inside the block, SAVEPOINTs left out."""
+    statements: list[str] = []
+
+    def _capture(conn, cursor, statement, *args) -> None:
+        if not is_savepoint(statement):
+            statements.append(statement)
+
+    bind = session.get_bind()
+    event.listen(bind, "before_cursor_execute", _capture)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", _capture)
+
+
+@contextmanager
+def query_budget(session: Session, max_queries: int) -> Iterator[list[str]]:
+    """Fail when the block issues more than `max_queries` statements."""
+    with captured_statements(session) as statements:
+        yield statements
+    assert len(statements) <= max_queries, (
+        f"{len(statements)} queries over a budget of {max_queries}:\n" + "\n".join(statements)
+    )
+
+
+# Session scope is per process: every pytest-xdist worker builds its own
+# in-memory database, so workers never see each other's rows.
+@fixture(scope="session")
+def engine() -> Generator[Engine]:
+    engine = create_test_engine()
+    DbModel.metadata.create_all(engine)
+    watch_lazy_loads(engine)
+    yield engine
+    engine.dispose()
+
+@fixture(scope="function")
+def connection(engine: Engine) -> Generator[Connection]:
+    """A transaction around the whole test, rolled back at the end."""
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            yield connection
+        finally:
+            transaction.rollback()
+
+def app_settings(**overrides) -> Settings:
+    """Settings for an app built by a test: its own in-memory database.
+
+    The default `sqlite:///ride.db` would be opened (and migrated) by every
+    app's lifespan, a file shared by all pytest-xdist workers.
+    """
+    return Settings(**{"database_url": "sqlite://", **overrides})
 
 @fixture(scope="function")
 def app() -> FastAPI:
-    return create_app()
+    # The routes use the `session` fixture; the app's own engine is only
+    # opened by the lifespan.
+    return create_app(app_settings())
 
 @fixture(scope="function")
-def session(app: FastAPI) -> Generator[Session]:
-    engine = create_engine("sqlite:///test.db")
-    DbModel.metadata.create_all(bind=engine)
-    try:
-        with (session := Session(bind=engine)).begin():
-            app.dependency_overrides[get_session] = lambda: session
+def session(app: FastAPI, connection: Connection) -> Generator[Session]:
+    # Commits release a SAVEPOINT instead of ending the outer transaction.
+    # Nothing expires on commit, as before requests committed. The class of
+    # get_session, so writes bump the list ETag counters.
+    session = VersionedSession(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+
+    def _request_session() -> Generator[Session]:
+        # What get_session's begin() / commit does, one SAVEPOINT deeper: a
+        # failed request rolls back its own writes only. The commit fires
+        # after_commit listeners (the token cache invalidation).
+        with session.begin_nested():
             yield session
-            session.rollback()
+        session.commit()
+
+    app.dependency_overrides[get_session] = _request_session
+    # Reads see the test's uncommitted rows only through the same connection.
+    app.dependency_overrides[get_read_session] = lambda: session
+    try:
+        yield session
     finally:
-        DbModel.metadata.drop_all(engine)
-        engine.dispose()
+        session.close()
 
 @fixture(scope="function")
 def test_client(app: FastAPI, session: Session) -> Generator[TestClient]:
@@ -37,7 +145,7 @@ def test_client(app: FastAPI, session: Session) -> Generator[TestClient]:
 
 @fixture(scope="function")
 def test_user(session: Session) -> UserModel:
-    user = UserModel(username="testuser", password="testpassword")
+    user = UserModel(username="testuser", password=hashed_password(TEST_USER_PASSWORD))
     session.add(user)
     session.flush()
     return user
@@ -86,13 +194,13 @@ def ride_factory(session: Session, test_user: UserModel) -> RideFactoryType:
 
 @fixture(scope="function")
 def auth_headers(test_client: TestClient, session: Session,) -> dict[str, str]:
-    user = UserModel(username="auth_user", password="authpassword")
+    user = UserModel(username="auth_user", password=hashed_password(AUTH_USER_PASSWORD))
     session.add(user)
     session.flush()
 
     login_payload = {
         "username": user.username,
-        "password": user.password,
+        "password": AUTH_USER_PASSWORD,
     }
     login_response = test_client.post("/auth/login", data=login_payload)
     assert login_response.status_code == status.HTTP_200_OK, login_response.text
@@ -119,3 +227,23 @@ def test_participation(
     session.add(participation)
     session.flush()
     return participation
+
+
+# ------------------ BULK ROWS
+InsertRowsType = Callable[..., list]
+
+@fixture(scope="function")
+def insert_rows(session: Session) -> InsertRowsType:
+    """Insert many fixture rows in one statement and get them back as models."""
+    def _insert_rows(model: type[DbModel], rows: list[dict]) -> list:
+        statement = insert(model).returning(model, sort_by_parameter_order=True)
+        return list(session.scalars(statement, rows))
+
+    return _insert_rows
+
+
+# ------------------ QUERY BUDGETS
+@fixture(scope="function")
+def assert_max_queries(session: Session) -> Callable[[int], AbstractContextManager[list[str]]]:
+    """`with assert_max_queries(2): ...` fails the test past two statements."""
+    return partial(query_budget, session)
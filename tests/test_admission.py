@@ -0,0 +1,105 @@
+import asyncio
+
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from pytest import fixture, raises
+
+from app.admission import BULK, ROUTE_LANES, Lane, LaneFull, LaneLimits
+from app.main import create_app
+from app.models import ParticipationModel
+from tests.conftest import AUTH_USER_PASSWORD, app_settings
+
+
+def test_lane_queues_in_order_and_hands_slots_over():
+    async def scenario() -> list[str]:
+        lane = Lane("test", LaneLimits(concurrency=1, queue_size=2, queue_timeout_seconds=5))
+        order = []
+
+        async def request(name: str) -> None:
+            await lane.acquire()
+            order.append(name)
+            await asyncio.sleep(0)
+            lane.release()
+
+        await lane.acquire()
+        waiting = [asyncio.create_task(request(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        assert lane.waiting == 2
+        with raises(LaneFull):
+            await lane.acquire()  # the queue is full
+
+        lane.release()
+        await asyncio.gather(*waiting)
+        assert lane.stats() == {
+            "concurrency": 1, "queue_size": 2, "active": 0, "waiting": 0,
+            "admitted": 3, "rejected": 1, "timed_out": 0,
+        }
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+
+
+def test_lane_times_out_and_forgets_cancelled_waiters():
+    async def scenario() -> Lane:
+        lane = Lane("test", LaneLimits(concurrency=1, queue_size=5, queue_timeout_seconds=0.01))
+        await lane.acquire()
+
+        with raises(LaneFull):
+            await lane.acquire()
+        cancelled = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+
+        lane.release()
+        return lane
+
+    lane = asyncio.run(scenario())
+    assert (lane.active, lane.waiting, lane.timed_out) == (0, 0, 1)
+
+
+def test_unlimited_lane_never_queues():
+    async def scenario() -> Lane:
+        lane = Lane("test", LaneLimits(concurrency=0, queue_size=0, queue_timeout_seconds=0))
+        for _ in range(100):
+            await lane.acquire()
+        return lane
+
+    assert asyncio.run(scenario()).active == 100
+
+
+@fixture(scope="function")
+def app() -> FastAPI:
+    return create_app(app_settings(
+        lane_bulk_concurrency=1, lane_bulk_queue=0, lane_retry_after_seconds=3, metrics_enabled=True,
+    ))
+
+
+def test_full_lane_sheds_load_with_retry_after(
+        app: FastAPI,
+        test_client: TestClient,
+        auth_headers: dict[str, str],
+        test_participation: ParticipationModel,
+):
+    bulk = app.state.lanes[BULK]
+    test_client.portal.call(bulk.acquire)  # a long bulk read in flight
+
+    shed = test_client.get("/participations/")
+    assert shed.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert shed.headers["Retry-After"] == "3"
+
+    # Other lanes are untouched by a full bulk lane.
+    assert test_client.get(f"/rides/{test_participation.ride_id}").status_code == status.HTTP_200_OK
+    login = test_client.post("/auth/login", data={"username": "auth_user", "password": AUTH_USER_PASSWORD})
+    assert login.status_code == status.HTTP_200_OK
+
+    test_client.portal.call(bulk.release)
+    assert test_client.get("/participations/").status_code == status.HTTP_200_OK
+    assert 'admission_lane_rejected_total{lane="bulk"} 1' in test_client.get("/metrics").text
+
+
+def test_lane_table_names_existing_routes():
+    app = create_app(app_settings())
+    routes = {(method.upper(), path) for path, item in app.openapi()["paths"].items() for method in item}
+
+    assert set(ROUTE_LANES) <= routes
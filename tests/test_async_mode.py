@@ -0,0 +1,167 @@
+from collections.abc import Generator
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import fixture
+
+from app.config import Settings
+from app.database import to_async_url
+from app.main import create_app
+
+
+@fixture(scope="function")
+def async_client(tmp_path: Path) -> Generator[TestClient]:
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path / 'async.db'}",
+        database_async=True,
+    )
+    with TestClient(app=create_app(settings)) as test_client:
+        yield test_client
+
+
+def _login(client: TestClient, username: str, password: str) -> dict[str, str]:
+    client.post("/users/", json={"username": username, "password": password})
+    response = client.post("/auth/login", data={"username": username, "password": password})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_to_async_url_maps_sqlite_to_aiosqlite():
+    assert to_async_url("sqlite:///ride.db") == "sqlite+aiosqlite:///ride.db"
+    assert to_async_url("sqlite+aiosqlite:///ride.db") == "sqlite+aiosqlite:///ride.db"
+
+
+def test_async_mode_serves_async_endpoints(async_client: TestClient):
+    for route in async_client.app.routes:
+        endpoint = getattr(route, "endpoint", None)
+        if endpoint is not None and getattr(route, "path", "").startswith(("/users", "/rides", "/participations", "/auth")):
+            assert endpoint.__module__ == "app.async_routers"
+
+
+def test_async_mode_ride_and_participation_flow(async_client: TestClient):
+    headers = _login(async_client, "async_user", "async_password")
+
+    ride_response = async_client.post(
+        "/rides/",
+        json={
+            "title": "Async ride",
+            "start_time": datetime(2025, 11, 18, 15, 30, tzinfo=timezone.utc).isoformat(),
+        },
+        headers=headers,
+    )
+    assert ride_response.status_code == status.HTTP_201_CREATED, ride_response.text
+    ride = ride_response.json()
+    assert len(ride["code"]) == 6
+    assert isinstance(ride["created_at"], str)
+
+    assert async_client.get(f"/rides/code/{ride['code']}").json()["id"] == ride["id"]
+    rides_etag = async_client.get("/rides/").headers["ETag"]
+    async_client.post(
+        "/rides/",
+        json={"title": "Second", "start_time": datetime(2025, 11, 19, tzinfo=timezone.utc).isoformat()},
+        headers=headers,
+    ).raise_for_status()
+    # The async write session bumps the rides counter too.
+    assert async_client.get("/rides/", headers={"If-None-Match": rides_etag}).status_code == status.HTTP_200_OK
+
+    participation_response = async_client.post(
+        "/participations/",
+        json={"ride_code": ride["code"]},
+        headers=headers,
+    )
+    assert participation_response.status_code == status.HTTP_201_CREATED, participation_response.text
+    participation_id = participation_response.json()["id"]
+
+    roster = async_client.get(f"/rides/{ride['id']}/participants").json()
+    assert [item["participant"]["username"] for item in roster["items"]] == ["async_user"]
+
+    update_response = async_client.put(
+        f"/participations/{participation_id}",
+        json={
+            "latitude": 48.1351,
+            "longitude": 11.582,
+            "updated_at": datetime(2026, 1, 1, 11, 11, tzinfo=timezone.utc).isoformat(),
+        },
+        headers=headers,
+    )
+    assert update_response.status_code == status.HTTP_200_OK, update_response.text
+    assert update_response.json()["latitude"] == 48.1351
+
+    batch_response = async_client.post(
+        "/participations/locations",
+        json={"fixes": [
+            {
+                "participation_id": participation_id,
+                "latitude": 48.2,
+                "longitude": 11.6,
+                "updated_at": datetime(2026, 1, 1, 11, 12, tzinfo=timezone.utc).isoformat(),
+            },
+            {
+                "participation_id": participation_id,
+                "latitude": 48.0,
+                "longitude": 11.0,
+                "updated_at": datetime(2026, 1, 1, 11, 10, tzinfo=timezone.utc).isoformat(),
+            },
+        ]},
+        headers=headers,
+    )
+    assert batch_response.status_code == status.HTTP_200_OK, batch_response.text
+    assert [r["status"] for r in batch_response.json()["results"]] == ["applied", "stale"]
+    participation_response = async_client.get(f"/participations/{participation_id}")
+    assert participation_response.json()["latitude"] == 48.2
+    revalidated = async_client.get(
+        f"/participations/{participation_id}",
+        headers={"If-None-Match": participation_response.headers["ETag"]},
+    )
+    assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+    track = async_client.get(f"/participations/{participation_id}/track").json()
+    assert [point["latitude"] for point in track["points"]] == [48.0, 48.1351, 48.2]
+
+    assert len(async_client.get("/participations/").json()["items"]) == 1
+
+    export_response = async_client.get("/participations/export")
+    assert export_response.status_code == status.HTTP_200_OK
+    assert len(export_response.text.splitlines()) == 1
+
+
+def test_async_mode_delete_ride(async_client: TestClient):
+    headers = _login(async_client, "async_owner", "async_password")
+    ride = async_client.post(
+        "/rides/",
+        json={
+            "title": "Ride to delete",
+            "start_time": datetime(2025, 11, 18, 15, 30, tzinfo=timezone.utc).isoformat(),
+        },
+        headers=headers,
+    ).json()
+
+    delete_response = async_client.delete(f"/rides/{ride['id']}", headers=headers)
+    assert delete_response.status_code == status.HTTP_204_NO_CONTENT
+    assert async_client.get(f"/rides/{ride['id']}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_async_mode_rejects_invalid_token(async_client: TestClient):
+    response = async_client.get("/auth/me", headers={"Authorization": "Bearer invalid token"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Invalid token"}
+
+
+def test_async_mode_live_stream(async_client: TestClient):
+    headers = _login(async_client, "async_live", "async_password")
+    ride = async_client.post(
+        "/rides/",
+        json={
+            "title": "Live ride",
+            "start_time": datetime(2025, 11, 18, 15, 30, tzinfo=timezone.utc).isoformat(),
+        },
+        headers=headers,
+    ).json()
+
+    with async_client.websocket_connect(f"/rides/{ride['id']}/live/ws") as websocket:
+        participation = async_client.post(
+            "/participations/", json={"ride_code": ride["code"]}, headers=headers,
+        ).json()
+        assert websocket.receive_json() == participation
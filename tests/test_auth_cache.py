@@ -0,0 +1,162 @@
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.auth_cache import TokenCache, TokenVersions
+from app.config import Settings
+from app.main import create_app
+from app.models import UserModel
+from app.schemas import UserResponse
+from app.security import create_access_token
+
+
+def _principal(user_id: int) -> UserResponse:
+    return UserResponse(id=user_id, username=f"user{user_id}")
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2)
+    exp = time.time() + 60
+    cache.put("a", {"sub": "1", "exp": exp}, _principal(1), 0)
+    cache.put("b", {"sub": "2", "exp": exp}, _principal(2), 0)
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", {"sub": "3", "exp": exp}, _principal(3), 0)
+
+    assert cache.get("b") is None
+    assert cache.get("c").principal.id == 3
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 2, "misses": 1, "evictions": 1}
+
+
+def test_token_cache_drops_expired_entries():
+    cache = TokenCache(max_size=10)
+    cache.put("old", {"sub": "1", "exp": time.time() - 1}, _principal(1), 0)
+
+    assert cache.get("old") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_current_user_is_served_from_cache(
+        app: FastAPI,
+        test_client: TestClient,
+        auth_headers: dict[str, str],
+):
+    token_cache: TokenCache = app.state.token_cache
+
+    first = test_client.get("/auth/me", headers=auth_headers)
+    second = test_client.get("/auth/me", headers=auth_headers)
+
+    assert first.status_code == second.status_code == status.HTTP_200_OK
+    assert first.json() == second.json()
+    assert (token_cache.hits, token_cache.misses) == (1, 1)
+
+
+def test_user_update_invalidates_cached_principal(
+        app: FastAPI,
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+):
+    assert test_client.get("/auth/me", headers=auth_headers).json()["username"] == "auth_user"
+
+    user = session.query(UserModel).filter_by(username="auth_user").one()
+    user.username = "renamed_user"
+    session.flush()
+    assert app.state.token_cache.stats()["size"] == 1  # flushed, not committed yet
+
+    session.commit()
+
+    assert app.state.token_cache.stats()["size"] == 0
+    assert test_client.get("/auth/me", headers=auth_headers).json()["username"] == "renamed_user"
+
+
+def test_rolled_back_revocation_is_forgotten(
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+):
+    assert test_client.get("/auth/me", headers=auth_headers).status_code == status.HTTP_200_OK
+
+    user = session.query(UserModel).filter_by(username="auth_user").one()
+    savepoint = session.begin_nested()
+    user.token_version += 1
+    session.flush()
+    savepoint.rollback()
+    session.commit()
+
+    assert test_client.get("/auth/me", headers=auth_headers).status_code == status.HTTP_200_OK
+
+
+def test_cached_token_is_revoked_by_core_update_after_refresh(tmp_path: Path):
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'auth.db'}", auth_revocation_refresh_seconds=0)
+    with TestClient(app=create_app(settings)) as client:
+        credentials = {"username": "core_user", "password": "core_password"}
+        client.post("/users/", json=credentials)
+        token = client.post("/auth/login", data=credentials).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/auth/me", headers=headers).status_code == status.HTTP_200_OK
+
+        engine = client.app.state.database_engine
+        with engine.begin() as connection:  # no ORM, so no mapper events
+            connection.execute(update(UserModel).values(token_version=UserModel.token_version + 1))
+        token_versions: TokenVersions = client.app.state.token_versions
+        token_versions.refresh(engine, client.app.state.token_cache.user_ids())
+
+        response = client.get("/auth/me", headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Token revoked"
+
+
+def test_cached_token_of_user_deleted_elsewhere_is_rejected_after_refresh(tmp_path: Path):
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'auth.db'}", auth_revocation_refresh_seconds=0)
+    with TestClient(app=create_app(settings)) as client:
+        credentials = {"username": "gone_user", "password": "gone_password"}
+        client.post("/users/", json=credentials)
+        token = client.post("/auth/login", data=credentials).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/auth/me", headers=headers).status_code == status.HTTP_200_OK
+
+        engine = client.app.state.database_engine
+        with engine.begin() as connection:
+            connection.execute(UserModel.__table__.delete())
+        client.app.state.token_versions.refresh(engine, client.app.state.token_cache.user_ids())
+
+        assert client.get("/auth/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_deleted_user_token_is_rejected(
+        test_client: TestClient,
+        session: Session,
+        test_user: UserModel,
+):
+    headers = {"Authorization": f"Bearer {create_access_token(subject=str(test_user.id))}"}
+    assert test_client.get("/auth/me", headers=headers).status_code == status.HTTP_200_OK
+
+    session.delete(test_user)
+    session.commit()
+
+    response = test_client.get("/auth/me", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_expired_token_is_not_cached(app: FastAPI, test_client: TestClient, test_user: UserModel):
+    token = create_access_token(subject=str(test_user.id), expires_delta=timedelta(seconds=-1))
+
+    response = test_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert app.state.token_cache.stats()["size"] == 0
+
+
+def test_revoked_token_is_rejected_in_lookup_mode(test_client: TestClient, auth_headers: dict[str, str]):
+    assert test_client.get("/auth/me", headers=auth_headers).status_code == status.HTTP_200_OK
+
+    assert test_client.post("/auth/revoke", headers=auth_headers).status_code == status.HTTP_204_NO_CONTENT
+
+    response = test_client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token revoked"
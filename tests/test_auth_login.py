@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.models import UserModel
+from tests.conftest import TEST_USER_PASSWORD
 
 def test_login_success(
         test_client: TestClient,
@@ -13,7 +14,7 @@ def test_login_success(
 ):
     payload = {
         "username": test_user.username,
-        "password": test_user.password,
+        "password": TEST_USER_PASSWORD,
      }
     expected_response = {
         "access_token": ANY,
@@ -45,7 +46,7 @@ def test_login_me_with_token_success(
 ):
     login_payload = {
         "username": test_user.username,
-        "password": test_user.password,
+        "password": TEST_USER_PASSWORD,
     }
     login_response = test_client.post("/auth/login/", data=login_payload)
     assert login_response.status_code == status.HTTP_200_OK, login_response.text
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from benchmarks.suite import SCENARIOS, compare, run_suite, uncovered_routes
+
+
+def _report(**p95_ms: float) -> dict:
+    return {"results": [
+        {"name": name, "p95_ms": value, "throughput_rps": 1000 / value} for name, value in p95_ms.items()
+    ]}
+
+
+def test_every_route_has_a_scenario():
+    assert uncovered_routes() == set()
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = _report(fast=10.0, slow=10.0, gone=10.0)
+    current = _report(fast=9.0, slow=12.0, new=1.0)
+
+    rows = {row["name"]: row for row in compare(baseline, current, threshold=0.15)}
+
+    assert set(rows) == {"fast", "slow"}
+    assert not rows["fast"]["regressed"]
+    assert rows["slow"]["regressed"] and rows["slow"]["p95_change"] == "+20.0%"
+    assert not compare(baseline, current, threshold=0.25)[1]["regressed"]
+
+
+def test_suite_runs_every_scenario(tmp_path: Path):
+    report = run_suite(
+        f"sqlite:///{tmp_path / 'suite.db'}",
+        users=3, rides=3, participations=5, requests=2, concurrency=1,
+    )
+
+    assert [result["name"] for result in report["results"]] == [item.name for item in SCENARIOS]
+    assert all(result["requests"] == 2 for result in report["results"])
+    assert report["meta"]["requests"] == 2
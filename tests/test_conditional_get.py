@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.conditional import VersionedSession
+from app.models import DbModel, ParticipationModel, RideModel, TableVersionModel, UserModel
+from app.passwords import NO_PASSWORD
+from tests.conftest import captured_statements
+
+
+def _revalidate(client: TestClient, url: str, etag: str):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_ride_revalidation_reads_only_the_version(
+        test_client: TestClient,
+        session: Session,
+        test_ride: RideModel,
+):
+    first = test_client.get(f"/rides/{test_ride.id}")
+    etag = first.headers["ETag"]
+
+    with captured_statements(session) as statements:
+        response = _revalidate(test_client, f"/rides/{test_ride.id}", etag)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 1 and statements[0].startswith("SELECT rides.version")
+
+
+def test_ride_etag_changes_on_update(test_client: TestClient, auth_headers: dict[str, str]):
+    ride = test_client.post(
+        "/rides/", json={"title": "Tagged", "start_time": "2025-11-18T15:30:00+00:00"}, headers=auth_headers,
+    ).json()
+    url = f"/rides/{ride['id']}"
+    etag = test_client.get(url).headers["ETag"]
+    assert test_client.get(f"/rides/code/{ride['code']}").headers["ETag"] == etag
+    assert _revalidate(test_client, f"/rides/code/{ride['code']}", etag).status_code == (
+        status.HTTP_304_NOT_MODIFIED
+    )
+
+    test_client.put(url, json={"title": "Renamed"}, headers=auth_headers)
+
+    response = _revalidate(test_client, url, etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["title"] == "Renamed"
+    assert response.headers["ETag"] != etag
+    assert _revalidate(test_client, url, response.headers["ETag"]).status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_if_none_match_lists_and_weak_tags(test_client: TestClient, test_ride: RideModel):
+    url = f"/rides/{test_ride.id}"
+    etag = test_client.get(url).headers["ETag"]
+
+    assert _revalidate(test_client, url, f'"other", W/{etag}').status_code == status.HTTP_304_NOT_MODIFIED
+    assert _revalidate(test_client, url, "*").status_code == status.HTTP_304_NOT_MODIFIED
+    assert _revalidate(test_client, url, '"other"').status_code == status.HTTP_200_OK
+    assert _revalidate(test_client, "/rides/999999", "*").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_participation_etag_follows_batch_updates(
+        test_client: TestClient,
+        session: Session,
+        test_ride: RideModel,
+        auth_headers: dict[str, str],
+):
+    owner = session.query(UserModel).filter_by(username="auth_user").one()
+    participation = ParticipationModel(user_id=owner.id, ride_id=test_ride.id)
+    session.add(participation)
+    session.flush()
+    url = f"/participations/{participation.id}"
+    etag = test_client.get(url).headers["ETag"]
+    list_etag = test_client.get("/participations/").headers["ETag"]
+
+    test_client.post(
+        "/participations/locations",
+        json={"fixes": [{"participation_id": participation.id, "latitude": 48.0, "longitude": 11.0,
+                         "updated_at": datetime(2026, 1, 1, tzinfo=timezone.utc).isoformat()}]},
+        headers=auth_headers,
+    )
+
+    assert _revalidate(test_client, url, etag).status_code == status.HTTP_200_OK
+    assert _revalidate(test_client, "/participations/", list_etag).status_code == status.HTTP_200_OK
+
+
+def test_list_etags_follow_table_writes(
+        test_client: TestClient,
+        test_ride: RideModel,
+        test_participation: ParticipationModel,
+        auth_headers: dict[str, str],
+):
+    rides_etag = test_client.get("/rides/").headers["ETag"]
+    participations_etag = test_client.get("/participations/").headers["ETag"]
+    assert _revalidate(test_client, "/rides/", rides_etag).status_code == status.HTTP_304_NOT_MODIFIED
+    assert _revalidate(test_client, "/participations/", participations_etag).status_code == (
+        status.HTTP_304_NOT_MODIFIED
+    )
+
+    ride = test_client.post(
+        "/rides/", json={"title": "New", "start_time": "2025-11-18T15:30:00+00:00"}, headers=auth_headers,
+    ).json()
+    assert _revalidate(test_client, "/rides/", rides_etag).status_code == status.HTTP_200_OK
+    assert _revalidate(test_client, "/participations/", participations_etag).status_code == (
+        status.HTTP_304_NOT_MODIFIED
+    )
+
+    # The participations list ETag comes from the page's rows.
+    test_client.post("/participations/", json={"ride_code": ride["code"]}, headers=auth_headers)
+    assert _revalidate(test_client, "/participations/", participations_etag).status_code == status.HTTP_200_OK
+    assert _revalidate(test_client, "/participations/?limit=1", participations_etag).status_code == (
+        status.HTTP_200_OK
+    )
+
+
+def test_location_fixes_do_not_bump_a_table_version(
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+        test_ride: RideModel,
+):
+    owner = session.query(UserModel).filter_by(username="auth_user").one()
+    participation = ParticipationModel(user_id=owner.id, ride_id=test_ride.id)
+    session.add(participation)
+    session.flush()
+    fix = {"latitude": 48.0, "longitude": 11.0, "updated_at": datetime(2026, 1, 1, tzinfo=timezone.utc).isoformat()}
+
+    with captured_statements(session) as statements:
+        test_client.put(f"/participations/{participation.id}", json=fix, headers=auth_headers).raise_for_status()
+
+    assert not [statement for statement in statements if "table_versions" in statement]
+
+
+def test_only_the_write_session_bumps_table_versions(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'versions.db'}")
+    DbModel.metadata.create_all(engine)
+
+    def add_ride(session_class: type[Session], code: str) -> int | None:
+        with (session := session_class(bind=engine)).begin():
+            user = UserModel(username=code, password=NO_PASSWORD)
+            session.add(user)
+            session.flush()
+            session.add(RideModel(code=code, title=code, start_time=datetime(2026, 1, 1), created_by_user_id=user.id))
+        with Session(engine) as session:
+            counter = session.get(TableVersionModel, "rides")
+            return None if counter is None else counter.version
+
+    # Seed scripts, migrations and jobs use plain sessions.
+    assert add_ride(Session, "PLAIN1") is None
+    assert add_ride(VersionedSession, "ROUTE1") == 1
+    engine.dispose()
@@ -0,0 +1,93 @@
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.config import Settings
+from app.database import (
+    checkpoint_wal,
+    create_async_database_engine,
+    create_database_engine,
+    uses_wal,
+)
+
+
+def _pragma(connection, name: str):
+    return connection.execute(text(f"PRAGMA {name}")).scalar_one()
+
+
+def test_sqlite_engine_applies_pragmas_on_connect(tmp_path: Path):
+    engine = create_database_engine(Settings(database_url=f"sqlite:///{tmp_path / 'p.db'}"))
+    try:
+        with engine.connect() as connection:
+            assert _pragma(connection, "journal_mode") == "wal"
+            assert _pragma(connection, "synchronous") == 1  # NORMAL
+            assert _pragma(connection, "busy_timeout") == 5000
+            assert _pragma(connection, "cache_size") == -64000
+            assert _pragma(connection, "foreign_keys") == 1
+        assert engine.pool.size() == 5
+        assert uses_wal(engine)
+        assert checkpoint_wal(engine)[0] == 0
+    finally:
+        engine.dispose()
+
+
+def test_sqlite_engine_skips_disabled_pragmas(tmp_path: Path):
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path / 'p.db'}",
+        sqlite_journal_mode="",
+        sqlite_foreign_keys=False,
+        database_pool_size=2,
+    )
+    engine = create_database_engine(settings)
+    try:
+        with engine.connect() as connection:
+            assert _pragma(connection, "journal_mode") == "delete"
+            assert _pragma(connection, "foreign_keys") == 0
+        assert engine.pool.size() == 2
+    finally:
+        engine.dispose()
+
+
+def test_sqlite_engine_applies_zero_pragma_values(tmp_path: Path):
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path / 'p.db'}",
+        sqlite_synchronous="0",
+        sqlite_mmap_size=0,
+        sqlite_busy_timeout_ms=None,
+    )
+    assert settings.sqlite_pragmas["mmap_size"] == 0
+    assert "busy_timeout" not in settings.sqlite_pragmas
+    engine = create_database_engine(settings)
+    try:
+        with engine.connect() as connection:
+            assert _pragma(connection, "synchronous") == 0  # OFF
+            assert _pragma(connection, "mmap_size") == 0
+    finally:
+        engine.dispose()
+
+
+def test_in_memory_engine_takes_no_pool_sizing():
+    engine = create_database_engine(Settings(database_url="sqlite://"))
+    try:
+        with engine.connect() as connection:
+            assert _pragma(connection, "foreign_keys") == 1
+        assert not uses_wal(engine)
+    finally:
+        engine.dispose()
+
+
+def test_async_engine_applies_pragmas_on_connect(tmp_path: Path):
+    async def read_pragmas() -> tuple[str, int]:
+        engine = create_async_database_engine(
+            Settings(database_url=f"sqlite:///{tmp_path / 'p.db'}")
+        )
+        try:
+            async with engine.connect() as connection:
+                journal_mode = (await connection.execute(text("PRAGMA journal_mode"))).scalar_one()
+                busy_timeout = (await connection.execute(text("PRAGMA busy_timeout"))).scalar_one()
+            return journal_mode, busy_timeout
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(read_pragmas()) == ("wal", 5000)
@@ -0,0 +1,76 @@
+import json
+from datetime import datetime, timezone
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models import UserModel, RideModel, ParticipationModel
+from app.ndjson import NDJSON_MEDIA_TYPE
+from app.repositories import RideRepository
+from tests.conftest import RideFactoryType
+
+
+def _lines(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_rides_streams_ndjson(
+        test_client: TestClient,
+        ride_factory: RideFactoryType,
+):
+    created = [ride_factory() for _ in range(3)]
+
+    response = test_client.get("/rides/export")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"] == NDJSON_MEDIA_TYPE
+    rows = _lines(response)
+    assert [row["id"] for row in rows] == [ride.id for ride in created]
+    assert rows[0]["code"] == created[0].code
+
+
+def test_export_participations_filters_on_updated_after(
+        test_client: TestClient,
+        session: Session,
+        test_ride: RideModel,
+):
+    for month in (1, 2, 3):
+        user = UserModel(username=f"export_user_{month}", password="password")
+        session.add(user)
+        session.flush()
+        session.add(ParticipationModel(
+            user_id=user.id,
+            ride_id=test_ride.id,
+            latitude=48.0,
+            longitude=11.0,
+            updated_at=datetime(2025, month, 1, tzinfo=timezone.utc),
+        ))
+    session.flush()
+
+    response = test_client.get(
+        "/participations/export",
+        params={"updated_after": datetime(2025, 1, 15, tzinfo=timezone.utc).isoformat()},
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    rows = _lines(response)
+    assert [datetime.fromisoformat(row["updated_at"]).month for row in rows] == [2, 3]
+
+
+def test_export_of_empty_table_is_empty(test_client: TestClient):
+    response = test_client.get("/participations/export")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text == ""
+
+
+def test_iter_rides_yields_bounded_batches(
+        session: Session,
+        ride_factory: RideFactoryType,
+):
+    for _ in range(5):
+        ride_factory()
+
+    batches = list(RideRepository(session=session).iter_rides(batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+from collections.abc import Generator
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import fixture, raises
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketDisconnect
+
+from app.config import Settings
+from app.live import LiveBroker, LiveMessage, LivePublisher, stream_sse
+from app.main import create_app
+from app.models import DbModel
+from app.schemas import UserResponse
+
+
+def _message(i: int) -> LiveMessage:
+    return LiveMessage.from_model("participation", UserResponse(id=i, username=f"user{i}"))
+
+
+def test_message_is_serialized_once_for_every_transport():
+    message = _message(1)
+
+    assert message.text == '{"id":1,"username":"user1"}'
+    assert message.sse == b'event: participation\ndata: {"id":1,"username":"user1"}\n\n'
+
+
+def test_fan_out_shares_one_message_and_drops_oldest():
+    async def scenario():
+        broker = LiveBroker(queue_size=2)
+        with broker.subscription(7) as fast, broker.subscription(7) as slow:
+            broker.publish(7, first := _message(1))
+            assert await fast.next() is first
+            broker.publish(7, _message(2))
+            broker.publish(7, _message(3))
+            broker.publish(8, _message(99))  # other ride
+
+            assert [(await slow.next()).text for _ in range(2)] == [_message(2).text, _message(3).text]
+            assert slow.dropped == 1
+            assert broker.stats() == {"channels": 1, "subscribers": 2, "published": 4}
+        assert broker.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_publish_from_worker_thread_reaches_the_loop():
+    async def scenario():
+        broker = LiveBroker(queue_size=4)
+        with broker.subscription(1) as subscription:
+            thread = threading.Thread(target=broker.publish, args=(1, _message(1)))
+            thread.start()
+            message = await asyncio.wait_for(subscription.next(), 1)
+            thread.join()
+        return message
+
+    assert asyncio.run(scenario()).text == _message(1).text
+
+
+def test_sse_stream_frames_messages_and_sends_keep_alives():
+    async def scenario():
+        broker = LiveBroker(queue_size=4)
+        stream = stream_sse(broker, 1, heartbeat_seconds=0.01)
+        chunks = [await anext(stream)]  # subscribes
+        chunks.append(await anext(stream))
+        broker.publish(1, _message(5))
+        chunks.append(await anext(stream))
+        await stream.aclose()
+        return chunks, broker.stats()["subscribers"]
+
+    chunks, subscribers = asyncio.run(scenario())
+    assert chunks == [b": connected\n\n", b": keep-alive\n\n", _message(5).sse]
+    assert subscribers == 0
+
+
+def test_publisher_waits_for_commit(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'live.db'}")
+    published: list[int] = []
+    broker = LiveBroker(queue_size=4)
+    broker.publish = lambda ride_id, message: published.append(ride_id)
+
+    with Session(bind=engine) as session:
+        with session.begin():
+            LivePublisher(broker, session).publish(1, UserResponse(id=1, username="a"))
+            assert published == []
+        assert published == [1]
+
+        session.begin()
+        LivePublisher(broker, session).publish(2, UserResponse(id=2, username="b"))
+        session.rollback()
+    engine.dispose()
+
+    assert published == [1]
+
+
+@fixture(scope="function")
+def live_client(tmp_path: Path) -> Generator[TestClient]:
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'live.db'}")
+    with TestClient(app=create_app(settings)) as test_client:
+        yield test_client
+
+
+def test_websocket_receives_participation_updates(live_client: TestClient):
+    credentials = {"username": "live_user", "password": "live_password"}
+    live_client.post("/users/", json=credentials)
+    token = live_client.post("/auth/login", data=credentials).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    ride = live_client.post(
+        "/rides/",
+        json={"title": "Live ride", "start_time": "2025-11-18T15:30:00+00:00"},
+        headers=headers,
+    ).json()
+
+    with live_client.websocket_connect(f"/rides/{ride['id']}/live/ws") as websocket:
+        participation = live_client.post(
+            "/participations/", json={"ride_code": ride["code"]}, headers=headers,
+        ).json()
+        assert websocket.receive_json() == participation
+
+        fix = {
+            "latitude": 48.1351,
+            "longitude": 11.582,
+            "updated_at": datetime(2026, 1, 1, 11, 0, tzinfo=timezone.utc).isoformat(),
+        }
+        updated = live_client.put(f"/participations/{participation['id']}", json=fix, headers=headers).json()
+        assert websocket.receive_json() == updated
+
+        live_client.post(
+            "/participations/locations",
+            json={"fixes": [{**fix, "participation_id": participation["id"], "latitude": 48.2,
+                             "updated_at": datetime(2026, 1, 1, 11, 1, tzinfo=timezone.utc).isoformat()}]},
+            headers=headers,
+        )
+        assert websocket.receive_json()["latitude"] == 48.2
+
+
+def test_live_endpoints_reject_unknown_rides(live_client: TestClient):
+    assert live_client.get("/rides/999/live").status_code == status.HTTP_404_NOT_FOUND
+    with raises(WebSocketDisconnect) as disconnect:
+        with live_client.websocket_connect("/rides/999/live/ws"):
+            pass
+    assert disconnect.value.code == status.WS_1008_POLICY_VIOLATION
@@ -0,0 +1,161 @@
+from datetime import datetime, timezone
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import MonkeyPatch, fixture
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.models import ParticipationModel, RideModel, UserModel
+from app.repositories import ParticipationRepository
+from tests.conftest import is_savepoint
+
+T0 = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def _fix(participation_id: int, minute: int, latitude: float = 48.0) -> dict:
+    return {
+        "participation_id": participation_id,
+        "latitude": latitude,
+        "longitude": 11.5,
+        "updated_at": T0.replace(minute=minute).isoformat(),
+    }
+
+
+@fixture(scope="function")
+def own_participation(
+        session: Session,
+        test_ride: RideModel,
+        auth_headers: dict[str, str],
+) -> ParticipationModel:
+    owner = session.query(UserModel).filter_by(username="auth_user").one()
+    participation = ParticipationModel(
+        user_id=owner.id, ride_id=test_ride.id, latitude=47.0, longitude=11.0, updated_at=T0.replace(minute=5),
+    )
+    session.add(participation)
+    session.flush()
+    return participation
+
+
+def test_batch_reports_each_fix(
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+        own_participation: ParticipationModel,
+        test_participation: ParticipationModel,
+):
+    fixes = [
+        _fix(own_participation.id, 10, latitude=48.1),
+        _fix(own_participation.id, 20, latitude=48.2),  # newest in the batch wins
+        _fix(own_participation.id, 1, latitude=40.0),  # older than the stored fix
+        _fix(test_participation.id, 30),
+        _fix(999_999, 30),
+    ]
+
+    response = test_client.post("/participations/locations", json={"fixes": fixes}, headers=auth_headers)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["stale", "applied", "stale", "forbidden", "not_found"]
+    assert [result["participation_id"] for result in results] == [fix["participation_id"] for fix in fixes]
+
+    session.expire_all()
+    stored = session.get(ParticipationModel, own_participation.id)
+    assert float(stored.latitude) == 48.2
+    assert stored.updated_at.replace(tzinfo=timezone.utc) == T0.replace(minute=20)
+    assert float(session.get(ParticipationModel, test_participation.id).latitude) == 48.1351
+
+
+def test_batch_reports_fix_overtaken_after_planning_as_stale(
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+        own_participation: ParticipationModel,
+        monkeypatch: MonkeyPatch,
+):
+    # The states are read before a concurrent request stores a newer fix.
+    read_states = ParticipationRepository.get_location_states
+
+    def states_then_newer_fix(self, *, participation_ids):
+        states = read_states(self, participation_ids=participation_ids)
+        self.session.execute(
+            update(ParticipationModel)
+            .where(ParticipationModel.id == own_participation.id)
+            .values(updated_at=T0.replace(minute=30)),
+        )
+        return states
+
+    monkeypatch.setattr(ParticipationRepository, "get_location_states", states_then_newer_fix)
+    response = test_client.post(
+        "/participations/locations",
+        json={"fixes": [_fix(own_participation.id, 20, latitude=48.2)]},
+        headers=auth_headers,
+    )
+
+    assert response.json()["results"][0]["status"] == "stale"
+    session.expire_all()
+    assert float(session.get(ParticipationModel, own_participation.id).latitude) == 47.0
+
+
+def test_batch_ignores_out_of_order_fixes(
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+        own_participation: ParticipationModel,
+):
+    response = test_client.post(
+        "/participations/locations",
+        json={"fixes": [_fix(own_participation.id, 5, latitude=10.0)]},  # same time as stored
+        headers=auth_headers,
+    )
+
+    assert response.json()["results"][0]["status"] == "stale"
+    session.expire_all()
+    assert float(session.get(ParticipationModel, own_participation.id).latitude) == 47.0
+
+
+def test_batch_uses_one_select_one_update_and_one_history_insert(
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+        own_participation: ParticipationModel,
+        ride_factory,
+):
+    owner_id = own_participation.user_id
+    participations = [own_participation]
+    for _ in range(4):
+        participation = ParticipationModel(user_id=owner_id, ride_id=ride_factory().id)
+        session.add(participation)
+        participations.append(participation)
+    session.flush()
+    test_client.get("/auth/me", headers=auth_headers)  # warm the token cache
+
+    statements: list[tuple[str, bool]] = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if not is_savepoint(statement):
+            statements.append((statement.split()[0], executemany))
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = test_client.post(
+            "/participations/locations",
+            json={"fixes": [_fix(participation.id, 30) for participation in participations]},
+            headers=auth_headers,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert {result["status"] for result in response.json()["results"]} == {"applied"}
+    # States, fixes, history; no table_versions row to queue on.
+    assert statements == [("SELECT", False), ("UPDATE", True), ("INSERT", True)]
+
+
+def test_batch_requires_auth_and_fixes(test_client: TestClient, auth_headers: dict[str, str]):
+    assert test_client.post("/participations/locations", json={"fixes": [_fix(1, 0)]}).status_code == (
+        status.HTTP_401_UNAUTHORIZED
+    )
+    response = test_client.post("/participations/locations", json={"fixes": []}, headers=auth_headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
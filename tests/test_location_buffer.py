@@ -0,0 +1,201 @@
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import mark, raises
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.location_buffer import BufferedParticipation, LocationBuffer, flush_location_buffer
+from app.locations import history_row, location_update
+from app.main import create_app
+from app.models import LocationHistoryModel, ParticipationModel
+
+START = datetime(2025, 11, 18, 15, 0, tzinfo=timezone.utc)
+
+
+def _fix(participation_id: int, seconds: int, latitude: float = 48.1) -> tuple:
+    return participation_id, latitude, 11.5, START + timedelta(seconds=seconds)
+
+
+def _put(buffer: LocationBuffer, *fixes: tuple) -> None:
+    buffer.put([location_update(*fix) for fix in fixes], [history_row(*fix) for fix in fixes])
+
+
+def test_buffer_keeps_the_newest_fix_and_every_history_row():
+    buffer = LocationBuffer(max_entries=100)
+    _put(buffer, _fix(1, 10, latitude=1.0), _fix(1, 30, latitude=3.0), _fix(1, 20, latitude=2.0), _fix(2, 5))
+
+    assert buffer.get(1).update["b_latitude"] == 3.0
+    assert len(buffer) == 4
+    # The ids taken: a fix older than the buffered one is not, nor one just as old.
+    assert buffer.put([location_update(*_fix(1, 25)), location_update(*_fix(2, 6))], []) == {2}
+    assert buffer.put([location_update(*_fix(1, 30, latitude=9.0))], []) == set()
+    assert buffer.get(1).update["b_latitude"] == 3.0
+    assert buffer.get(3) is None
+
+    merged, untouched = buffer.merge([
+        SimpleNamespace(id=1, latitude=0.0, updated_at=None, ride_id=7),
+        SimpleNamespace(id=3, latitude=0.0, updated_at=None, ride_id=7),
+    ])
+    assert isinstance(merged, BufferedParticipation)
+    assert (merged.latitude, merged.updated_at, merged.ride_id) == (3.0, START + timedelta(seconds=30), 7)
+    assert untouched.latitude == 0.0
+
+
+def test_failed_flush_puts_fixes_back_behind_newer_ones():
+    buffer = LocationBuffer(max_entries=100)
+    _put(buffer, _fix(1, 10, latitude=1.0))
+
+    with raises(RuntimeError):
+        with buffer.flushing() as (updates, history):
+            assert [update["b_latitude"] for update in updates] == [1.0]
+            assert buffer.get(1) is not None  # still visible while being written
+            _put(buffer, _fix(1, 20, latitude=2.0))
+            raise RuntimeError("database is locked")
+
+    assert buffer.get(1).update["b_latitude"] == 2.0
+    assert len(buffer) == 2
+    assert buffer.flushes == 0
+
+
+def _rider(client: TestClient) -> tuple[dict[str, str], int]:
+    credentials = {"username": "buffer_rider", "password": "buffer_password"}
+    client.post("/users/", json=credentials)
+    token = client.post("/auth/login", data=credentials).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    ride = client.post("/rides/", json={"title": "Buffered", "start_time": START.isoformat()}, headers=headers).json()
+    participation = client.post("/participations/", json={"ride_code": ride["code"]}, headers=headers).json()
+    return headers, participation["id"]
+
+
+def _stored(settings: Settings, participation_id: int) -> tuple[float | None, int]:
+    """The participation's latitude in the database and its history rows, read past the app."""
+    engine = create_engine(settings.database_url)
+    try:
+        with Session(engine) as session:
+            latitude = session.get(ParticipationModel, participation_id).latitude
+            history = session.scalar(
+                select(func.count()).where(LocationHistoryModel.participation_id == participation_id),
+            )
+    finally:
+        engine.dispose()
+    return None if latitude is None else float(latitude), history
+
+
+def _body(participation_id: int, seconds: int, latitude: float) -> dict:
+    _, latitude, longitude, updated_at = _fix(participation_id, seconds, latitude)
+    return {"latitude": latitude, "longitude": longitude, "updated_at": updated_at.isoformat()}
+
+
+@mark.parametrize("database_async", [False, True], ids=["sync", "async"])
+def test_updates_are_buffered_merged_into_reads_and_flushed(tmp_path: Path, database_async: bool):
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path / 'buffer.db'}",
+        database_async=database_async,
+        location_write_behind=True,
+        location_flush_ms=60_000,  # flushed by hand below
+    )
+    with TestClient(app=create_app(settings)) as client:
+        buffer: LocationBuffer = client.app.state.location_buffer
+        headers, participation_id = _rider(client)
+
+        for seconds, latitude in ((1, 48.1), (2, 48.2)):
+            response = client.put(
+                f"/participations/{participation_id}", json=_body(participation_id, seconds, latitude), headers=headers,
+            )
+            assert response.status_code == status.HTTP_200_OK
+        batch = client.post("/participations/locations", json={"fixes": [
+            {"participation_id": participation_id, **_body(participation_id, 3, 48.3)},
+            {"participation_id": participation_id, **_body(participation_id, 0, 48.0)},
+        ]}, headers=headers)
+        assert [result["status"] for result in batch.json()["results"]] == ["applied", "stale"]
+
+        # Nothing written yet, but every read sees the newest fix.
+        assert _stored(settings, participation_id) == (None, 0)
+        read = client.get(f"/participations/{participation_id}")
+        assert read.json()["latitude"] == 48.3
+        assert client.get("/participations/").json()["items"][0]["latitude"] == 48.3
+        etag = read.headers["ETag"]
+        assert client.get(f"/participations/{participation_id}", headers={"If-None-Match": etag}).status_code == 304
+
+        assert flush_location_buffer(buffer, client.app.state.database_engine) == 1
+        assert _stored(settings, participation_id) == (48.3, 4)
+        after_flush = client.get(f"/participations/{participation_id}", headers={"If-None-Match": etag})
+        assert after_flush.status_code == status.HTTP_200_OK
+        assert after_flush.json()["latitude"] == 48.3
+
+        client.put(
+            f"/participations/{participation_id}", json=_body(participation_id, 4, 48.4), headers=headers,
+        ).raise_for_status()
+    # Shutdown flushes what is left.
+    assert _stored(settings, participation_id) == (48.4, 5)
+
+
+def test_flush_runs_early_once_the_buffer_is_full(tmp_path: Path):
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path / 'buffer.db'}",
+        location_write_behind=True,
+        location_flush_ms=60_000,
+        location_flush_entries=3,
+    )
+    with TestClient(app=create_app(settings)) as client:
+        buffer: LocationBuffer = client.app.state.location_buffer
+        headers, participation_id = _rider(client)
+        for seconds in range(3):
+            client.put(
+                f"/participations/{participation_id}", json=_body(participation_id, seconds, 48.0), headers=headers,
+            ).raise_for_status()
+
+        deadline = time.monotonic() + 5
+        while buffer.flushes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert buffer.flushes == 1
+        assert _stored(settings, participation_id) == (48.0, 3)
+
+
+def test_flush_skips_participations_deleted_meanwhile(tmp_path: Path):
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'buffer.db'}", location_write_behind=True)
+    with TestClient(app=create_app(settings)) as client:
+        engine = client.app.state.database_engine
+        buffer: LocationBuffer = client.app.state.location_buffer
+        headers, participation_id = _rider(client)
+        _put(buffer, _fix(participation_id, 1))
+        with Session(engine) as session, session.begin():
+            session.execute(delete(ParticipationModel).where(ParticipationModel.id == participation_id))
+
+        assert flush_location_buffer(buffer, engine) == 0
+        assert len(buffer) == 0
+
+
+@mark.parametrize("write_behind", [False, True], ids=["direct", "write_behind"])
+@mark.parametrize("database_async", [False, True], ids=["sync", "async"])
+def test_an_older_put_does_not_move_the_participation(tmp_path: Path, database_async: bool, write_behind: bool):
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path / 'buffer.db'}",
+        database_async=database_async,
+        location_write_behind=write_behind,
+        location_flush_ms=60_000,
+    )
+    with TestClient(app=create_app(settings)) as client:
+        headers, participation_id = _rider(client)
+        broker = client.app.state.live_broker
+        url = f"/participations/{participation_id}"
+        client.put(url, json=_body(participation_id, 2, 48.2), headers=headers).raise_for_status()
+        if write_behind:
+            flush_location_buffer(client.app.state.location_buffer, client.app.state.database_engine)
+        published = broker.published
+
+        # Older than the stored fix, then older than and as old as a buffered one.
+        for seconds, latitude in ((1, 48.1), (3, 48.3), (2, 48.2), (3, 49.0)):
+            response = client.put(url, json=_body(participation_id, seconds, latitude), headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+        assert response.json()["latitude"] == 48.3
+        assert client.get(url).json()["latitude"] == 48.3
+        assert broker.published == published + 1
+    # Every fix is in the history either way; the resent one (2s) once.
+    assert _stored(settings, participation_id) == (48.3, 3)
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import fixture
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.history import compact_location_history
+from app.locations import history_row, track_bucket_seconds
+from app.models import DbModel, LocationHistoryModel, ParticipationModel, RideModel, UserModel
+from app.repositories import LocationHistoryRepository
+
+T0 = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def _history(session: Session, participation_id: int) -> list[LocationHistoryModel]:
+    statement = (
+        select(LocationHistoryModel)
+        .where(LocationHistoryModel.participation_id == participation_id)
+        .order_by(LocationHistoryModel.recorded_at)
+    )
+    return list(session.scalars(statement))
+
+
+@fixture(scope="function")
+def own_participation(
+        session: Session,
+        test_ride: RideModel,
+        auth_headers: dict[str, str],
+) -> ParticipationModel:
+    owner = session.query(UserModel).filter_by(username="auth_user").one()
+    participation = ParticipationModel(user_id=owner.id, ride_id=test_ride.id)
+    session.add(participation)
+    session.flush()
+    return participation
+
+
+def test_put_and_batch_append_to_history(
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+        own_participation: ParticipationModel,
+):
+    test_client.put(
+        f"/participations/{own_participation.id}",
+        json={"latitude": 48.0, "longitude": 11.0, "updated_at": T0.replace(minute=10).isoformat()},
+        headers=auth_headers,
+    )
+    fixes = [
+        {"participation_id": own_participation.id, "latitude": 48.2, "longitude": 11.2,
+         "updated_at": T0.replace(minute=20).isoformat()},
+        {"participation_id": own_participation.id, "latitude": 48.1, "longitude": 11.1,
+         "updated_at": T0.replace(minute=15).isoformat()},  # stale, still part of the route
+    ]
+    test_client.post("/participations/locations", json={"fixes": fixes}, headers=auth_headers)
+    test_client.post("/participations/locations", json={"fixes": fixes}, headers=auth_headers)  # resent
+
+    history = _history(session, own_participation.id)
+    assert [row.recorded_at.minute for row in history] == [10, 15, 20]
+    assert [row.latitude for row in history] == [48.0, 48.1, 48.2]
+
+
+def test_track_is_downsampled_to_max_points(
+        test_client: TestClient,
+        session: Session,
+        own_participation: ParticipationModel,
+):
+    LocationHistoryRepository(session=session).record_fixes([
+        history_row(own_participation.id, 48.0 + i / 1000, 11.0, T0 + timedelta(seconds=i))
+        for i in range(600)
+    ])
+
+    full = test_client.get(f"/participations/{own_participation.id}/track", params={"max_points": 5000})
+    sampled = test_client.get(f"/participations/{own_participation.id}/track", params={"max_points": 10})
+
+    assert full.json()["bucket_seconds"] == 1
+    assert len(full.json()["points"]) == 600
+    body = sampled.json()
+    assert body["bucket_seconds"] == track_bucket_seconds(T0, T0 + timedelta(seconds=599), 10)
+    assert 1 < len(body["points"]) <= 10
+    assert sum(point["fixes"] for point in body["points"]) == 600
+    assert body["points"][0]["recorded_at"] == T0.isoformat()
+
+
+def test_track_filters_by_time_range(
+        test_client: TestClient,
+        session: Session,
+        own_participation: ParticipationModel,
+):
+    LocationHistoryRepository(session=session).record_fixes([
+        history_row(own_participation.id, 48.0, 11.0, T0 + timedelta(minutes=i)) for i in range(10)
+    ])
+
+    response = test_client.get(
+        f"/participations/{own_participation.id}/track",
+        params={"from": (T0 + timedelta(minutes=3)).isoformat(), "to": (T0 + timedelta(minutes=5)).isoformat()},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [point["recorded_at"] for point in response.json()["points"]] == [
+        (T0 + timedelta(minutes=i)).isoformat() for i in (3, 4, 5)
+    ]
+
+
+def test_track_of_unknown_or_silent_participation(
+        test_client: TestClient,
+        own_participation: ParticipationModel,
+):
+    assert test_client.get("/participations/999999/track").status_code == status.HTTP_404_NOT_FOUND
+    response = test_client.get(f"/participations/{own_participation.id}/track")
+    assert response.json()["points"] == []
+
+
+def test_compaction_rolls_old_fixes_into_weighted_buckets(
+        session: Session,
+        own_participation: ParticipationModel,
+):
+    repository = LocationHistoryRepository(session=session)
+    repository.record_fixes([
+        history_row(own_participation.id, 48.0 + i, 11.0, T0 + timedelta(seconds=10 * i)) for i in range(12)
+    ] + [history_row(own_participation.id, 50.0, 12.0, T0 + timedelta(hours=2))])
+
+    removed = repository.compact(older_than=T0 + timedelta(hours=1), bucket_seconds=60)
+
+    assert removed == 12
+    history = _history(session, own_participation.id)
+    assert [(row.recorded_at.replace(tzinfo=timezone.utc), row.fixes, row.resolution_seconds) for row in history] == [
+        (T0, 6, 60), (T0 + timedelta(minutes=1), 6, 60), (T0 + timedelta(hours=2), 1, 0),
+    ]
+    assert [row.latitude for row in history] == [50.5, 56.5, 50.0]
+
+    # Compacting again to a coarser bucket keeps the fix-weighted average.
+    assert repository.compact(older_than=T0 + timedelta(hours=1), bucket_seconds=60) == 0
+    assert repository.compact(older_than=T0 + timedelta(hours=1), bucket_seconds=3600) == 2
+    session.expire_all()
+    rolled = _history(session, own_participation.id)[0]
+    assert (rolled.fixes, rolled.latitude) == (12, 53.5)
+    assert session.scalar(select(func.count()).select_from(LocationHistoryModel)) == 2
+
+
+def test_compaction_job_commits_its_own_transaction(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    DbModel.metadata.create_all(engine)
+    with Session(bind=engine) as session, session.begin():
+        LocationHistoryRepository(session=session).record_fixes([
+            history_row(1, 48.0, 11.0, T0 + timedelta(seconds=i)) for i in range(30)
+        ])
+
+    assert compact_location_history(engine, retention=timedelta(hours=1), bucket_seconds=60) == 30
+    with Session(bind=engine) as session:
+        assert session.scalar(select(func.count()).select_from(LocationHistoryModel)) == 1
+    engine.dispose()
@@ -0,0 +1,92 @@
+from collections.abc import Generator
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import fixture, mark
+
+from app.main import create_app
+from app.metrics import PROMETHEUS_MEDIA_TYPE, UNMATCHED_ROUTE, Histogram, Metrics, RequestStats
+from tests.conftest import app_settings
+
+
+def _client(tmp_path: Path, **overrides) -> TestClient:
+    return TestClient(app=create_app(app_settings(database_url=f"sqlite:///{tmp_path / 'metrics.db'}", **overrides)))
+
+
+@fixture(scope="function", params=[False, True], ids=["sync", "async"])
+def metrics_client(request, tmp_path: Path) -> Generator[TestClient]:
+    with _client(tmp_path, database_async=request.param, metrics_enabled=True) as test_client:
+        yield test_client
+
+
+def _create_ride(client: TestClient) -> dict:
+    client.post("/users/", json={"username": "metrics_user", "password": "metrics_password"})
+    token = client.post(
+        "/auth/login", data={"username": "metrics_user", "password": "metrics_password"},
+    ).json()["access_token"]
+    response = client.post(
+        "/rides/",
+        json={"title": "Measured", "start_time": datetime(2025, 11, 18, tzinfo=timezone.utc).isoformat()},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    return response.json()
+
+
+def test_requests_are_recorded_per_route_template(metrics_client: TestClient):
+    ride = _create_ride(metrics_client)
+    metrics_client.get(f"/rides/{ride['id']}")
+    metrics_client.get("/rides/999999")
+    metrics_client.get("/no/such/page")
+
+    metrics: Metrics = metrics_client.app.state.metrics
+    read = metrics.route("GET", "/rides/{id}")
+    assert read.statuses == {200: 1, 404: 1}
+    assert read.latency.count == 2
+    assert read.queries.count == 2 and read.queries.sum >= 2
+    assert read.db_time.sum > 0
+    assert metrics.route("GET", UNMATCHED_ROUTE).statuses == {404: 1}
+    assert metrics.route("GET", UNMATCHED_ROUTE).queries.sum == 0
+    assert metrics.in_progress == 0
+
+
+def test_metrics_endpoint_renders_prometheus_text(metrics_client: TestClient):
+    ride = _create_ride(metrics_client)
+    metrics_client.get(f"/rides/{ride['id']}")
+
+    response = metrics_client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == PROMETHEUS_MEDIA_TYPE
+    lines = response.text.splitlines()
+    assert "http_requests_in_progress 1" in lines  # the /metrics request itself
+    assert 'http_requests_total{method="GET",route="/rides/{id}",status="200"} 1' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/rides/{id}",le="+Inf"} 1' in lines
+    assert 'http_request_db_queries_count{method="POST",route="/rides/"} 1' in lines
+    assert "# TYPE http_request_db_seconds histogram" in lines
+
+
+def test_metrics_are_off_by_default(tmp_path: Path):
+    with _client(tmp_path) as test_client:
+        assert test_client.app.state.metrics is None
+        assert test_client.get("/metrics").status_code == status.HTTP_404_NOT_FOUND
+
+
+@mark.parametrize("value, bucket", [(0, "0"), (1, "1"), (4, "5"), (1000, "+Inf")])
+def test_histogram_buckets_are_upper_bounds(value: float, bucket: str):
+    histogram = Histogram((0, 1, 2, 5))
+    histogram.observe(value)
+
+    cumulative = dict(histogram.cumulative())
+    first = next(bound for bound, total in histogram.cumulative() if total)
+    assert first == bucket
+    assert cumulative["+Inf"] == histogram.count == 1
+
+
+def test_render_escapes_label_values():
+    metrics = Metrics()
+    metrics.observe("GET", 'a"b', 200, 0.01, RequestStats(queries=3, db_seconds=0.002))
+
+    assert 'http_requests_total{method="GET",route="a\\"b",status="200"} 1' in metrics.render()
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from pytest import LogCaptureFixture, raises
+from sqlalchemy import create_engine, inspect, text
+
+from app.geo import grid_cell
+from app.migrations import DuplicateRowsError, hash_plaintext_passwords, upgrade_schema
+from app.passwords import NO_PASSWORD, PasswordHasher
+
+# Schema of a ride.db created before the lookup indexes existed.
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(25) NOT NULL UNIQUE, password VARCHAR(255) NOT NULL)",
+    "CREATE TABLE rides (id INTEGER PRIMARY KEY, code VARCHAR(6) NOT NULL UNIQUE, title VARCHAR(100) NOT NULL, "
+    "description VARCHAR(255), start_time DATETIME NOT NULL, created_by_user_id INTEGER NOT NULL REFERENCES users (id), "
+    "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, is_active BOOLEAN NOT NULL)",
+    "CREATE TABLE participations (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users (id), "
+    "ride_id INTEGER NOT NULL REFERENCES rides (id), latitude NUMERIC(10, 8), longitude NUMERIC(10, 8), updated_at DATETIME)",
+]
+
+
+def _legacy_database(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO users (id, username, password) VALUES (1, 'u', 'p')"))
+        connection.execute(text(
+            "INSERT INTO rides (id, code, title, start_time, created_by_user_id, is_active) "
+            "VALUES (1, 'ABC123', 't', '2025-01-01 00:00:00', 1, 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO participations (id, user_id, ride_id, latitude, longitude) "
+            "VALUES (1, 1, 1, 1.0, NULL), (2, 1, 1, 2.0, 3.0)"
+        ))
+    return engine
+
+
+def test_upgrade_schema_refuses_to_delete_duplicates_implicitly(tmp_path: Path):
+    engine = _legacy_database(tmp_path / "legacy.db")
+
+    with raises(DuplicateRowsError, match="--drop-duplicates"):
+        upgrade_schema(engine)
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM participations")).scalar_one() == 2
+    engine.dispose()
+
+
+def test_upgrade_schema_adds_indexes_to_legacy_database(tmp_path: Path, caplog: LogCaptureFixture):
+    engine = _legacy_database(tmp_path / "legacy.db")
+
+    with caplog.at_level(logging.WARNING, logger="app.migrations"):
+        created = upgrade_schema(engine, drop_duplicates=True)
+
+    assert set(created) == {
+        "users.token_version",
+        "ix_users_token_version_revoked",
+        "rides.version",
+        "participations.grid_cell",
+        "participations.version",
+        "ix_participations_ride_id_grid_cell",
+        "ix_rides_created_by_user_id",
+        "ix_rides_start_time",
+        "ix_participations_ride_id",
+        "uq_participations_user_id_ride_id",
+    }
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT id, latitude FROM participations")).all()
+    assert rows == [(2, 2.0)]  # the newest duplicate is kept
+    assert "deleted 1 duplicate rows from participations" in caplog.text
+    assert "ids [1]" in caplog.text
+
+    assert upgrade_schema(engine) == []
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT token_version FROM users")).scalar_one() == 0
+        assert connection.execute(text("SELECT password FROM users")).scalar_one() == "p"  # left to the job below
+        assert connection.execute(text("SELECT grid_cell FROM participations")).scalar_one() == grid_cell(2.0, 3.0)
+    index_names = {index["name"] for index in inspect(engine).get_indexes("participations")}
+    assert "uq_participations_user_id_ride_id" in index_names
+    engine.dispose()
+
+
+def test_plaintext_passwords_are_hashed_once_in_chunks(tmp_path: Path, caplog: LogCaptureFixture):
+    engine = create_engine(f"sqlite:///{tmp_path / 'passwords.db'}")
+    hasher = PasswordHasher(n=16)
+    hashed = hasher.hash("already")
+    upgrade_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, username, password) VALUES (:id, :username, :password)"), [
+            {"id": 1, "username": "plain", "password": "plain_pw"},
+            {"id": 2, "username": "hashed", "password": hashed},
+            {"id": 3, "username": "seeded", "password": NO_PASSWORD},
+            {"id": 4, "username": "plain_too", "password": "other_pw"},
+            {"id": 5, "username": "plain_last", "password": "last_pw"},
+        ])
+
+    with caplog.at_level(logging.WARNING, logger="app.migrations"):
+        assert asyncio.run(hash_plaintext_passwords(engine, hasher, chunk_size=2)) == 3
+        assert asyncio.run(hash_plaintext_passwords(engine, hasher, chunk_size=2)) == 0
+    hasher.shutdown()
+
+    with engine.connect() as connection:
+        stored = dict(connection.execute(text("SELECT username, password FROM users")).all())
+    engine.dispose()
+    assert hasher.verify("plain_pw", stored["plain"])
+    assert hasher.verify("other_pw", stored["plain_too"])
+    assert hasher.verify("last_pw", stored["plain_last"])
+    assert stored["hashed"] == hashed
+    assert stored["seeded"] == NO_PASSWORD
+    assert caplog.text.count("hashed 3 plaintext passwords") == 1
+
+
+def test_a_password_changed_while_hashing_is_kept(tmp_path: Path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'passwords.db'}")
+    hasher = PasswordHasher(n=16)
+    upgrade_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, username, password) VALUES (1, 'plain', 'plain_pw')"))
+    new_password = hasher.hash("new_pw")
+    hash_async = hasher.hash_async
+
+    async def hash_then_change(password: str) -> str:
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE users SET password = :password"), {"password": new_password})
+        return await hash_async(password)
+
+    monkeypatch.setattr(hasher, "hash_async", hash_then_change)
+    assert asyncio.run(hash_plaintext_passwords(engine, hasher)) == 0
+    hasher.shutdown()
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT password FROM users")).scalar_one() == new_password
+    engine.dispose()
@@ -0,0 +1,121 @@
+import math
+import random
+from datetime import datetime, timezone
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import fixture, mark
+from sqlalchemy.orm import Session
+
+from app.geo import EARTH_RADIUS_M, cell_ranges, grid_cell, haversine_m
+from app.models import ParticipationModel, RideModel, UserModel
+
+MUNICH = (48.1351, 11.582)
+
+
+def _offset(origin: tuple[float, float], north_m: float, east_m: float) -> tuple[float, float]:
+    latitude = origin[0] + math.degrees(north_m / EARTH_RADIUS_M)
+    longitude = origin[1] + math.degrees(east_m / (EARTH_RADIUS_M * math.cos(math.radians(origin[0]))))
+    return latitude, longitude
+
+
+def _covered(cell: int, ranges: list[tuple[int, int]]) -> bool:
+    return any(low <= cell <= high for low, high in ranges)
+
+
+def test_haversine_matches_known_distance():
+    # Munich - Berlin, about 504 km.
+    assert round(haversine_m(*MUNICH, [(52.52, 13.405)])[0] / 1000) == 504
+    assert haversine_m(*MUNICH, [MUNICH]) == [0.0]
+
+
+@mark.parametrize("origin", [MUNICH, (-33.87, 151.21), (0.0, 179.999), (64.5, -179.99), (89.99, 0.0)])
+def test_cell_ranges_cover_every_point_within_radius(origin: tuple[float, float]):
+    generator = random.Random(7)
+    radius_m = 3_000
+    ranges = cell_ranges(*origin, radius_m)
+    for _ in range(500):
+        distance, bearing = radius_m * math.sqrt(generator.random()), generator.uniform(0, 2 * math.pi)
+        latitude, longitude = _offset(origin, distance * math.cos(bearing), distance * math.sin(bearing))
+        latitude = max(-90.0, min(90.0, latitude))
+        longitude = (longitude + 180) % 360 - 180
+        assert _covered(grid_cell(latitude, longitude), ranges), (latitude, longitude)
+
+
+def test_cell_ranges_stay_small():
+    assert len(cell_ranges(*MUNICH, 100)) <= 2
+    assert len(cell_ranges(0.0, 179.999, 1_000)) <= 4  # split at the antimeridian
+
+
+@fixture(scope="function")
+def riders(session: Session, test_ride: RideModel) -> dict[str, ParticipationModel]:
+    offsets = {"here": (0, 0), "near": (300, 400), "edge": (0, 990), "far": (3000, 0), "corner": (800, 800)}
+    participations = {}
+    for name, (north_m, east_m) in offsets.items():
+        user = UserModel(username=f"nearby_{name}", password="password")
+        session.add(user)
+        session.flush()
+        latitude, longitude = _offset(MUNICH, north_m, east_m)
+        participations[name] = ParticipationModel(
+            user_id=user.id, ride_id=test_ride.id, latitude=latitude, longitude=longitude,
+            grid_cell=grid_cell(latitude, longitude),
+        )
+    session.add_all(participations.values())
+    session.flush()
+    return participations
+
+
+def test_nearby_returns_riders_within_radius_nearest_first(
+        test_client: TestClient,
+        test_ride: RideModel,
+        riders: dict[str, ParticipationModel],
+):
+    response = test_client.get(
+        f"/rides/{test_ride.id}/nearby", params={"lat": MUNICH[0], "lon": MUNICH[1], "radius_m": 1000},
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    body = response.json()
+    # "corner" is in a candidate cell but 1131 m away.
+    assert [item["id"] for item in body] == [riders[name].id for name in ("here", "near", "edge")]
+    assert [round(item["distance_m"]) for item in body] == [0, 500, 990]
+
+
+def test_nearby_follows_location_updates(
+        test_client: TestClient,
+        session: Session,
+        test_ride: RideModel,
+        auth_headers: dict[str, str],
+):
+    owner = session.query(UserModel).filter_by(username="auth_user").one()
+    participation = ParticipationModel(user_id=owner.id, ride_id=test_ride.id)
+    session.add(participation)
+    session.flush()
+    params = {"lat": MUNICH[0], "lon": MUNICH[1], "radius_m": 500}
+    moved_at = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+    test_client.put(
+        f"/participations/{participation.id}",
+        json={"latitude": MUNICH[0], "longitude": MUNICH[1], "updated_at": moved_at.isoformat()},
+        headers=auth_headers,
+    )
+    assert [item["id"] for item in test_client.get(f"/rides/{test_ride.id}/nearby", params=params).json()] == [
+        participation.id
+    ]
+
+    test_client.post(
+        "/participations/locations",
+        json={"fixes": [{"participation_id": participation.id, "latitude": 52.52, "longitude": 13.405,
+                         "updated_at": moved_at.replace(hour=11).isoformat()}]},
+        headers=auth_headers,
+    )
+    assert test_client.get(f"/rides/{test_ride.id}/nearby", params=params).json() == []
+    session.expire_all()
+    assert session.get(ParticipationModel, participation.id).grid_cell == grid_cell(52.52, 13.405)
+
+
+def test_nearby_validates_ride_and_radius(test_client: TestClient, test_ride: RideModel):
+    params = {"lat": MUNICH[0], "lon": MUNICH[1], "radius_m": 1000}
+    assert test_client.get("/rides/999999/nearby", params=params).status_code == status.HTTP_404_NOT_FOUND
+    response = test_client.get(f"/rides/{test_ride.id}/nearby", params={**params, "radius_m": 10**6})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
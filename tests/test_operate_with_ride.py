@@ -62,7 +62,7 @@ def test_get_all_rides_success(
     response = test_client.get("/rides/")
     assert response.status_code == status.HTTP_200_OK
     
-    data_response = response.json()
+    data_response = response.json()["items"]
     assert isinstance(data_response, list)
     assert len(data_response) == count_ride
 
@@ -246,6 +246,6 @@ def test_get_all_rides_return_empty_list_when_none_exsist(
     response = test_client.get(f"/rides/")
     assert response.status_code == status.HTTP_200_OK
 
-    assert response.json() == []
+    assert response.json() == {"items": [], "next_cursor": None}
 
 
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models import UserModel, RideModel, ParticipationModel
+from app.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from tests.conftest import RideFactoryType
+
+
+def _walk(test_client: TestClient, url: str, limit: int) -> list[list[dict]]:
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        response = test_client.get(url, params=params)
+        assert response.status_code == status.HTTP_200_OK, response.text
+        data = response.json()
+        pages.append(data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    start_time = datetime(2025, 11, 18, 15, 30)
+    cursor = encode_cursor(start_time, 42)
+    assert decode_cursor(cursor, datetime, int) == (start_time, 42)
+
+
+def test_get_rides_pages_in_start_time_order(
+        test_client: TestClient,
+        ride_factory: RideFactoryType,
+):
+    base = datetime(2025, 11, 18, 15, 30, tzinfo=timezone.utc)
+    # Two rides share a start time so the id tie-breaker is exercised.
+    offsets = [3, 1, 1, 0, 2]
+    created = [ride_factory(start_time=base + timedelta(hours=h)) for h in offsets]
+
+    pages = _walk(test_client, "/rides/", limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    returned = [ride for page in pages for ride in page]
+    expected = sorted(created, key=lambda ride: (ride.start_time, ride.id))
+    assert [ride["id"] for ride in returned] == [ride.id for ride in expected]
+
+
+def test_get_users_and_participations_paginate_by_id(
+        test_client: TestClient,
+        session: Session,
+        test_ride: RideModel,
+):
+    users = [UserModel(username=f"page_user_{i}", password="password") for i in range(5)]
+    session.add_all(users)
+    session.flush()
+    session.add_all(ParticipationModel(user_id=user.id, ride_id=test_ride.id) for user in users)
+    session.flush()
+
+    user_pages = _walk(test_client, "/users/", limit=2)
+    user_ids = [user["id"] for page in user_pages for user in page]
+    assert user_ids == sorted(user_ids)
+    assert len(user_ids) == len(set(user_ids)) == 6  # plus the ride organizer
+
+    participation_pages = _walk(test_client, "/participations/", limit=3)
+    assert [len(page) for page in participation_pages] == [3, 2]
+
+
+def test_list_limit_is_capped(test_client: TestClient):
+    response = test_client.get("/rides/", params={"limit": MAX_PAGE_SIZE + 1})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+def test_list_rejects_invalid_cursor(test_client: TestClient):
+    response = test_client.get("/participations/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
@@ -47,7 +47,7 @@ def test_get_participation_by_id_success(
         test_participation: ParticipationModel,
 ):
     participation_response = ParticipationResponse.model_validate(test_participation)
-    expected_response = participation_response.model_dump()
+    expected_response = participation_response.model_dump(mode="json")
 
     response = test_client.get(f"/participations/{test_participation.id}")
     assert response.status_code == status.HTTP_200_OK, response.text
@@ -136,4 +136,17 @@ def test_update_participation_by_id_success(
 
    
 
-    
\ No newline at end of file
+    
+def test_create_participation_twice_returns_409_conflict(
+        test_client: TestClient,
+        test_ride: RideModel,
+        auth_headers: dict[str, str],
+):
+    payload = {"ride_code": test_ride.code}
+
+    first_response = test_client.post("/participations/", json=payload, headers=auth_headers)
+    assert first_response.status_code == status.HTTP_201_CREATED, first_response.text
+
+    second_response = test_client.post("/participations/", json=payload, headers=auth_headers)
+    assert second_response.status_code == status.HTTP_409_CONFLICT, second_response.text
+    assert second_response.json() == {"detail": "Already participating in this ride"}
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.main import create_app
+from app.migrations import upgrade_schema
+from app.models import UserModel
+from app.passwords import NO_PASSWORD, PasswordHasher, is_plaintext
+from tests.conftest import app_settings
+
+
+def test_hash_round_trip():
+    hasher = PasswordHasher(n=16)
+    stored = hasher.hash("secret")
+
+    assert stored.startswith("scrypt$16$8$1$")
+    assert stored != hasher.hash("secret")  # salted
+    assert hasher.verify("secret", stored)
+    assert not hasher.verify("Secret", stored)
+    assert not hasher.needs_rehash(stored)
+
+
+def test_cost_change_needs_rehash():
+    stored = PasswordHasher(n=16).hash("secret")
+    stronger = PasswordHasher(n=32)
+
+    assert stronger.verify("secret", stored)
+    assert stronger.needs_rehash(stored)
+
+
+def test_only_hashes_verify():
+    hasher = PasswordHasher(n=16)
+    hasher.verify("warm-up", None)  # creates the dummy hash
+    derived: list[str] = []
+    original = hasher._derive
+
+    def recording_derive(password: str, *args) -> bytes:
+        derived.append(password)
+        return original(password, *args)
+
+    hasher._derive = recording_derive
+    assert not hasher.verify("legacy", "legacy")
+    assert not hasher.verify("!", NO_PASSWORD)
+    assert not hasher.verify("secret", None)
+    # Each miss still pays for one derivation, like a wrong password.
+    assert derived == ["legacy", "!", "secret"]
+    assert is_plaintext("legacy")
+    assert not is_plaintext(NO_PASSWORD + "seeded")
+    assert not is_plaintext(hasher.hash("secret"))
+
+
+def test_async_hashing_runs_on_the_hasher_pool():
+    hasher = PasswordHasher(n=16, workers=1)
+    threads: list[str] = []
+    original = hasher.hash
+
+    def recording_hash(password: str) -> str:
+        threads.append(threading.current_thread().name)
+        return original(password)
+
+    hasher.hash = recording_hash
+    asyncio.run(hasher.hash_async("secret"))
+    hasher.shutdown()
+
+    assert threads[0].startswith("password-hash")
+
+
+def test_register_stores_a_hash(test_client: TestClient, session: Session):
+    response = test_client.post("/users/", json={"username": "hashed_user", "password": "hashed_pw"})
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+
+    stored = session.get(UserModel, response.json()["id"]).password
+    assert stored.startswith("scrypt$")
+    login = test_client.post("/auth/login", data={"username": "hashed_user", "password": "hashed_pw"})
+    assert login.status_code == status.HTTP_200_OK
+
+
+def test_login_rehashes_outdated_password(app: FastAPI, test_client: TestClient, session: Session):
+    user = UserModel(username="legacy_user", password=PasswordHasher(n=16).hash("legacy_pw"))
+    session.add(user)
+    session.flush()
+
+    response = test_client.post("/auth/login", data={"username": "legacy_user", "password": "legacy_pw"})
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    session.refresh(user)
+    assert not app.state.password_hasher.needs_rehash(user.password)
+    assert app.state.password_hasher.verify("legacy_pw", user.password)
+
+
+def test_each_app_start_gets_its_own_hasher(tmp_path: Path):
+    app = create_app(app_settings(database_url=f"sqlite:///{tmp_path / 'restart.db'}", password_scrypt_n=16))
+    for username in ("first", "second"):  # the first shutdown stops the first hasher's pool
+        with TestClient(app=app) as client:
+            response = client.post("/users/", json={"username": username, "password": "restarted_pw"})
+            assert response.status_code == status.HTTP_201_CREATED, response.text
+
+
+def test_plaintext_passwords_are_hashed_after_startup(tmp_path: Path):
+    settings = app_settings(database_url=f"sqlite:///{tmp_path / 'legacy.db'}", password_scrypt_n=16)
+    engine = create_engine(settings.database_url)
+    upgrade_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (username, password) VALUES ('legacy', 'legacy_pw')"))
+
+    with TestClient(app=create_app(settings)) as client:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            login = client.post("/auth/login", data={"username": "legacy", "password": "legacy_pw"})
+            if login.status_code == status.HTTP_200_OK:
+                break
+            time.sleep(0.01)
+        assert login.status_code == status.HTTP_200_OK
+    with engine.connect() as connection:
+        assert not is_plaintext(connection.execute(text("SELECT password FROM users")).scalar_one())
+    engine.dispose()
@@ -0,0 +1,178 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from pytest import LogCaptureFixture, fixture, mark, raises
+from sqlalchemy.orm import Session
+
+from app.models import ParticipationModel, RideModel, UserModel
+from app.schemas import RideResponse, UserResponse
+from tests.conftest import InsertRowsType, hashed_password
+
+# Every row list below is larger than any budget, so a per-row query shows up.
+ROWS = 12
+
+
+@dataclass(frozen=True)
+class Call:
+    method: str
+    path: str  # formatted with the ids of the `world` fixture
+    budget: int
+    json: dict | None = None
+    data: dict | None = None
+    params: dict = field(default_factory=dict)
+    status: int = status.HTTP_200_OK
+
+
+START = datetime(2025, 11, 18, 15, 30, tzinfo=timezone.utc).isoformat()
+FIX = {"latitude": 48.1, "longitude": 11.5, "updated_at": "2025-11-18T16:00:00+00:00"}
+
+# One entry per HTTP route in app/routers.py. The live streams are left out:
+# they look the ride up in a short session of their own and then hold none.
+CALLS = {
+    "create user": Call("POST", "/users/", 2, json={"username": "budget_new", "password": "secret"},
+                        status=status.HTTP_201_CREATED),
+    "read user": Call("GET", "/users/{user_id}", 1),
+    "list users": Call("GET", "/users/", 1, params={"limit": 100}),
+    "login": Call("POST", "/auth/login", 1, data={"username": "budget_owner", "password": "budget_password"}),
+    "me": Call("GET", "/auth/me", 1),
+    "revoke": Call("POST", "/auth/revoke", 2, status=status.HTTP_204_NO_CONTENT),
+    "create ride": Call("POST", "/rides/", 3, json={"title": "Budget", "start_time": START},
+                        status=status.HTTP_201_CREATED),
+    "list rides": Call("GET", "/rides/", 2, params={"limit": 100}),
+    "export rides": Call("GET", "/rides/export", 1),
+    "read ride by code": Call("GET", "/rides/code/{ride_code}", 1),
+    "read ride": Call("GET", "/rides/{ride_id}", 1),
+    "roster": Call("GET", "/rides/{ride_id}/participants", 2, params={"limit": 100}),
+    "nearby": Call("GET", "/rides/{ride_id}/nearby", 2, params={"lat": 48.1, "lon": 11.5, "radius_m": 50_000}),
+    "update ride": Call("PUT", "/rides/{ride_id}", 4, json={"title": "Renamed"}),
+    "delete ride": Call("DELETE", "/rides/{empty_ride_id}", 6, status=status.HTTP_204_NO_CONTENT),
+    "list participations": Call("GET", "/participations/", 2, params={"limit": 100}),
+    "export participations": Call("GET", "/participations/export", 1),
+    "join ride": Call("POST", "/participations/", 6, json={"ride_code": "{empty_ride_code}", **FIX},
+                      status=status.HTTP_201_CREATED),
+    "location batch": Call("POST", "/participations/locations", 3, json={"fixes": [
+        {"participation_id": "{participation_id}", **FIX},
+    ]}),
+    "read participation": Call("GET", "/participations/{participation_id}", 1),
+    "track": Call("GET", "/participations/{participation_id}/track", 3),
+    "update participation": Call("PUT", "/participations/{participation_id}", 5, json=FIX),
+}
+
+
+@fixture(scope="function")
+def world(test_client: TestClient, session: Session, insert_rows: InsertRowsType) -> dict:
+    """A logged-in owner with a ride and a participation, next to ROWS of everything else."""
+    owner = UserModel(username="budget_owner", password=hashed_password("budget_password"))
+    session.add(owner)
+    session.flush()
+    token = test_client.post(
+        "/auth/login", data={"username": "budget_owner", "password": "budget_password"},
+    ).json()["access_token"]
+
+    others = insert_rows(UserModel, [{"username": f"budget_{i}", "password": "x"} for i in range(ROWS)])
+    rides = insert_rows(RideModel, [
+        {"code": f"BUD{i:03d}", "title": f"Ride {i}", "start_time": datetime(2025, 11, 18, tzinfo=timezone.utc),
+         "created_by_user_id": owner.id}
+        for i in range(ROWS)
+    ])
+    ride, empty_ride = rides[0], rides[-1]
+    participations = insert_rows(ParticipationModel, [
+        {"user_id": user.id, "ride_id": ride.id, "latitude": 48.1, "longitude": 11.5,
+         "updated_at": datetime(2025, 11, 18, 15, tzinfo=timezone.utc)}
+        for user in [owner, *others]
+    ])
+    test_client.put(
+        f"/participations/{participations[0].id}", json=FIX, headers={"Authorization": f"Bearer {token}"},
+    ).raise_for_status()  # a recorded track
+    return {
+        "headers": {"Authorization": f"Bearer {token}"},
+        "user_id": owner.id,
+        "ride_id": ride.id,
+        "ride_code": ride.code,
+        "empty_ride_id": empty_ride.id,
+        "empty_ride_code": empty_ride.code,
+        "participation_id": participations[0].id,
+    }
+
+
+def _fill(value, ids: dict):
+    if isinstance(value, str):
+        filled = value.format(**ids)
+        return int(filled) if filled.isdigit() and value.startswith("{") else filled
+    if isinstance(value, dict):
+        return {key: _fill(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, ids) for item in value]
+    return value
+
+
+@mark.parametrize("call", CALLS.values(), ids=CALLS.keys())
+def test_endpoint_stays_within_query_budget(
+        app: FastAPI,
+        test_client: TestClient,
+        session: Session,
+        world: dict,
+        assert_max_queries,
+        caplog: LogCaptureFixture,
+        call: Call,
+):
+    # Nothing from the setup in the identity map or the token cache: count
+    # what a request on a fresh connection would run.
+    session.expunge_all()
+    app.state.token_cache.clear()
+
+    with caplog.at_level(logging.WARNING, logger="app.lazy_loads"), assert_max_queries(call.budget):
+        response = test_client.request(
+            call.method,
+            _fill(call.path, world),
+            headers=world["headers"],
+            params=call.params,
+            json=_fill(call.json, world),
+            data=call.data,
+        )
+
+    assert response.status_code == call.status, response.text
+    assert not caplog.records, caplog.text
+
+
+class RideWithOrganizer(RideResponse):
+    organizer: UserResponse
+
+
+def test_budget_fails_past_the_limit(session: Session, test_ride: RideModel, assert_max_queries):
+    session.expunge_all()
+
+    with raises(AssertionError, match="2 queries over a budget of 1"):
+        with assert_max_queries(1):
+            ride = session.get(RideModel, test_ride.id)
+            ride.organizer
+
+
+def test_lazy_load_in_serialization_is_logged(session: Session, test_ride: RideModel, caplog: LogCaptureFixture):
+    session.expunge_all()
+    rides = session.query(RideModel).all()
+
+    with caplog.at_level(logging.WARNING, logger="app.lazy_loads"):
+        TypeAdapter(list[RideWithOrganizer]).validate_python(rides, from_attributes=True)
+
+    (record,) = caplog.records
+    assert "RideModel.organizer" in record.getMessage()
+    assert f"{__file__}:" in record.getMessage()
+    assert "test_lazy_load_in_serialization_is_logged" in record.getMessage()
+
+
+def test_lazy_load_outside_serialization_is_not_logged(
+        session: Session,
+        test_ride: RideModel,
+        caplog: LogCaptureFixture,
+):
+    session.expunge_all()
+
+    with caplog.at_level(logging.WARNING, logger="app.lazy_loads"):
+        session.get(RideModel, test_ride.id).has_participants
+
+    assert not caplog.records
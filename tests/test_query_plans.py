@@ -0,0 +1,248 @@
+"""EXPLAIN QUERY PLAN regression harness for the repositories.
+
+Every public repository method has a case below. Each case runs against the
+test database while the SQL it issues is captured; every captured statement is
+then explained and the case fails if SQLite plans a full table scan
+(`SCAN <table>` without an index) or sorts through a temporary B-tree. Cases
+whose full read is intentional (exports, rowid-ordered first pages stopped by
+LIMIT) are marked `scan_ok`; cases that group by a computed bucket, which
+no index can order, are marked `group_ok`. Adding a repository method without a case here
+fails `test_every_repository_method_has_a_plan_case`.
+"""
+import inspect
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from pytest import fixture, mark
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+
+from app.auth_cache import TokenVersions
+from app.geo import cell_ranges, grid_cell
+from app.locations import history_row
+from app.migrations import upgrade_schema
+from app.models import UserModel, RideModel, ParticipationModel
+from app.passwords import NO_PASSWORD
+from app.repositories import (
+    UserRepository,
+    RideRepository,
+    ParticipationRepository,
+    LocationHistoryRepository,
+)
+
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE")
+TEMP_GROUP = re.compile(r"USE TEMP B-TREE FOR (GROUP|ORDER) BY")
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    call: Callable[[SimpleNamespace], object]
+    scan_ok: bool = False
+    group_ok: bool = False
+
+
+START = datetime(2025, 11, 18, 15, 30, tzinfo=timezone.utc)
+
+PLAN_CASES: dict[str, PlanCase] = {
+    "UserRepository.create_user": PlanCase(
+        lambda d: d.users.create_user(username="plan_new_user", password="password")),
+    "UserRepository.get_by_username": PlanCase(
+        lambda d: d.users.get_by_username(username="plan_user")),
+    "UserRepository.get_by_id": PlanCase(
+        lambda d: d.users.get_by_id(user_id=d.user_id)),
+    "UserRepository.get_all_users": PlanCase(
+        lambda d: d.users.get_all_users(limit=10), scan_ok=True),
+    "UserRepository.get_all_users:after": PlanCase(
+        lambda d: d.users.get_all_users(limit=10, after_id=d.user_id)),
+    "UserRepository.update_password": PlanCase(
+        lambda d: d.users.update_password(d.session.get(UserModel, d.user_id), password="rehashed")),
+    "UserRepository.revoke_tokens": PlanCase(
+        lambda d: d.users.revoke_tokens(d.session.get(UserModel, d.user_id))),
+
+    "RideRepository.create_ride": PlanCase(
+        lambda d: d.rides.create_ride(
+            title="Plan ride", description=None, start_time=START, created_by_user_id=d.user_id,
+        )),
+    "RideRepository.get_all_rides": PlanCase(
+        lambda d: d.rides.get_all_rides(limit=10)),
+    "RideRepository.get_all_rides:after": PlanCase(
+        lambda d: d.rides.get_all_rides(limit=10, after=(START, d.ride_id))),
+    "RideRepository.iter_rides": PlanCase(
+        lambda d: [list(batch) for batch in d.rides.iter_rides()], scan_ok=True),
+    "RideRepository.get_by_code": PlanCase(
+        lambda d: d.rides.get_by_code(ride_code="PLAN01")),
+    "RideRepository.get_by_id": PlanCase(
+        lambda d: d.rides.get_by_id(ride_id=d.ride_id)),
+    "RideRepository.get_version": PlanCase(
+        lambda d: d.rides.get_version(ride_id=d.ride_id)),
+    "RideRepository.get_version_by_code": PlanCase(
+        lambda d: d.rides.get_version_by_code(ride_code="PLAN01")),
+    "RideRepository.get_table_version": PlanCase(
+        lambda d: d.rides.get_table_version()),
+    "RideRepository.delete_ride": PlanCase(
+        lambda d: d.rides.delete_ride(ride=d.session.get(RideModel, d.empty_ride_id))),
+    "RideRepository.update_ride": PlanCase(
+        lambda d: d.rides.update_ride(d.session.get(RideModel, d.ride_id), title="Renamed")),
+
+    "ParticipationRepository.create_participation": PlanCase(
+        lambda d: d.participations.create_participation(user_id=d.user_id, ride_id=d.empty_ride_id)),
+    "ParticipationRepository.get_by_user_and_ride": PlanCase(
+        lambda d: d.participations.get_by_user_and_ride(user_id=d.user_id, ride_id=d.ride_id)),
+    "ParticipationRepository.get_by_id": PlanCase(
+        lambda d: d.participations.get_by_id(participation_id=d.participation_id)),
+    "ParticipationRepository.get_version": PlanCase(
+        lambda d: d.participations.get_version(participation_id=d.participation_id)),
+    "ParticipationRepository.get_all_participations": PlanCase(
+        lambda d: d.participations.get_all_participations(limit=10), scan_ok=True),
+    "ParticipationRepository.get_all_participations:after": PlanCase(
+        lambda d: d.participations.get_all_participations(limit=10, after_id=d.participation_id)),
+    "ParticipationRepository.get_page_versions": PlanCase(
+        lambda d: d.participations.get_page_versions(limit=10), scan_ok=True),
+    "ParticipationRepository.get_page_versions:after": PlanCase(
+        lambda d: d.participations.get_page_versions(limit=10, after_id=d.participation_id)),
+    "ParticipationRepository.iter_participations": PlanCase(
+        lambda d: [list(batch) for batch in d.participations.iter_participations()], scan_ok=True),
+    "ParticipationRepository.get_location_states": PlanCase(
+        lambda d: d.participations.get_location_states(participation_ids=[d.participation_id, 0])),
+    "ParticipationRepository.apply_location_fixes": PlanCase(
+        lambda d: d.participations.apply_location_fixes([
+            {"b_id": d.participation_id, "b_latitude": 48.1, "b_longitude": 11.5, "b_updated_at": START,
+             "b_grid_cell": grid_cell(48.1, 11.5)},
+            {"b_id": 0, "b_latitude": 48.1, "b_longitude": 11.5, "b_updated_at": START,
+             "b_grid_cell": grid_cell(48.1, 11.5)},
+        ])),
+    "ParticipationRepository.get_ride_participants": PlanCase(
+        lambda d: d.participations.get_ride_participants(ride_id=d.ride_id, limit=10)),
+    "ParticipationRepository.get_ride_participants:after": PlanCase(
+        lambda d: d.participations.get_ride_participants(
+            ride_id=d.ride_id, limit=10, after_id=d.participation_id,
+        )),
+    "ParticipationRepository.get_in_grid_cells": PlanCase(
+        lambda d: d.participations.get_in_grid_cells(
+            ride_id=d.ride_id, ranges=cell_ranges(48.1351, 11.582, 5_000),
+        )),
+    "ParticipationRepository.update_participation": PlanCase(
+        lambda d: d.participations.update_participation(
+            d.session.get(ParticipationModel, d.participation_id),
+            latitude=48.1, longitude=11.5, updated_at=START,
+        )),
+
+    "LocationHistoryRepository.record_fixes": PlanCase(
+        lambda d: d.history.record_fixes([history_row(d.participation_id, 48.1, 11.5, START)])),
+    "LocationHistoryRepository.get_time_range": PlanCase(
+        lambda d: d.history.get_time_range(participation_id=d.participation_id)),
+    "LocationHistoryRepository.get_track": PlanCase(
+        lambda d: d.history.get_track(
+            participation_id=d.participation_id, start=START, end=START + timedelta(hours=1), bucket_seconds=60,
+        ), group_ok=True),
+    # Background job: reads every participation's fixes past the retention.
+    "LocationHistoryRepository.compact": PlanCase(
+        lambda d: d.history.compact(older_than=START + timedelta(hours=1), bucket_seconds=60), scan_ok=True),
+}
+
+
+@fixture(scope="function")
+def plan_data(session: Session) -> SimpleNamespace:
+    user = UserModel(username="plan_user", password="password")
+    session.add(user)
+    session.flush()
+    ride = RideModel(code="PLAN01", title="Plan", start_time=START, created_by_user_id=user.id)
+    empty_ride = RideModel(code="PLAN02", title="Empty", start_time=START, created_by_user_id=user.id)
+    session.add_all([ride, empty_ride])
+    session.flush()
+    participation = ParticipationModel(user_id=user.id, ride_id=ride.id)
+    session.add(participation)
+    session.flush()
+    LocationHistoryRepository(session=session).record_fixes([
+        history_row(participation.id, 48.0, 11.5, START + timedelta(seconds=10 * i)) for i in range(12)
+    ])
+    # Start every case from an empty identity map so lookups really hit SQL.
+    session.expunge_all()
+    return SimpleNamespace(
+        session=session,
+        users=UserRepository(session=session),
+        rides=RideRepository(session=session),
+        participations=ParticipationRepository(session=session),
+        history=LocationHistoryRepository(session=session),
+        user_id=user.id,
+        ride_id=ride.id,
+        empty_ride_id=empty_ride.id,
+        participation_id=participation.id,
+    )
+
+
+def explain(session: Session, statement: str, parameters) -> list[str]:
+    rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row[3] for row in rows]
+
+
+@mark.parametrize("case_name", PLAN_CASES)
+def test_repository_queries_use_indexes(case_name: str, plan_data: SimpleNamespace):
+    case = PLAN_CASES[case_name]
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("EXPLAIN"):
+            # executemany: one parameter set is enough to explain the plan.
+            captured.append((statement, parameters[0] if executemany else parameters))
+
+    engine = plan_data.session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        case.call(plan_data)
+        plan_data.session.flush()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert captured, f"{case_name} issued no SQL"
+    if case.scan_ok:
+        return
+    for statement, parameters in captured:
+        plan = explain(plan_data.session, statement, parameters)
+        bad = [
+            step for step in plan
+            if FULL_SCAN.match(step)
+            or (TEMP_SORT.search(step) and not (case.group_ok and TEMP_GROUP.search(step)))
+        ]
+        assert not bad, f"{case_name} scans: {bad}\n{statement}"
+
+
+def test_every_repository_method_has_a_plan_case():
+    covered = {name.split(":")[0] for name in PLAN_CASES}
+    for repository in (UserRepository, RideRepository, ParticipationRepository, LocationHistoryRepository):
+        for name, _ in inspect.getmembers(repository, inspect.isfunction):
+            if not name.startswith("_"):
+                assert f"{repository.__name__}.{name}" in covered, (
+                    f"Add a PLAN_CASES entry for {repository.__name__}.{name}"
+                )
+
+
+def test_token_version_refresh_reads_only_revoked_users(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    upgrade_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"username": f"user_{i}", "password": NO_PASSWORD, "token_version": int(i == 3)} for i in range(10)
+        ])
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("EXPLAIN"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    token_versions = TokenVersions()
+    assert token_versions.refresh(engine, user_ids=[1, 99]) == 1
+    event.remove(engine, "before_cursor_execute", capture)
+
+    with Session(engine) as session:
+        for statement, parameters in captured:
+            plan = explain(session, statement, parameters)
+            assert not [step for step in plan if FULL_SCAN.match(step)], f"{plan}\n{statement}"
+        assert any("ix_users_token_version_revoked" in step for step in explain(session, *captured[0]))
+    engine.dispose()
@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import mark, raises
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.database import create_database_engine, create_read_database_engine
+from app.main import create_app
+from app.migrations import upgrade_schema
+from app.models import RideModel, UserModel
+from tests.conftest import app_settings
+
+
+def test_read_engine_refuses_writes(tmp_path: Path):
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'p.db'}")
+    primary = create_database_engine(settings)
+    read = create_read_database_engine(settings, primary)
+    try:
+        upgrade_schema(primary)
+        assert read is not primary
+        with read.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM users")).scalar_one() == 0
+            with raises(OperationalError, match="readonly"):
+                connection.execute(text("INSERT INTO users (username, password) VALUES ('x', 'y')"))
+    finally:
+        read.dispose()
+        primary.dispose()
+
+
+def test_in_memory_read_engine_is_the_primary():
+    settings = app_settings(database_read_url="sqlite://")
+    primary = create_database_engine(settings)
+    try:
+        assert create_read_database_engine(settings, primary) is primary
+    finally:
+        primary.dispose()
+
+
+def _replica(path: Path) -> str:
+    """A database holding one ride that the primary does not have."""
+    url = f"sqlite:///{path}"
+    engine = create_database_engine(Settings(database_url=url))
+    try:
+        upgrade_schema(engine)
+        with Session(engine) as session, session.begin():
+            organizer = UserModel(username="replica_user", password="x")
+            session.add(organizer)
+            session.flush()
+            session.add(RideModel(
+                code="REPLICA", title="From the replica",
+                start_time=datetime(2025, 11, 18, tzinfo=timezone.utc), created_by_user_id=organizer.id,
+            ))
+    finally:
+        engine.dispose()
+    return url
+
+
+@mark.parametrize("database_async", [False, True], ids=["sync", "async"])
+def test_get_routes_read_from_the_read_database(tmp_path: Path, database_async: bool):
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path / 'primary.db'}",
+        database_read_url=_replica(tmp_path / "replica.db"),
+        database_async=database_async,
+    )
+    with TestClient(app=create_app(settings)) as client:
+        # Writes go to the primary ...
+        created = client.post("/users/", json={"username": "primary_user", "password": "secret"})
+        assert created.status_code == status.HTTP_201_CREATED
+        # ... and GET routes answer from the replica.
+        assert [user["username"] for user in client.get("/users/").json()["items"]] == ["replica_user"]
+        ride = client.get("/rides/code/REPLICA")
+        assert ride.status_code == status.HTTP_200_OK
+        assert ride.json()["title"] == "From the replica"
+        assert client.get(f"/rides/{ride.json()['id']}/participants").status_code == status.HTTP_200_OK
+        # So does the user lookup of GET /auth/me: user 1 of the replica.
+        token = client.post("/auth/login", data={"username": "primary_user", "password": "secret"}).json()
+        me = client.get("/auth/me", headers={"Authorization": f"Bearer {token['access_token']}"})
+        assert me.json()["username"] == "replica_user"
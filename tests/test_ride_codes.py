@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+
+from pytest import raises
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import RideModel, UserModel
+from app.repositories import MAX_CODE_ATTEMPTS, RideRepository
+
+START = datetime(2025, 11, 18, 15, 30, tzinfo=timezone.utc)
+
+
+def _create(ride_repository: RideRepository, user: UserModel) -> RideModel:
+    return ride_repository.create_ride(
+        title="Coded ride",
+        description=None,
+        start_time=START,
+        created_by_user_id=user.id,
+    )
+
+
+def test_create_ride_issues_one_ride_insert(session: Session, test_user: UserModel):
+    statements: list[str] = []
+    engine = session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        ride = _create(RideRepository(session=session), test_user)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    # No SELECT for a free code first: the INSERT is the only statement on rides.
+    ride_statements = [statement for statement in statements if " rides" in statement]
+    assert len(ride_statements) == 1 and ride_statements[0].startswith("INSERT INTO rides")
+    assert len(ride.code) == 6
+    assert ride.is_active is True
+    assert ride.created_at is not None
+    assert session.get(RideModel, ride.id) is ride
+
+
+def test_create_ride_retries_on_code_collision(
+        session: Session,
+        test_user: UserModel,
+        test_ride: RideModel,
+        mocker,
+):
+    ride_repository = RideRepository(session=session)
+    mocker.patch.object(
+        ride_repository, "_generate_string_code", side_effect=[test_ride.code, "NEW001"]
+    )
+
+    ride = _create(ride_repository, test_user)
+
+    assert ride.code == "NEW001"
+    assert session.get(RideModel, test_ride.id).code == test_ride.code
+
+
+def test_create_ride_gives_up_after_max_attempts(
+        session: Session,
+        test_user: UserModel,
+        test_ride: RideModel,
+        mocker,
+):
+    ride_repository = RideRepository(session=session)
+    mocker.patch.object(ride_repository, "_generate_string_code", return_value=test_ride.code)
+
+    with raises(RuntimeError, match="unique ride code"):
+        _create(ride_repository, test_user)
+    assert ride_repository._generate_string_code.call_count == MAX_CODE_ATTEMPTS
@@ -0,0 +1,80 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+from pytest import mark
+from sqlalchemy.orm import Session
+
+from app.models import ParticipationModel, RideModel, UserModel
+from tests.conftest import InsertRowsType, captured_statements
+
+
+def _join(insert_rows: InsertRowsType, ride: RideModel, count: int) -> list[ParticipationModel]:
+    users = insert_rows(UserModel, [
+        {"username": f"roster_{ride.id}_{i}", "password": "password"} for i in range(count)
+    ])
+    return insert_rows(ParticipationModel, [{"user_id": user.id, "ride_id": ride.id} for user in users])
+
+
+def _count_queries(session: Session, call) -> tuple[object, int]:
+    with captured_statements(session) as statements:
+        result = call()
+    return result, len(statements)
+
+
+def test_roster_lists_participants_with_usernames(
+        test_client: TestClient,
+        insert_rows: InsertRowsType,
+        test_ride: RideModel,
+):
+    participations = _join(insert_rows, test_ride, 3)
+
+    response = test_client.get(f"/rides/{test_ride.id}/participants")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    items = response.json()["items"]
+    assert [item["id"] for item in items] == [p.id for p in participations]
+    assert [item["participant"]["username"] for item in items] == [
+        f"roster_{test_ride.id}_{i}" for i in range(3)
+    ]
+    assert items[0]["participant"]["id"] == participations[0].user_id
+
+
+def test_roster_is_paginated(
+        test_client: TestClient,
+        insert_rows: InsertRowsType,
+        test_ride: RideModel,
+        ride_factory,
+):
+    participations = _join(insert_rows, test_ride, 5)
+    _join(insert_rows, ride_factory(), 2)  # another ride's roster
+
+    first = test_client.get(f"/rides/{test_ride.id}/participants", params={"limit": 3}).json()
+    second = test_client.get(
+        f"/rides/{test_ride.id}/participants", params={"limit": 3, "cursor": first["next_cursor"]},
+    ).json()
+
+    assert [item["id"] for item in first["items"] + second["items"]] == [p.id for p in participations]
+    assert second["next_cursor"] is None
+
+
+@mark.parametrize("roster_size", [1, 25])
+def test_roster_query_count_does_not_grow_with_roster(
+        test_client: TestClient,
+        session: Session,
+        insert_rows: InsertRowsType,
+        test_ride: RideModel,
+        roster_size: int,
+):
+    _join(insert_rows, test_ride, roster_size)
+    # Start from an empty identity map, or cached users would hide lazy loads.
+    session.expunge_all()
+
+    response, queries = _count_queries(
+        session, lambda: test_client.get(f"/rides/{test_ride.id}/participants", params={"limit": 100}),
+    )
+
+    assert len(response.json()["items"]) == roster_size
+    assert queries == 2  # the ride, then the roster joined with its users
+
+
+def test_roster_of_unknown_ride(test_client: TestClient):
+    assert test_client.get("/rides/999999/participants").status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,111 @@
+import random
+from datetime import datetime
+from pathlib import Path
+
+from pytest import fixture
+from sqlalchemy import Engine, create_engine, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.geo import grid_cell
+from app.models import DbModel, ParticipationModel, RideModel, UserModel
+from seed_data import UserPool, riders_per_ride, seed_massive, seeded_ride_code
+
+
+@fixture(scope="function")
+def engine(tmp_path: Path) -> Engine:
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    DbModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _quiet(message: str) -> None:
+    pass
+
+
+def _participations(engine: Engine) -> list[tuple]:
+    with engine.connect() as connection:
+        return list(connection.execute(
+            select(ParticipationModel.user_id, ParticipationModel.ride_id, ParticipationModel.updated_at)
+            .order_by(ParticipationModel.id)
+        ))
+
+
+def test_seed_massive_loads_consistent_rows(engine: Engine):
+    counts = seed_massive(engine, 50, 20, 300, seed=1, chunk_size=64, report=_quiet)
+
+    assert counts == {"users": 50, "rides": 20, "participations": 300}
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(UserModel)) == 51  # and vadim
+        rides = session.scalars(select(RideModel)).all()
+        assert len({ride.code for ride in rides}) == 20
+        assert all(ride.is_active and ride.version == 1 and ride.created_at for ride in rides)
+        participation = session.scalars(select(ParticipationModel)).first()
+        assert participation.updated_at.year == 2025
+        assert participation.grid_cell == grid_cell(participation.latitude, participation.longitude)
+
+    pairs = [(user_id, ride_id) for user_id, ride_id, _ in _participations(engine)]
+    assert len(set(pairs)) == len(pairs)
+    names = {index["name"] for index in inspect(engine).get_indexes(ParticipationModel.__tablename__)}
+    assert {index.name for index in ParticipationModel.__table__.indexes} <= names
+
+
+def test_seed_massive_appends_after_existing_rows(engine: Engine):
+    seed_massive(engine, 5, 5, 10, seed=1, report=_quiet)
+    seed_massive(engine, 5, 5, 10, seed=2, report=_quiet)
+
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(RideModel)) == 10
+        assert session.scalar(select(func.count()).select_from(ParticipationModel)) == 20
+
+
+def test_hot_rides_and_user_skew():
+    riders = riders_per_ride(10, 1000, 500, 2, 300, random.Random(1))
+    assert riders[:2] == [300, 300]
+    assert sum(riders) == 1000 and max(riders[2:]) - min(riders[2:]) <= 1
+
+    pool = UserPool(fixed_user_id=1, first_user_id=10, size=1000, skew=3.0)
+    rng = random.Random(1)
+    picks = [pool.pick(rng) for _ in range(10_000)]
+    head = sum(1 for user_id in picks if user_id < 10 + 100)
+    assert 0.4 < head / len(picks) < 0.52
+    assert sorted(pool.pick_distinct(rng, 1000)) == [1, *range(10, 10 + 999)]
+
+
+def test_worker_processes_generate_the_same_rows(tmp_path: Path, engine: Engine):
+    other = create_engine(f"sqlite:///{tmp_path / 'workers.db'}")
+    DbModel.metadata.create_all(other)
+
+    seed_massive(engine, 20, 10, 100, hot_rides=1, hot_ride_riders=15, seed=3, chunk_size=16, report=_quiet)
+    seed_massive(other, 20, 10, 100, hot_rides=1, hot_ride_riders=15, seed=3, chunk_size=16, workers=2,
+                 report=_quiet)
+
+    assert _participations(engine) == _participations(other)
+    other.dispose()
+
+
+def test_seeded_ride_codes_are_unique():
+    codes = [seeded_ride_code(ride_id) for ride_id in range(1, 50_001)]
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) == 6 and code.isalnum() and code.upper() == code for code in codes)
+
+
+def test_seeded_rides_step_around_codes_taken_by_the_api(engine: Engine):
+    seed_massive(engine, 5, 1, 0, seed=1, report=_quiet)
+    with Session(engine) as session, session.begin():
+        organizer = session.scalars(select(UserModel)).first()
+        # API rides 2 and 3 hold the codes the seeded rides 5 and 7 would get.
+        session.add_all([
+            RideModel(id=ride_id, code=seeded_ride_code(taken), title="API", created_by_user_id=organizer.id,
+                      start_time=datetime(2026, 1, 1))
+            for ride_id, taken in ((2, 5), (3, 7))
+        ])
+
+    seed_massive(engine, 5, 4, 0, seed=2, chunk_size=2, report=_quiet)
+
+    with Session(engine) as session:
+        codes = dict(session.execute(select(RideModel.id, RideModel.code)).all())
+    assert sorted(codes) == [1, 2, 3, 4, 5, 6, 7]
+    assert len(set(codes.values())) == len(codes)
+    assert codes[4] == seeded_ride_code(4) and codes[6] == seeded_ride_code(6)
+    assert codes[5] != seeded_ride_code(5) and codes[7] != seeded_ride_code(7)
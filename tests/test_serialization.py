@@ -0,0 +1,53 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from pytest import mark
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import RideModel
+from app.schemas import RideResponse
+from app.serialization import dump_rows, dumps
+
+
+@mark.parametrize("start_time", [
+    "2025-11-18T15:30:00",
+    "2025-11-18T15:30:00+00:00",
+    "2025-11-18T15:30:00Z",
+    "2025-11-18T17:30:00+02:00",
+])
+def test_every_route_formats_datetimes_as_utc(
+        test_client: TestClient,
+        auth_headers: dict[str, str],
+        start_time: str,
+):
+    created = test_client.post(
+        "/rides/", json={"title": "Formatted", "start_time": start_time}, headers=auth_headers,
+    ).json()
+
+    item = test_client.get(f"/rides/{created['id']}").json()
+    listed = test_client.get("/rides/", params={"limit": 100}).json()["items"]
+    exported = [json.loads(line) for line in test_client.get("/rides/export").text.splitlines()]
+
+    assert created["start_time"] == item["start_time"] == "2025-11-18T15:30:00+00:00"
+    assert item["created_at"].endswith("+00:00")
+    assert [ride for ride in listed if ride["id"] == created["id"]] == [item]
+    assert [ride for ride in exported if ride["id"] == created["id"]] == [item]
+
+
+def test_aware_datetimes_are_stored_as_utc(session: Session, test_ride: RideModel):
+    test_ride.start_time = datetime(2025, 11, 18, 17, 30, tzinfo=timezone(timedelta(hours=2)))
+    session.flush()
+
+    stored = session.execute(text("SELECT start_time FROM rides WHERE id = :id"), {"id": test_ride.id}).scalar()
+    assert stored.startswith("2025-11-18 15:30:00")
+
+
+def test_python_mode_dump_leaves_formatting_to_orjson(session: Session, test_ride: RideModel):
+    session.expire_all()
+
+    (row,) = dump_rows([test_ride], RideResponse)
+
+    assert isinstance(row["start_time"], datetime)
+    assert json.loads(dumps([row])) == [json.loads(RideResponse.model_validate(test_ride).model_dump_json())]
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from pytest import fixture
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+
+from app.auth_cache import TokenVersions
+from app.main import create_app
+from app.models import DbModel, UserModel
+from app.security import decode_access_token
+from tests.conftest import AUTH_USER_PASSWORD, app_settings
+
+
+@fixture(scope="function")
+def app() -> FastAPI:
+    return create_app(app_settings(auth_stateless=True))
+
+
+def test_token_carries_the_principal(test_client: TestClient, auth_headers: dict[str, str]):
+    claims = decode_access_token(auth_headers["Authorization"].removeprefix("Bearer "))
+
+    assert claims["username"] == "auth_user"
+    assert claims["ver"] == 0
+
+
+def test_stateless_principal_needs_no_query(
+        app: FastAPI,
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+):
+    app.state.token_cache.clear()
+    statements: list[str] = []
+    engine = session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = test_client.get("/auth/me", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json()["username"] == "auth_user"
+    assert statements == []
+
+
+def test_revoke_rejects_earlier_tokens(test_client: TestClient, auth_headers: dict[str, str]):
+    assert test_client.get("/auth/me", headers=auth_headers).status_code == status.HTTP_200_OK
+
+    assert test_client.post("/auth/revoke", headers=auth_headers).status_code == status.HTTP_204_NO_CONTENT
+
+    response = test_client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token revoked"
+
+    login = test_client.post("/auth/login", data={"username": "auth_user", "password": AUTH_USER_PASSWORD})
+    fresh_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert test_client.get("/auth/me", headers=fresh_headers).status_code == status.HTTP_200_OK
+
+
+def test_deleted_user_is_rejected(
+        test_client: TestClient,
+        session: Session,
+        auth_headers: dict[str, str],
+):
+    session.delete(session.query(UserModel).filter_by(username="auth_user").one())
+    session.commit()
+
+    response = test_client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_refresh_loads_versions_bumped_elsewhere(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'versions.db'}")
+    DbModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"id": 1, "username": "fresh", "password": "p", "token_version": 0},
+            {"id": 2, "username": "revoked", "password": "p", "token_version": 3},
+        ])
+    token_versions = TokenVersions()
+    token_versions.record(1, 1)
+
+    assert token_versions.refresh(engine) == 2
+    engine.dispose()
+
+    assert token_versions.is_current(1, 1)  # local bump survives the snapshot
+    assert not token_versions.is_current(1, 0)
+    assert not token_versions.is_current(2, 2)
+    assert token_versions.is_current(2, 3)